@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ This plugins consolidate FieldMove project files into a QGIS project
+ Basemap preparation with GDAL: overview pyramids, cached band statistics,
+ virtual mosaics and Cloud-Optimized GeoTIFFs, built once in the background
+ import task
+                              -------------------
+        begin                : 2025-03-29
+        git sha              : $Format:%H$
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+
+from osgeo import gdal
+
+from .fieldmove_core import COG_SUFFIX, ImportCanceled
+
+# Rasters smaller than this (pixels on the longest side) are drawn fast enough without overviews
+OVERVIEW_MIN_SIZE = 1024
+
+# Size of the coarsest overview level (pixels on the longest side)
+OVERVIEW_MAX_SIZE = 256
+
+OVERVIEW_RESAMPLING = 'AVERAGE'
+
+
+def overview_levels(width, height):
+    """Decimation factors down to OVERVIEW_MAX_SIZE, none for small rasters"""
+    size = max(width, height)
+    if size < OVERVIEW_MIN_SIZE:
+        return []
+    levels = []
+    factor = 2
+    while size / factor >= OVERVIEW_MAX_SIZE:
+        levels.append(factor)
+        factor *= 2
+    return levels
+
+
+def _progress(feedback, start, span):
+    """GDAL progress callback reporting to a QgsFeedback-like object, cancelling with it"""
+    if feedback is None:
+        return None
+
+    def callback(complete, message, data):
+        if feedback.isCanceled():
+            return 0
+        feedback.setProgress(start + complete * span)
+        return 1
+    return callback
+
+
+def build_overviews(dataset, feedback=None):
+    """Build external (.ovr) overviews of a dataset lacking them, returns whether some were built"""
+    band = dataset.GetRasterBand(1)
+    if band is None or band.GetOverviewCount() > 0:
+        return False
+    levels = overview_levels(dataset.RasterXSize, dataset.RasterYSize)
+    if not levels:
+        return False
+    if dataset.BuildOverviews(OVERVIEW_RESAMPLING, levels, _progress(feedback, 0., 80.)) != 0:
+        if feedback is not None and feedback.isCanceled():
+            raise ImportCanceled()
+        raise RuntimeError(f"Could not build the overviews: {gdal.GetLastErrorMsg()}")
+    return True
+
+
+def band_statistics(dataset):
+    """[min, max] of every band, computed from the overviews and cached in the .aux.xml file
+
+    Statistics already stored with the raster (by a previous import, GDAL or
+    QGIS) are reused without reading any pixel.
+    """
+    ranges = []
+    for index in range(1, dataset.RasterCount + 1):
+        band = dataset.GetRasterBand(index)
+        minimum = band.GetMetadataItem('STATISTICS_MINIMUM')
+        maximum = band.GetMetadataItem('STATISTICS_MAXIMUM')
+        if minimum is None or maximum is None:
+            statistics = band.ComputeStatistics(True)
+            if not statistics:
+                raise RuntimeError(f"Could not compute the statistics: {gdal.GetLastErrorMsg()}")
+            minimum, maximum = statistics[:2]
+        ranges.append((float(minimum), float(maximum)))
+    return ranges
+
+
+def prepare_basemap(path, feedback=None):
+    """Make a basemap quick to open and draw (worker thread)
+
+    Builds its missing overviews and band statistics, which GDAL stores
+    next to the raster (.ovr and .aux.xml), and returns the band ranges
+    for the contrast stretch.
+    """
+    dataset = gdal.Open(path, gdal.GA_ReadOnly)
+    if dataset is None:
+        raise RuntimeError(f"Could not open {path}: {gdal.GetLastErrorMsg()}")
+    try:
+        build_overviews(dataset, feedback)
+        ranges = band_statistics(dataset)
+    finally:
+        # Closing the dataset writes the statistics to the .aux.xml file
+        dataset = None
+    if feedback is not None:
+        feedback.setProgress(100.)
+    return ranges
+
+
+def basemap_sidecars(path):
+    """Overview and statistics files GDAL keeps next to a raster"""
+    return [sidecar for sidecar in (f"{path}.ovr", f"{path}.aux.xml") if os.path.exists(sidecar)]
+
+
+def raster_layout(path):
+    """Band count, band data types and CRS of a raster, None if GDAL cannot open it"""
+    dataset = gdal.Open(path, gdal.GA_ReadOnly)
+    if dataset is None:
+        return None
+    bands = tuple(dataset.GetRasterBand(i).DataType for i in range(1, dataset.RasterCount + 1))
+    return (bands, dataset.GetProjection())
+
+
+def mosaic_groups(paths):
+    """Split rasters into groups sharing the same band layout and CRS, in order of first appearance
+
+    Rasters GDAL cannot open are left on their own.
+    """
+    groups = {}
+    for path in paths:
+        layout = raster_layout(path)
+        groups.setdefault(layout if layout is not None else path, []).append(path)
+    return list(groups.values())
+
+
+def build_mosaic(vrt_path, paths):
+    """Write a virtual mosaic (VRT) of rasters sharing the same band layout (worker thread)
+
+    The overviews and statistics of a previous mosaic are removed, they are
+    rebuilt for the new one by prepare_basemap().
+    """
+    os.makedirs(os.path.dirname(vrt_path), exist_ok=True)
+    for sidecar in basemap_sidecars(vrt_path):
+        os.remove(sidecar)
+    mosaic = gdal.BuildVRT(vrt_path, paths)
+    if mosaic is None:
+        raise RuntimeError(f"Could not build the basemap mosaic: {gdal.GetLastErrorMsg()}")
+    # Closing the dataset writes the VRT file
+    mosaic = None
+    return vrt_path
+
+
+def cog_path(path):
+    """Cloud-Optimized GeoTIFF derived from a basemap, stored next to it"""
+    return os.path.splitext(path)[0] + COG_SUFFIX
+
+
+def convert_to_cog(path, output_path, crs_wkt=None, feedback=None):
+    """Convert a raster into a tiled, compressed Cloud-Optimized GeoTIFF with overviews (worker thread)
+
+    With crs_wkt the raster is warped to that CRS on the way, so it is not
+    reprojected on the fly at every redraw. The file is written under a
+    temporary name and renamed once complete.
+    """
+    if gdal.GetDriverByName('COG') is None:
+        raise RuntimeError("GDAL 3.1 or later is needed to write Cloud-Optimized GeoTIFFs")
+    partial_path = f"{output_path}.part"
+    creation_options = ['COMPRESS=DEFLATE', 'BIGTIFF=IF_SAFER', f'RESAMPLING={OVERVIEW_RESAMPLING}']
+    callback = _progress(feedback, 0., 80.)
+    if crs_wkt:
+        converted = gdal.Warp(partial_path, path, format='COG', dstSRS=crs_wkt,
+                              creationOptions=creation_options, callback=callback)
+    else:
+        converted = gdal.Translate(partial_path, path, format='COG',
+                                   creationOptions=creation_options, callback=callback)
+    if converted is None:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        if feedback is not None and feedback.isCanceled():
+            raise ImportCanceled()
+        raise RuntimeError(f"Could not convert {path}: {gdal.GetLastErrorMsg()}")
+    # Closing the dataset flushes the file
+    converted = None
+    for sidecar in basemap_sidecars(output_path):
+        os.remove(sidecar)
+    os.replace(partial_path, output_path)
+    return output_path
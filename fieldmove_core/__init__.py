@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ QGIS-free core of the importer: parses FieldMove CSV project folders into
+ columnar tables that the plugin, the GeoPackage writer and the stereonet
+ tool can share.
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from .table import (NUMERIC_FIELDS, DictionaryColumn, FieldMoveTable, TableReader, combine_columns,
+                    concat_tables, read_table, table_chunks)
+from .schema import STRING, DOUBLE, INTEGER, DATETIME, ColumnSpec, ColumnPlan, CsvSchema, \
+                    SCHEMAS, get_schema
+from .reader import (POINT_LAYERS, LINE_LAYERS, COG_SUFFIX, FieldMoveProject,
+                     FieldMoveProjectReader)
+from .feedback import CHUNK_SIZE, ImportCanceled, check_canceled, iter_chunks
+from .geopackage import (INDEXED_FIELDS, GeoPackageWriter, point_blobs, linestring_blob,
+                         linestring_blobs, coordinates_extent, geometry_envelope, union_extent)
+from .manifest import CACHE_DIR, ImportManifest, file_signature
+from .timestamps import parse_timestamps, iso_timestamps, epoch_timestamps
+from .rock_units import STRATCOLUMN_FIELDS, RockUnits, rock_units_csv
+from .catalog import (SYMBOL_CATEGORY_FIELD, LayerStats, layer_stats, read_layer_stats,
+                      symbol_category, symbol_category_column, write_layer_stats)
+from .profiler import NULL_PROFILER, ImportProfiler, file_size
+from .batch import SOURCE_PROJECT_FIELD, find_projects, source_names
+from .layers import (ROTATION_FIELD, ROTATION_BASE_FIELDS, SYMBOL_CATEGORY_FIELDS, LINE_FIELDS,
+                     VERTEX_HASH_FIELD, can_append, convert_layer, update_rotation, write_lookup_tables,
+                     write_line_layer, write_point_layer)
+from .cli import convert_project
+
+__all__ = ['POINT_LAYERS', 'LINE_LAYERS', 'NUMERIC_FIELDS', 'DictionaryColumn',
+           'FieldMoveTable', 'FieldMoveProject', 'FieldMoveProjectReader', 'read_table',
+           'STRING', 'DOUBLE', 'INTEGER', 'DATETIME', 'ColumnSpec', 'ColumnPlan',
+           'CsvSchema', 'SCHEMAS', 'get_schema', 'CHUNK_SIZE', 'ImportCanceled',
+           'check_canceled', 'iter_chunks', 'GeoPackageWriter', 'point_blobs',
+           'linestring_blob', 'coordinates_extent', 'union_extent', 'ImportManifest',
+           'file_signature', 'parse_timestamps', 'iso_timestamps', 'epoch_timestamps',
+           'STRATCOLUMN_FIELDS', 'RockUnits', 'rock_units_csv', 'LayerStats', 'layer_stats',
+           'read_layer_stats', 'write_layer_stats', 'SYMBOL_CATEGORY_FIELD', 'symbol_category',
+           'symbol_category_column', 'INDEXED_FIELDS', 'geometry_envelope',
+           'linestring_blobs', 'CACHE_DIR', 'COG_SUFFIX', 'ImportProfiler', 'NULL_PROFILER',
+           'file_size', 'combine_columns', 'concat_tables', 'SOURCE_PROJECT_FIELD', 'find_projects',
+           'source_names', 'ROTATION_FIELD', 'ROTATION_BASE_FIELDS', 'SYMBOL_CATEGORY_FIELDS',
+           'LINE_FIELDS', 'VERTEX_HASH_FIELD', 'can_append', 'write_lookup_tables', 'write_line_layer',
+           'write_point_layer', 'convert_project', 'TableReader', 'table_chunks',
+           'convert_layer', 'update_rotation']
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""Convert FieldMove project folders into GeoPackages: python -m fieldmove_core --help"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
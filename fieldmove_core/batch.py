@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Batch imports: discovery of the project folders of a campaign and the
+ names recording the source project of each row (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+
+from .reader import FieldMoveProjectReader
+
+# Field of the consolidated layers naming the project folder of each row
+SOURCE_PROJECT_FIELD = 'sourceProject'
+
+
+def find_projects(parent_dir):
+    """FieldMove project folders directly under parent_dir, sorted by name
+
+    A folder is a project when it holds at least one known CSV file.
+    """
+    if not os.path.isdir(parent_dir):
+        raise ValueError("Invalid project directory")
+    projects = []
+    for name in sorted(os.listdir(parent_dir)):
+        path = os.path.join(parent_dir, name)
+        if os.path.isdir(path) and not name.startswith('.') \
+                and FieldMoveProjectReader(path).scan().csv_paths:
+            projects.append(path)
+    return projects
+
+
+def source_names(project_dirs):
+    """Common root of project folders and the name of each, relative to the root
+
+    The root joined with a name is the project folder, which locates the
+    photos of a row from its sourceProject value.
+    """
+    project_dirs = [os.path.normpath(os.path.abspath(d)) for d in project_dirs]
+    if not project_dirs:
+        raise ValueError("No FieldMove project to import")
+    root = os.path.commonpath(project_dirs)
+    if root in project_dirs:
+        # A project holding the others, or a single project
+        root = os.path.dirname(root)
+    names = [os.path.relpath(d, root).replace(os.sep, '/') for d in project_dirs]
+    if len(set(names)) != len(names):
+        raise ValueError("The same FieldMove project is listed more than once")
+    return root, names
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Per-layer statistics recorded at ingest (distinct categories, extents,
+ numeric ranges) so styling does not have to scan the features
+ (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import json
+import math
+import os
+import sqlite3
+from collections import Counter
+from pathlib import Path
+
+from .schema import DOUBLE, INTEGER
+from .table import combine_columns
+from .geopackage import STATS_TABLE, union_extent
+
+# Fields whose distinct values drive the styling and the legends
+CATEGORY_FIELDS = ['rockunit', 'rock-unit', 'unitid', 'planetype', 'lineationtype', 'type',
+                   'color', 'style']
+
+# Composite key of the symbol category of each feature, written at ingest so
+# the renderer finds the symbol of a feature with a single lookup
+SYMBOL_CATEGORY_FIELD = 'symbol_category'
+SYMBOL_CATEGORY_SEPARATOR = ' - '
+
+
+def symbol_category(values):
+    """Symbol category key of one tuple of category values"""
+    return SYMBOL_CATEGORY_SEPARATOR.join(str(value).strip() for value in values)
+
+
+def symbol_category_column(columns):
+    """Dictionary column of the symbol category key of each row
+
+    The key is formatted once per distinct tuple of the columns.
+    """
+    return combine_columns(columns).map(symbol_category)
+
+
+class LayerStats:
+    """Statistics of one layer, accumulated chunk by chunk while it is written
+
+    categories maps each distinct tuple of the category fields to its number
+    of features, in order of first appearance. ranges maps the numeric fields
+    to their [min, max]. properties holds other facts recorded at ingest,
+    such as the CRS the symbol rotations were computed for.
+    """
+
+    def __init__(self, category_fields=(), numeric_fields=()):
+        self.category_fields = list(category_fields)
+        self.numeric_fields = list(numeric_fields)
+        self.count = 0
+        self.extent = None
+        self.categories = {}
+        self.ranges = {}
+        self.properties = {}
+
+    @classmethod
+    def for_fields(cls, fields):
+        """Statistics of a layer with the given (name, kind) fields"""
+        return cls([name for name, _ in fields if name.lower() in CATEGORY_FIELDS],
+                   [name for name, kind in fields if kind in (DOUBLE, INTEGER)])
+
+    def add(self, names, columns, extent=None):
+        """Account for one chunk: columns are the value lists of the fields in names"""
+        columns = dict(zip(names, columns))
+        if not columns:
+            return
+        self.count += len(next(iter(columns.values())))
+        self.extent = union_extent(self.extent, extent)
+        if self.category_fields:
+            chunk = Counter(zip(*(columns[name] for name in self.category_fields)))
+            for values, count in chunk.items():
+                self.categories[values] = self.categories.get(values, 0) + count
+        for name in self.numeric_fields:
+            values = [v for v in columns[name] if v is not None and not math.isnan(v)]
+            if values:
+                low, high = min(values), max(values)
+                if name in self.ranges:
+                    low = min(low, self.ranges[name][0])
+                    high = max(high, self.ranges[name][1])
+                self.ranges[name] = [low, high]
+
+    def distinct(self, fields):
+        """Distinct tuples of a subset of the category fields, in order of first appearance
+
+        Returns None when a field is not part of the statistics.
+        """
+        lookup = {name.lower(): i for i, name in enumerate(self.category_fields)}
+        if any(field.lower() not in lookup for field in fields):
+            return None
+        indices = [lookup[field.lower()] for field in fields]
+        projected = {tuple(values[i] for i in indices): None for values in self.categories}
+        return list(projected)
+
+    def to_json(self):
+        return json.dumps({
+            'count': self.count,
+            'extent': self.extent,
+            'category_fields': self.category_fields,
+            'categories': [list(values) + [count] for values, count in self.categories.items()],
+            'numeric_fields': self.numeric_fields,
+            'ranges': self.ranges,
+            'properties': self.properties,
+        })
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        stats = cls(data['category_fields'], data['numeric_fields'])
+        stats.count = data['count']
+        stats.extent = tuple(data['extent']) if data['extent'] else None
+        stats.categories = {tuple(row[:-1]): row[-1] for row in data['categories']}
+        stats.ranges = data['ranges']
+        stats.properties = data.get('properties', {})
+        return stats
+
+
+def write_layer_stats(writer, layer_name, stats):
+    """Store the statistics of a layer in the catalog table, inside the layer transaction"""
+    if STATS_TABLE not in writer.layer_names():
+        writer.conn.execute(f'CREATE TABLE IF NOT EXISTS "{STATS_TABLE}" ('
+                            'fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, '
+                            'table_name TEXT NOT NULL UNIQUE, stats TEXT NOT NULL)')
+        writer.register_table(STATS_TABLE)
+    writer.conn.execute(f'INSERT OR REPLACE INTO "{STATS_TABLE}" (table_name, stats) VALUES (?, ?)',
+                        (layer_name, stats.to_json()))
+
+
+def layer_stats(writer, layer_name):
+    """Catalog entry of a layer of the GeoPackage being written, None if there is none"""
+    if STATS_TABLE not in writer.layer_names():
+        return None
+    row = writer.conn.execute(f'SELECT stats FROM "{STATS_TABLE}" WHERE table_name = ?',
+                              (layer_name,)).fetchone()
+    return LayerStats.from_json(row[0]) if row else None
+
+
+def read_layer_stats(gpkg_path, layer_name):
+    """Catalog entry of a layer of a GeoPackage, None if there is none"""
+    if not os.path.exists(gpkg_path):
+        return None
+    try:
+        conn = sqlite3.connect(Path(gpkg_path).resolve().as_uri() + '?mode=ro', uri=True)
+        try:
+            row = conn.execute(f'SELECT stats FROM "{STATS_TABLE}" WHERE table_name = ?',
+                               (layer_name,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return LayerStats.from_json(row[0]) if row else None
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Command line converter of FieldMove project folders into GeoPackages,
+ for preprocessing without QGIS (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .geopackage import GeoPackageWriter
+from .layers import write_line_layer, write_lookup_tables, write_point_layer
+from .manifest import CACHE_DIR
+from .profiler import ImportProfiler
+from .reader import POINT_LAYERS, LINE_LAYERS, FieldMoveProjectReader
+from .rock_units import RockUnits
+
+LOGGER = logging.getLogger('FieldMove')
+
+
+def project_gpkg_path(project_dir, output_dir=None):
+    """<project>.gpkg in the project folder (as the plugin's single GeoPackage), or in output_dir"""
+    project_name = os.path.basename(os.path.normpath(project_dir))
+    return os.path.join(output_dir or project_dir, f"{project_name}.gpkg")
+
+
+def convert_project(project_dir, gpkg_path=None, delta=False, profile=False):
+    """Convert the CSV layers of a FieldMove project folder into one GeoPackage
+
+    The layers are written one after the other. Point CSV files are parsed
+    and written chunk by chunk, so their memory does not grow with the file;
+    the polyline vertices are held as compact coordinate arrays until they
+    are grouped by dataId. The symbol rotation is stored without grid convergence, the
+    plugin refreshing it for the project CRS when the layers are loaded.
+    With delta, new observations are appended to the layers of a previous
+    conversion. Returns the GeoPackage path and the names of its layers.
+    """
+    project = FieldMoveProjectReader(project_dir).scan()
+    if not any(key in POINT_LAYERS or key in LINE_LAYERS for key in project.csv_paths):
+        raise ValueError(f"No FieldMove CSV file in {project_dir}")
+    gpkg_path = gpkg_path or project_gpkg_path(project_dir)
+    profiler = ImportProfiler(project_dir) if profile else None
+    rock_units = RockUnits.load(project_dir)
+    layers = []
+    with GeoPackageWriter(gpkg_path, overwrite=not delta) as writer:
+        write_lookup_tables(writer, rock_units)
+        for key, csv_path in project.csv_paths.items():
+            if key in POINT_LAYERS:
+                write_point_layer(writer, csv_path, delta=delta, rock_units=rock_units,
+                                  profiler=profiler, log=LOGGER.warning)
+            elif key in LINE_LAYERS:
+                write_line_layer(writer, csv_path, delta=delta, rock_units=rock_units,
+                                 profiler=profiler, log=LOGGER.warning)
+            else:
+                continue
+            layers.append(key)
+    if profiler is not None:
+        profiler.finish()
+        profiler.write(os.path.join(project_dir, CACHE_DIR, 'import_profile.json'))
+        for line in profiler.summary():
+            LOGGER.info(line)
+    return gpkg_path, layers
+
+
+def _convert(args):
+    """convert_project of one (project_dir, gpkg_path, delta, profile), in this or a worker process"""
+    project_dir, gpkg_path, delta, profile = args
+    logging.basicConfig(level=logging.INFO if profile else logging.WARNING,
+                        format='%(name)s: %(message)s')
+    return convert_project(project_dir, gpkg_path, delta, profile)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m fieldmove_core',
+        description="Convert FieldMove (.fm) project folders into GeoPackages without QGIS")
+    parser.add_argument('projects', nargs='+', help="FieldMove project folders")
+    parser.add_argument('-o', '--output-dir',
+                        help="folder of the GeoPackages (default: each project folder)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="number of projects converted in parallel (0: one per CPU)")
+    parser.add_argument('--delta', action='store_true',
+                        help="only append new observations to previously converted layers")
+    parser.add_argument('--profile', action='store_true',
+                        help="log the time of each stage and write the import profile")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.profile else logging.WARNING,
+                        format='%(name)s: %(message)s')
+
+    projects = args.projects
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        names = [os.path.basename(os.path.normpath(project_dir)) for project_dir in projects]
+        if len(set(names)) != len(names):
+            parser.error("Several projects have the same name, convert them into their own folders")
+    tasks = [(project_dir, project_gpkg_path(project_dir, args.output_dir), args.delta, args.profile)
+             for project_dir in projects]
+
+    # Processes: the conversion of a project holds the GIL for much of its run
+    jobs = min(args.jobs if args.jobs > 0 else os.cpu_count() or 1, len(tasks))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_convert, task) for task in tasks]
+            outcomes = [_outcome(future.result) for future in futures]
+    else:
+        outcomes = [_outcome(lambda task=task: _convert(task)) for task in tasks]
+
+    failed = 0
+    for project_dir, (result, error) in zip(projects, outcomes):
+        if error is not None:
+            failed += 1
+            print(f"{project_dir}: {error}", file=sys.stderr)
+        else:
+            gpkg_path, layers = result
+            print(f"{gpkg_path}: {', '.join(layers)}")
+    return 1 if failed else 0
+
+
+def _outcome(call):
+    """(result, None) of a conversion, or (None, error) when it failed"""
+    try:
+        return call(), None
+    except Exception as e:
+        return None, e
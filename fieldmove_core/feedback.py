@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Progress and cancellation helpers shared by the import stages
+ (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+# Rows converted between two progress updates / cancellation checks
+CHUNK_SIZE = 10000
+
+
+class ImportCanceled(Exception):
+    """Raised by an import stage when its feedback reports a cancellation"""
+
+
+def check_canceled(feedback):
+    """Raise ImportCanceled if the feedback object (QgsFeedback-like or None) was canceled"""
+    if feedback is not None and feedback.isCanceled():
+        raise ImportCanceled()
+
+
+def iter_chunks(count, feedback=None, chunk_size=CHUNK_SIZE):
+    """Yield (start, stop) row ranges covering count rows
+
+    Before each chunk the feedback (anything with QgsFeedback's isCanceled()
+    and setProgress() methods) is checked for cancellation and updated.
+    """
+    for start in range(0, count, chunk_size):
+        check_canceled(feedback)
+        if feedback is not None:
+            feedback.setProgress(100.0 * start / count)
+        yield start, min(start + chunk_size, count)
+    if feedback is not None:
+        feedback.setProgress(100.0)
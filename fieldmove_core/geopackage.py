@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Streaming GeoPackage writer built on the sqlite3 module (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+import sqlite3
+import struct
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .schema import STRING, DOUBLE, INTEGER, DATETIME
+
+GPKG_APPLICATION_ID = 0x47504B47  # 'GPKG'
+GPKG_USER_VERSION = 10300  # GeoPackage 1.3
+
+# Column types of the schema kinds
+SQL_TYPES = {STRING: 'TEXT', DOUBLE: 'DOUBLE', INTEGER: 'INTEGER', DATETIME: 'DATETIME'}
+
+# Catalog of the layer statistics (see catalog.py), cleaned when a layer is dropped
+STATS_TABLE = 'fieldmove_layer_stats'
+
+# Fields indexed in every layer having them (lowercase): those the renderers,
+# the stereonet, the delta imports and the per-project filters of batch imports
+# filter by
+INDEXED_FIELDS = ['dataid', 'localityid', 'rockunit', 'planetype', 'lineationtype', 'sourceproject']
+
+RTREE_EXTENSION = ('gpkg_rtree_index', 'http://www.geopackage.org/spec120/#extension_rtree',
+                   'write-only')
+
+# Triggers of the GeoPackage R-tree extension keeping the index of a geometry
+# column up to date, formatted with t (table), c (column) and r (R-tree table)
+_RTREE_ENVELOPE = 'ST_MinX(NEW.{c}), ST_MaxX(NEW.{c}), ST_MinY(NEW.{c}), ST_MaxY(NEW.{c})'
+_RTREE_TRIGGERS = [
+    ('insert', 'AFTER INSERT ON {t} WHEN (NEW.{c} NOT NULL AND NOT ST_IsEmpty(NEW.{c}))',
+     'INSERT OR REPLACE INTO {r} VALUES (NEW.fid, ' + _RTREE_ENVELOPE + ');'),
+    ('update1', 'AFTER UPDATE OF {c} ON {t} WHEN OLD.fid = NEW.fid AND '
+                '(NEW.{c} NOTNULL AND NOT ST_IsEmpty(NEW.{c}))',
+     'INSERT OR REPLACE INTO {r} VALUES (NEW.fid, ' + _RTREE_ENVELOPE + ');'),
+    ('update2', 'AFTER UPDATE OF {c} ON {t} WHEN OLD.fid = NEW.fid AND '
+                '(NEW.{c} ISNULL OR ST_IsEmpty(NEW.{c}))',
+     'DELETE FROM {r} WHERE id = OLD.fid;'),
+    ('update3', 'AFTER UPDATE ON {t} WHEN OLD.fid != NEW.fid AND '
+                '(NEW.{c} NOTNULL AND NOT ST_IsEmpty(NEW.{c}))',
+     'DELETE FROM {r} WHERE id = OLD.fid; '
+     'INSERT OR REPLACE INTO {r} VALUES (NEW.fid, ' + _RTREE_ENVELOPE + ');'),
+    ('update4', 'AFTER UPDATE ON {t} WHEN OLD.fid != NEW.fid AND '
+                '(NEW.{c} ISNULL OR ST_IsEmpty(NEW.{c}))',
+     'DELETE FROM {r} WHERE id IN (OLD.fid, NEW.fid);'),
+    ('delete', 'AFTER DELETE ON {t} WHEN OLD.{c} NOT NULL',
+     'DELETE FROM {r} WHERE id = OLD.fid;'),
+]
+
+# Values per query when looking up keys in a layer (SQLite host parameter limit)
+LOOKUP_BATCH_SIZE = 500
+
+# Settings used while importing
+IMPORT_PRAGMAS = [
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536',
+]
+
+# Only for a GeoPackage created by the writer: an interrupted import leaves a
+# file that is rebuilt from the CSV files, so durability is traded for speed.
+# A GeoPackage written over (reused layers, delta imports) keeps the default
+# rollback journal, a crash must not damage the layers already imported
+NEW_FILE_PRAGMAS = [
+    'PRAGMA journal_mode = MEMORY',
+    'PRAGMA synchronous = OFF',
+]
+
+WGS84_WKT = ('GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,'
+             'AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,'
+             'AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,'
+             'AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]')
+
+_CORE_TABLES = [
+    """CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+        srs_name TEXT NOT NULL, srs_id INTEGER NOT NULL PRIMARY KEY,
+        organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL,
+        definition TEXT NOT NULL, description TEXT)""",
+    """CREATE TABLE IF NOT EXISTS gpkg_contents (
+        table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL,
+        identifier TEXT UNIQUE, description TEXT DEFAULT '',
+        last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+        min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER,
+        CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id))""",
+    """CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+        table_name TEXT NOT NULL, column_name TEXT NOT NULL,
+        geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL,
+        z TINYINT NOT NULL, m TINYINT NOT NULL,
+        CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name),
+        CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+        CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys (srs_id))""",
+    """CREATE TABLE IF NOT EXISTS gpkg_extensions (
+        table_name TEXT, column_name TEXT, extension_name TEXT NOT NULL,
+        definition TEXT NOT NULL, scope TEXT NOT NULL,
+        CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name))""",
+]
+
+_SPATIAL_REF_SYS = [
+    ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', 'undefined cartesian coordinate reference system'),
+    ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', 'undefined geographic coordinate reference system'),
+    ('WGS 84 geodetic', 4326, 'EPSG', 4326, WGS84_WKT, 'longitude/latitude coordinates in decimal degrees on the WGS 84 spheroid'),
+]
+
+# GeoPackage binary header: magic, version, flags (little endian, no envelope), srs_id
+_POINT_RECORD = [('magic', 'S2'), ('version', 'u1'), ('flags', 'u1'), ('srs_id', '<i4'),
+                 ('byte_order', 'u1'), ('wkb_type', '<u4'), ('x', '<f8'), ('y', '<f8')]
+_POINT_Z_RECORD = _POINT_RECORD + [('z', '<f8')]
+# GeoPackage binary header with an [minx, maxx, miny, maxy] envelope and the WKB linestring header
+_LINESTRING_RECORD = [('magic', 'S2'), ('version', 'u1'), ('flags', 'u1'), ('srs_id', '<i4'),
+                      ('min_x', '<f8'), ('max_x', '<f8'), ('min_y', '<f8'), ('max_y', '<f8'),
+                      ('byte_order', 'u1'), ('wkb_type', '<u4'), ('num_points', '<u4')]
+_WKB_POINT = 1
+_WKB_POINT_Z = 1001
+_WKB_LINESTRING = 2
+_WKB_LINESTRING_Z = 1002
+
+
+def quote(identifier):
+    """Quote an SQL identifier"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _header(srs_id, envelope=None):
+    if envelope is None:
+        return struct.pack('<2sBBi', b'GP', 0, 0x01, srs_id)
+    # Envelope type 1: [minx, maxx, miny, maxy]
+    return struct.pack('<2sBBi4d', b'GP', 0, 0x03, srs_id, *envelope)
+
+
+def point_blobs(x, y, z=None, srs_id=4326):
+    """Encode coordinate arrays into GeoPackage point geometry blobs in one pass
+
+    Rows with a finite z become PointZ, the others 2D points.
+    """
+    count = len(x)
+    has_z = np.zeros(count, dtype=bool) if z is None else np.isfinite(z)
+    blobs = [None] * count
+    for mask, record, wkb_type in ((~has_z, _POINT_RECORD, _WKB_POINT),
+                                   (has_z, _POINT_Z_RECORD, _WKB_POINT_Z)):
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            continue
+        records = np.zeros(len(rows), dtype=np.dtype(record))
+        records['magic'] = b'GP'
+        records['flags'] = 0x01
+        records['srs_id'] = srs_id
+        records['byte_order'] = 1
+        records['wkb_type'] = wkb_type
+        records['x'] = x[rows]
+        records['y'] = y[rows]
+        if wkb_type == _WKB_POINT_Z:
+            records['z'] = z[rows]
+        buffer = records.tobytes()
+        size = records.dtype.itemsize
+        for i, row in enumerate(rows.tolist()):
+            blobs[row] = buffer[i * size:(i + 1) * size]
+    return blobs
+
+
+def linestring_blob(x, y, srs_id=4326):
+    """Encode one linestring (coordinate arrays) into a GeoPackage geometry blob"""
+    coords = np.empty((len(x), 2), dtype='<f8')
+    coords[:, 0] = x
+    coords[:, 1] = y
+    envelope = (float(coords[:, 0].min()), float(coords[:, 0].max()),
+                float(coords[:, 1].min()), float(coords[:, 1].max()))
+    return (_header(srs_id, envelope) + struct.pack('<BII', 1, _WKB_LINESTRING, len(x))
+            + coords.tobytes())
+
+
+def geometry_envelope(blob):
+    """(min_x, max_x, min_y, max_y) of a GeoPackage geometry blob, None when empty
+
+    Read from the header envelope when there is one, otherwise from the
+    point or linestring WKB.
+    """
+    if blob is None or len(blob) < 8 or blob[3] & 0x10:
+        return None
+    flags = blob[3]
+    envelope_type = (flags >> 1) & 0x07
+    if envelope_type:
+        order = '<' if flags & 0x01 else '>'
+        return struct.unpack_from(order + '4d', blob, 8)
+    offset = 8
+    order = '<' if blob[offset] == 1 else '>'
+    wkb_type = struct.unpack_from(order + 'I', blob, offset + 1)[0]
+    if wkb_type in (_WKB_POINT, _WKB_POINT_Z):
+        x, y = struct.unpack_from(order + '2d', blob, offset + 5)
+        return None if x != x else (x, x, y, y)
+    if wkb_type in (_WKB_LINESTRING, _WKB_LINESTRING_Z):
+        count = struct.unpack_from(order + 'I', blob, offset + 5)[0]
+        if not count:
+            return None
+        dims = 3 if wkb_type == _WKB_LINESTRING_Z else 2
+        coords = np.frombuffer(blob, dtype=order + 'f8', count=count * dims,
+                               offset=offset + 9).reshape(count, dims)
+        return (float(coords[:, 0].min()), float(coords[:, 0].max()),
+                float(coords[:, 1].min()), float(coords[:, 1].max()))
+    return None
+
+
+def _envelope_function(index):
+    def function(blob):
+        envelope = geometry_envelope(blob)
+        return None if envelope is None else envelope[index]
+    return function
+
+
+def _is_empty(blob):
+    return None if blob is None else int(geometry_envelope(blob) is None)
+
+
+def linestring_blobs(x, y, offsets, srs_id=4326):
+    """Encode runs of coordinate arrays into GeoPackage linestring blobs in one pass
+
+    Line i is made of the vertices offsets[i]:offsets[i + 1], each line
+    having at least one vertex. Headers and envelopes are computed over the
+    whole arrays, only the final slicing of the buffers happens per line.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    starts, counts = offsets[:-1], np.diff(offsets)
+    if not len(counts):
+        return []
+    coords = np.empty((len(x), 2), dtype='<f8')
+    coords[:, 0] = x
+    coords[:, 1] = y
+    records = np.zeros(len(counts), dtype=np.dtype(_LINESTRING_RECORD))
+    records['magic'] = b'GP'
+    records['flags'] = 0x03
+    records['srs_id'] = srs_id
+    records['min_x'] = np.minimum.reduceat(coords[:, 0], starts)
+    records['max_x'] = np.maximum.reduceat(coords[:, 0], starts)
+    records['min_y'] = np.minimum.reduceat(coords[:, 1], starts)
+    records['max_y'] = np.maximum.reduceat(coords[:, 1], starts)
+    records['byte_order'] = 1
+    records['wkb_type'] = _WKB_LINESTRING
+    records['num_points'] = counts
+    headers = records.tobytes()
+    buffer = coords.tobytes()
+    size = records.dtype.itemsize
+    vertex_size = coords.itemsize * 2
+    return [headers[i * size:(i + 1) * size] + buffer[start * vertex_size:stop * vertex_size]
+            for i, (start, stop) in enumerate(zip(starts.tolist(), offsets[1:].tolist()))]
+
+
+class GeoPackageWriter:
+    """Write layers straight into a GeoPackage with the sqlite3 module
+
+    Each layer is written in a single transaction under import-time pragmas,
+    the features being streamed in chunks with executemany(). With
+    overwrite=False the layers are added to (or replace those of) an existing
+    GeoPackage, then journaled as usual to protect the layers it holds.
+    Several threads may share one writer through layer(), which serializes
+    the layer transactions on the single connection.
+
+    Every layer gets an R-tree spatial index and indexes on the fields of
+    INDEXED_FIELDS when its transaction is committed. The ST_* functions
+    used by the R-tree triggers are registered on the connection.
+    """
+
+    def __init__(self, path, overwrite=True):
+        self.path = path
+        if overwrite:
+            for sidecar in (path, f"{path}-wal", f"{path}-shm", f"{path}-journal"):
+                if os.path.exists(sidecar):
+                    os.remove(sidecar)
+        new_file = not os.path.exists(path)
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        for pragma in IMPORT_PRAGMAS + (NEW_FILE_PRAGMAS if new_file else []):
+            self.conn.execute(pragma)
+        self._register_functions()
+        self._layers = {}
+        self.lock = threading.RLock()
+        self._init_geopackage()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.rollback()
+        self.close()
+        return False
+
+    def _register_functions(self):
+        for index, name in enumerate(('ST_MinX', 'ST_MaxX', 'ST_MinY', 'ST_MaxY')):
+            self.conn.create_function(name, 1, _envelope_function(index), deterministic=True)
+        self.conn.create_function('ST_IsEmpty', 1, _is_empty, deterministic=True)
+
+    def _init_geopackage(self):
+        cursor = self.conn.cursor()
+        cursor.execute(f'PRAGMA application_id = {GPKG_APPLICATION_ID}')
+        cursor.execute(f'PRAGMA user_version = {GPKG_USER_VERSION}')
+        for statement in _CORE_TABLES:
+            cursor.execute(statement)
+        cursor.executemany('INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)',
+                           _SPATIAL_REF_SYS)
+
+    def layer_names(self):
+        return [row[0] for row in self.conn.execute('SELECT table_name FROM gpkg_contents')]
+
+    def layer_fields(self, name):
+        """Attribute column names of a table (without fid and geometry), None if missing"""
+        if name not in self.layer_names():
+            return None
+        columns = [row[1] for row in self.conn.execute(f'PRAGMA table_info({quote(name)})')]
+        return [column for column in columns if column not in ('fid', 'geom')]
+
+    def create_index(self, name, column):
+        """Index a column of a layer (no-op if it already exists)"""
+        index_name = quote(f'idx_{name}_{column}')
+        self.conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {quote(name)} ({quote(column)})')
+
+    def create_spatial_index(self, name, column='geom'):
+        """Create and fill the R-tree of a geometry column, with its triggers (no-op if it exists)"""
+        rtree = f'rtree_{name}_{column}'
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (rtree,)).fetchone():
+            return
+        self.conn.execute(f'CREATE VIRTUAL TABLE {quote(rtree)} USING rtree(id, minx, maxx, miny, maxy)')
+        self.conn.execute(
+            f'INSERT OR REPLACE INTO {quote(rtree)} SELECT fid, ST_MinX({quote(column)}), '
+            f'ST_MaxX({quote(column)}), ST_MinY({quote(column)}), ST_MaxY({quote(column)}) '
+            f'FROM {quote(name)} WHERE {quote(column)} NOT NULL AND NOT ST_IsEmpty({quote(column)})')
+        for suffix, event, body in _RTREE_TRIGGERS:
+            names = {'t': quote(name), 'c': quote(column), 'r': quote(rtree)}
+            self.conn.execute(f'CREATE TRIGGER {quote(f"{rtree}_{suffix}")} {event.format(**names)} '
+                              f'BEGIN {body.format(**names)} END')
+        self.conn.execute('INSERT OR IGNORE INTO gpkg_extensions VALUES (?, ?, ?, ?, ?)',
+                          (name, column) + RTREE_EXTENSION)
+
+    def create_indexes(self, name):
+        """Create the spatial index of a feature table and the indexes of its INDEXED_FIELDS"""
+        for field in self.layer_fields(name) or []:
+            if field.lower() in INDEXED_FIELDS:
+                self.create_index(name, field)
+        column = self._geometry_column(name)
+        if column:
+            try:
+                self.create_spatial_index(name, column)
+            except sqlite3.OperationalError:
+                pass  # SQLite built without the R-tree module, reported by missing_indexes()
+
+    def missing_indexes(self, name):
+        """Names of the expected indexes of a layer that do not exist"""
+        existing = {row[0] for row in self.conn.execute('SELECT name FROM sqlite_master')}
+        expected = [f'idx_{name}_{field}' for field in self.layer_fields(name) or []
+                    if field.lower() in INDEXED_FIELDS]
+        column = self._geometry_column(name)
+        if column:
+            expected.append(f'rtree_{name}_{column}')
+        return [index for index in expected if index not in existing]
+
+    def _geometry_column(self, name):
+        row = self.conn.execute('SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?',
+                                (name,)).fetchone()
+        return row[0] if row else None
+
+    def existing_keys(self, name, column, values):
+        """Subset of values already present in a column, looked up through its index"""
+        values = list(values)
+        found = set()
+        for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+            batch = values[start:start + LOOKUP_BATCH_SIZE]
+            found.update(row[0] for row in self.conn.execute(
+                f'SELECT DISTINCT {quote(column)} FROM {quote(name)} '
+                f'WHERE {quote(column)} IN ({", ".join("?" * len(batch))})', batch))
+        return found
+
+    def feature_values(self, name, column, values, value_column):
+        """value_column of the features whose column is one of values, by value"""
+        values = list(values)
+        found = {}
+        for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+            batch = values[start:start + LOOKUP_BATCH_SIZE]
+            found.update(self.conn.execute(
+                f'SELECT {quote(column)}, {quote(value_column)} FROM {quote(name)} '
+                f'WHERE {quote(column)} IN ({", ".join("?" * len(batch))})', batch))
+        return found
+
+    def drop_layer(self, name):
+        cursor = self.conn.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {quote(name)}')
+        cursor.execute(f'DROP TABLE IF EXISTS {quote(f"rtree_{name}_geom")}')
+        for table in ('gpkg_geometry_columns', 'gpkg_extensions', 'gpkg_contents'):
+            cursor.execute(f'DELETE FROM {table} WHERE lower(table_name) = lower(?)', (name,))
+        if STATS_TABLE in self.layer_names():
+            cursor.execute(f'DELETE FROM {quote(STATS_TABLE)} WHERE lower(table_name) = lower(?)', (name,))
+
+    def register_table(self, name):
+        """Declare an existing non-spatial table in gpkg_contents"""
+        self.conn.execute(
+            'INSERT OR IGNORE INTO gpkg_contents (table_name, data_type, identifier, last_change) '
+            'VALUES (?, ?, ?, ?)', (name, 'attributes', name, _timestamp()))
+
+    def create_layer(self, name, fields, geometry_type='POINT', z=False, srs_id=4326):
+        """Create (or replace) a feature table and open its transaction
+
+        fields is a list of (name, kind) pairs using the schema kinds. A
+        geometry_type of None creates a non-spatial 'attributes' table.
+        """
+        self.conn.execute('BEGIN')
+        self.drop_layer(name)
+        columns = ['fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL']
+        if geometry_type is not None:
+            columns.append(f'geom {geometry_type}')
+        columns += [f'{quote(field)} {SQL_TYPES.get(kind, "TEXT")}' for field, kind in fields]
+        self.conn.execute(f'CREATE TABLE {quote(name)} ({", ".join(columns)})')
+        self.conn.execute(
+            'INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id, last_change) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (name, 'features' if geometry_type else 'attributes', name,
+             srs_id if geometry_type else None, _timestamp()))
+        names = [quote(field) for field, _ in fields]
+        if geometry_type is not None:
+            self.conn.execute('INSERT INTO gpkg_geometry_columns VALUES (?, ?, ?, ?, ?, ?)',
+                              (name, 'geom', geometry_type, srs_id, 2 if z else 0, 0))
+            names.insert(0, 'geom')
+        self._prepare_insert(name, names)
+
+    def open_layer(self, name, fields):
+        """Open the transaction appending features to an existing feature table"""
+        self.conn.execute('BEGIN')
+        extent = self.conn.execute(
+            'SELECT min_x, min_y, max_x, max_y FROM gpkg_contents WHERE table_name = ?',
+            (name,)).fetchone()
+        self._prepare_insert(name, ['geom'] + [quote(field) for field, _ in fields])
+        if extent is not None and None not in extent:
+            self._layers[name]['extent'] = tuple(extent)
+
+    def _prepare_insert(self, name, names):
+        insert = (f'INSERT INTO {quote(name)} ({", ".join(names)}) '
+                  f'VALUES ({", ".join("?" * len(names))})')
+        self._layers[name] = {'insert': insert, 'extent': None}
+
+    @contextmanager
+    def layer(self, name, fields, geometry_type='POINT', z=False, srs_id=4326, append=False):
+        """Write one layer while holding the writer: created (or opened for
+        appending) on entry, committed on a normal exit and rolled back if the
+        block raises"""
+        with self.lock:
+            if append:
+                self.open_layer(name, fields)
+            else:
+                self.create_layer(name, fields, geometry_type, z, srs_id)
+            try:
+                yield self
+            except BaseException:
+                self.rollback()
+                raise
+            self.finish_layer(name)
+
+    def insert_features(self, name, geometries, rows, extent=None):
+        """Append one chunk of features: geometry blobs and attribute tuples"""
+        layer = self._layers[name]
+        self.conn.executemany(layer['insert'], ((g,) + tuple(r) for g, r in zip(geometries, rows)))
+        if extent is not None:
+            layer['extent'] = union_extent(layer['extent'], extent)
+
+    def insert_rows(self, name, rows):
+        """Append rows of attribute tuples to a non-spatial table"""
+        self.conn.executemany(self._layers[name]['insert'], (tuple(r) for r in rows))
+
+    def finish_layer(self, name):
+        """Store the layer extent, create its indexes and commit its transaction"""
+        extent = self._layers.pop(name)['extent']
+        self.create_indexes(name)
+        if extent is not None:
+            self.conn.execute(
+                'UPDATE gpkg_contents SET min_x = ?, min_y = ?, max_x = ?, max_y = ? '
+                'WHERE table_name = ?', (extent[0], extent[1], extent[2], extent[3], name))
+        self.conn.execute('COMMIT')
+
+    def rollback(self):
+        """Discard the layer being written, if any"""
+        self._layers.clear()
+        if self.conn is not None and self.conn.in_transaction:
+            self.conn.execute('ROLLBACK')
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def coordinates_extent(x, y):
+    """Extent (min_x, min_y, max_x, max_y) of coordinate arrays, None when empty"""
+    if not len(x):
+        return None
+    return (float(np.min(x)), float(np.min(y)), float(np.max(x)), float(np.max(y)))
+
+
+def union_extent(a, b):
+    """Union of two extents, either of which may be None"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _timestamp():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Conversion of the point and polyline CSV tables of a project into
+ GeoPackage layers, shared by the plugin and the command line converter
+ (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import hashlib
+import os
+from itertools import repeat
+
+import numpy as np
+
+from .batch import SOURCE_PROJECT_FIELD
+from .catalog import (SYMBOL_CATEGORY_FIELD, LayerStats, layer_stats, symbol_category,
+                      symbol_category_column, write_layer_stats)
+from .feedback import check_canceled, iter_chunks
+from .geopackage import GeoPackageWriter, coordinates_extent, linestring_blobs, point_blobs, quote
+from .profiler import NULL_PROFILER, ImportProfiler, file_size, peak_memory
+from .reader import LINE_LAYERS
+from .rock_units import RockUnits
+from .schema import STRING, DOUBLE, INTEGER, DATETIME, get_schema
+from .table import DictionaryColumn, TableReader, combine_columns, read_table, table_chunks
+from .timestamps import iso_timestamps
+
+# Convergence-corrected marker rotation stored at ingest, and the field it is based on
+ROTATION_FIELD = 'symbol_rotation'
+ROTATION_BASE_FIELDS = {'plane': 'strike', 'line': 'plungeazimuth'}
+
+# Hash of the vertices of each polyline, compared by delta imports
+VERTEX_HASH_FIELD = 'vertexHash'
+
+# Fields combined into the symbol category key of the structural layers
+SYMBOL_CATEGORY_FIELDS = {
+    'plane': (['rockunit', 'rock-unit', 'unitid'], ['planetype', 'type']),
+    'line': (['rockunit', 'rock-unit', 'unitid'], ['lineationtype', 'type']),
+}
+
+# Fields of the polyline layer, from polyline-attributes.csv
+LINE_FIELDS = [
+    ("dataId", STRING),
+    ("localityId", STRING),
+    ("localityName", STRING),
+    ("rockUnit", STRING),
+    ("thickness", DOUBLE),
+    ("opacity", DOUBLE),
+    ("style", STRING),
+    ("filled", INTEGER),
+    ("timedate", DATETIME),
+    ("notes", STRING),
+]
+
+
+def _ignore(message):
+    pass
+
+
+def can_append(writer, layer_name, fields):
+    """Whether a layer of a previous import exists with the same fields"""
+    return writer.layer_fields(layer_name) == [name for name, _ in fields]
+
+
+def base_rotation(base, x, y):
+    """Marker rotation without a map CRS: the base angle, 0 where missing"""
+    return np.nan_to_num(np.asarray(base, dtype=np.float64))
+
+
+def rock_unit_color_column(table, rock_units, layer_name, log=None):
+    """Color of each row's rock unit, joined once per distinct unit (any thread)
+
+    Returns None when the table has no rock unit column or the project
+    no rock unit colors, in which case no color field is written. Rock
+    units missing from the reference table are reported to log.
+    """
+    colors, unmatched = rock_units.join_colors(table)
+    report_unmatched_units(layer_name, unmatched, log)
+    return colors
+
+
+def report_unmatched_units(layer_name, unmatched, log=None):
+    """Report the rock units without color, unmatched mapping each to its number of rows"""
+    if unmatched:
+        units = ", ".join(f"{unit} ({count})" for unit, count in sorted(unmatched.items()))
+        (log or _ignore)(
+            f"{layer_name}: {len(unmatched)} rock unit(s) without color in the rock units table "
+            f"({sum(unmatched.values())} rows): {units}")
+
+
+def check_indexes(writer, layer_name, log=None):
+    """Report the spatial and attribute indexes the writer could not create for a layer"""
+    missing = writer.missing_indexes(layer_name)
+    if missing:
+        (log or _ignore)(f"{layer_name}: missing indexes {', '.join(missing)}, filters will scan the layer")
+
+
+def write_lookup_tables(writer, rock_units):
+    """Copy rock-units.csv (or stratcolumn.csv) as a non-spatial table of the GeoPackage"""
+    table = rock_units.table
+    if table is None:
+        return
+    table_name = table.name
+    fieldnames = [name for name in table.fieldnames if name]
+    columns = [table.column(name).tolist() for name in fieldnames]
+    with writer.layer(table_name, [(name, STRING) for name in fieldnames], None):
+        writer.insert_rows(table_name, zip(*columns))
+
+
+def write_point_layer(writer, csv_path, table=None, feedback=None, delta=False, rock_units=None,
+                      rotation=None, rotation_crs=None, profiler=None, log=None):
+    """Convert a point CSV with X/Y/Z coordinates into a layer of an open GeoPackageWriter
+
+    The CSV is parsed and written chunk by chunk in one transaction, so
+    memory does not grow with the file; a table already parsed by
+    FieldMoveProjectReader is written by slices of the same size. The rock
+    unit colors and the symbol category are joined to each chunk before
+    its write, and the optional QgsFeedback-like object can follow and
+    cancel between chunks.
+
+    With delta, only the rows whose dataId is not yet in the layer written
+    by the previous import are appended to it, and only their rock units
+    are reported. rock_units is the project's
+    RockUnits (read here when not given). The symbol rotation of plane and
+    line layers is rotation(base, x, y), computed for the map CRS named
+    rotation_crs; without it the base angle is stored and refreshed by the
+    plugin when the layer is loaded. Warnings are passed to log.
+    """
+    layer_name = os.path.splitext(os.path.basename(csv_path))[0]
+    profiler = profiler or NULL_PROFILER
+    schema = get_schema(layer_name)
+    if table is None:
+        reader = TableReader(csv_path, schema.numeric_fields)
+        chunks, progress = iter(reader), reader.progress
+    else:
+        # Reuse the columnar table parsed by FieldMoveProjectReader
+        chunks, progress = table_chunks(table), None
+    with profiler.stage(layer_name, 'parse', bytes_read=file_size(csv_path) if table is None else 0) as stage:
+        chunk = next(chunks)
+        stage.count(rows_read=chunk.num_rows)
+
+    # Resolve coordinate columns, field types and converters once for the whole file
+    plan = schema.compile(chunk.fieldnames)
+    if not plan.has_coordinates:
+        raise ValueError(f"CSV file {csv_path} is missing required coordinate columns (longitude/x and latitude/y)")
+    fields = [(spec.name, spec.kind) for spec in plan.attributes]
+
+    # Derived fields, known from the header: for line and plane layers the
+    # colors of rock-units.csv, the symbol category and the marker rotation
+    join_colors = False
+    if layer_name.lower() in ['line', 'plane']:
+        if rock_units is None:
+            rock_units = RockUnits.load(os.path.dirname(csv_path))
+        join_colors = rock_units.join_colors(chunk)[0] is not None
+        if join_colors:
+            fields.append(('color', STRING))
+    category_fields = [chunk.find(candidates)
+                       for candidates in SYMBOL_CATEGORY_FIELDS.get(layer_name.lower(), ())]
+    if category_fields and all(category_fields):
+        fields.append((SYMBOL_CATEGORY_FIELD, STRING))
+    else:
+        category_fields = None
+    base_field = chunk.find([ROTATION_BASE_FIELDS.get(layer_name.lower(), '')])
+    if base_field:
+        if rotation is None:
+            rotation, rotation_crs = base_rotation, None
+        fields.append((ROTATION_FIELD, DOUBLE))
+
+    data_id_field = chunk.find(['dataid'])
+    unmatched = {}
+    with writer.lock:
+        size = file_size(writer.path)
+        # Delta mode: skip the rows already imported
+        append = delta and data_id_field and can_append(writer, layer_name, fields)
+        written_keys = set()
+        with writer.layer(layer_name, fields, 'POINT', z=plan.z_col is not None, append=append):
+            # Catalog statistics, added to those of the previous import in delta mode
+            stats = (append and layer_stats(writer, layer_name)) or LayerStats.for_fields(fields)
+            if not append or stats.properties.get('rotation_crs') == rotation_crs:
+                stats.properties['rotation_crs'] = rotation_crs
+            else:
+                stats.properties['rotation_crs'] = None  # Mixed CRS, recomputed when loaded
+            while chunk is not None:
+                check_canceled(feedback)
+                with profiler.stage(layer_name, 'timestamps'):
+                    # Parse the timestamps once per distinct value, in one batch per column
+                    chunk = plan.convert(chunk, {DATETIME: iso_timestamps})
+
+                # Skip rows without valid coordinates
+                valid = plan.valid_rows(chunk)
+                if append:
+                    data_ids = chunk.columns[data_id_field]
+                    # Keys of the previous import, not those written by this one
+                    existing = writer.existing_keys(layer_name, data_id_field, data_ids.categories)
+                    valid &= ~data_ids.isin(existing - written_keys)
+                    written_keys.update(data_ids[np.flatnonzero(valid)].tolist())
+                # Derived fields are only computed for (and rock units only
+                # reported from) the rows written
+                chunk = chunk.take(np.flatnonzero(valid))
+                rows_index = np.arange(chunk.num_rows)
+
+                derived = []
+                if join_colors:
+                    with profiler.stage(layer_name, 'join rock units'):
+                        colors, chunk_unmatched = rock_units.join_colors(chunk)
+                        for unit, count in chunk_unmatched.items():
+                            unmatched[unit] = unmatched.get(unit, 0) + count
+                    derived.append(colors)
+                if category_fields:
+                    # Formatted once per distinct (rock unit, type)
+                    derived.append(symbol_category_column([chunk.columns[name] for name in category_fields]))
+                if base_field:
+                    with profiler.stage(layer_name, 'symbol rotation'):
+                        x, y, _ = plan.coordinates(chunk, rows_index)
+                        derived.append(rotation(chunk.column(base_field), x, y))
+
+                with profiler.stage(layer_name, 'write') as stage:
+                    _write_points(writer, layer_name, fields, plan, chunk, derived, rows_index, stats)
+                    stage.count(rows_written=len(rows_index))
+                if feedback is not None and progress is not None:
+                    feedback.setProgress(progress())
+
+                with profiler.stage(layer_name, 'parse') as stage:
+                    chunk = next(chunks, None)
+                    stage.count(rows_read=chunk.num_rows if chunk is not None else 0)
+            check_canceled(feedback)
+            write_layer_stats(writer, layer_name, stats)
+        # Measured once the layer transaction is committed
+        with profiler.stage(layer_name, 'write') as stage:
+            stage.count(bytes_written=max(0, file_size(writer.path) - size))
+        check_indexes(writer, layer_name, log)
+    report_unmatched_units(layer_name, unmatched, log)
+    if feedback is not None:
+        feedback.setProgress(100.0)
+    return writer.path
+
+
+def _write_points(writer, layer_name, fields, plan, table, derived, rows_index, stats, feedback=None):
+    """Stream the given rows of a point table into an open layer, in chunks"""
+    names = [name for name, _ in fields]
+    for start, stop in iter_chunks(len(rows_index), feedback):
+        index = rows_index[start:stop]
+        x, y, z = plan.coordinates(table, index)
+        columns = plan.decode(table, index) + [column[index].tolist() for column in derived]
+        rows = zip(*columns) if columns else repeat((), len(index))
+        extent = coordinates_extent(x, y)
+        writer.insert_features(layer_name, point_blobs(x, y, z), rows, extent)
+        stats.add(names, columns, extent)
+    check_canceled(feedback)
+
+
+def _vertex_hash(x, y):
+    """Hash of the coordinates of the vertices of a polyline"""
+    return hashlib.sha1(x.tobytes() + y.tobytes()).hexdigest()
+
+
+def write_line_layer(writer, csv_path, table=None, attributes_table=None, feedback=None, delta=False,
+                     rock_units=None, profiler=None, log=None):
+    """Convert polyline.csv and its attributes into a layer of an open GeoPackageWriter
+
+    The vertices of a polyline need not be contiguous, so polyline.csv is
+    read whole, keeping only the dataId and coordinate columns (parsed in
+    chunks). The vertices are grouped by dataId with a stable sort of the
+    columnar table and each chunk of polylines is encoded from the coordinate
+    arrays in one pass, so no Python object is created per vertex.
+
+    With delta, only the polylines whose dataId is not yet in the layer
+    written by the previous import are appended to it; if vertices were
+    recorded on an imported polyline since (its stored vertex hash differs),
+    the layer is rewritten whole.
+    Tables merged by a batch import are grouped by source project and dataId.
+    """
+    layer_name = os.path.splitext(os.path.basename(csv_path))[0]
+    profiler = profiler or NULL_PROFILER
+    if table is None:
+        with profiler.stage(layer_name, 'parse', bytes_read=file_size(csv_path)) as stage:
+            # Only the columns grouped into polylines are kept, as compact arrays
+            table = read_table(csv_path, columns=['dataId', 'longitude', 'latitude'])
+            stage.count(rows_read=table.num_rows)
+    if attributes_table is None:
+        attributes_path = csv_path[:-4]+'-attributes.csv'
+        with profiler.stage(layer_name, 'parse attributes',
+                            bytes_read=file_size(attributes_path)) as stage:
+            attributes_table = read_table(attributes_path)
+            stage.count(rows_read=attributes_table.num_rows)
+
+    # Group the vertices by dataId: the stable sort of the dictionary codes
+    # keeps the vertex order of each polyline, and the polylines in order of
+    # first appearance. Use longitude,latitude (geographic)
+    with profiler.stage(layer_name, 'group vertices'):
+        # Vertices without valid coordinates would turn the envelopes, the
+        # layer extent and the R-tree entries of their polylines into NaN
+        x = np.asarray(table.column('longitude'), dtype=np.float64)
+        y = np.asarray(table.column('latitude'), dtype=np.float64)
+        finite = np.isfinite(x) & np.isfinite(y)
+        if not finite.all():
+            (log or _ignore)(f"{layer_name}: {int((~finite).sum())} vertices without valid "
+                             f"coordinates skipped")
+            table = table.take(finite)
+            x, y = x[finite], y[finite]
+        data_ids = table.column('dataId')
+        if not isinstance(data_ids, DictionaryColumn):
+            data_ids = DictionaryColumn.encode(str(value) for value in data_ids.tolist())
+        # Polylines of different projects may share a dataId
+        sources = table.column(SOURCE_PROJECT_FIELD)
+        keys = data_ids if sources is None else combine_columns([sources, data_ids])
+        line_ids = keys.categories if sources is None else [key[1] for key in keys.categories]
+        vertex_order = np.argsort(keys.codes, kind='stable')
+        vertex_counts = np.bincount(keys.codes, minlength=len(keys.categories))
+        x, y = x[vertex_order], y[vertex_order]
+
+    # Load attribute data, joining the rock unit colors before the write
+    if 'timedate' in attributes_table:
+        with profiler.stage(layer_name, 'timestamps'):
+            attributes_table = attributes_table.with_column(
+                'timedate', iso_timestamps(attributes_table.column('timedate')))
+    with profiler.stage(layer_name, 'join rock units'):
+        if rock_units is None:
+            rock_units = RockUnits.load(os.path.dirname(csv_path))
+        colors = rock_unit_color_column(attributes_table, rock_units, layer_name, log)
+    if colors is not None:
+        attributes_table = attributes_table.with_column('color', colors)
+    attributes = {}
+    attribute_names = attributes_table.fieldnames
+    attribute_columns = [attributes_table.column(name).tolist() for name in attribute_names]
+    for values in zip(*attribute_columns):
+        row = dict(zip(attribute_names, values))
+        attributes[row['dataId'] if sources is None else (row[SOURCE_PROJECT_FIELD], row['dataId'])] = row
+
+    fields = list(LINE_FIELDS)
+    if colors is not None:
+        fields.append(("color", STRING))
+    if sources is not None:
+        fields.append((SOURCE_PROJECT_FIELD, STRING))
+    fields.append((SYMBOL_CATEGORY_FIELD, STRING))
+    fields.append((VERTEX_HASH_FIELD, STRING))
+    offsets = np.concatenate(([0], np.cumsum(vertex_counts)))
+
+    with writer.lock:
+        size = file_size(writer.path)
+        # Delta mode: skip the polylines already imported
+        append = delta and can_append(writer, layer_name, fields)
+        keep = vertex_counts >= 2  # Need at least 2 points for a line
+        if append:
+            stored = writer.feature_values(layer_name, 'dataId', line_ids, VERTEX_HASH_FIELD)
+            imported = keep & np.fromiter((data_id in stored for data_id in line_ids),
+                                          dtype=bool, count=len(line_ids))
+            if any(stored[line_ids[line]] != _vertex_hash(x[offsets[line]:offsets[line + 1]],
+                                                          y[offsets[line]:offsets[line + 1]])
+                   for line in np.flatnonzero(imported).tolist()):
+                # Vertices were recorded on imported polylines: rewrite the layer
+                (log or _ignore)(f"{layer_name}: polylines changed since the previous import, "
+                                 f"layer rewritten")
+                append = False
+            else:
+                keep &= ~imported
+        lines = np.flatnonzero(keep)
+        kept_vertices = np.repeat(keep, vertex_counts)
+        line_x, line_y = x[kept_vertices], y[kept_vertices]
+        line_offsets = np.concatenate(([0], np.cumsum(vertex_counts[lines])))
+
+        with writer.layer(layer_name, fields, 'LINESTRING', append=append), \
+                profiler.stage(layer_name, 'write') as stage:
+            stats = (append and layer_stats(writer, layer_name)) or LayerStats.for_fields(fields)
+            names = [name for name, _ in fields]
+
+            # Create features, the geometries of a chunk in one pass
+            for start, stop in iter_chunks(len(lines), feedback):
+                first, last = line_offsets[start], line_offsets[stop]
+                xs, ys = line_x[first:last], line_y[first:last]
+                geometries = linestring_blobs(xs, ys, line_offsets[start:stop + 1] - first)
+                extent = coordinates_extent(xs, ys)
+                rows = []
+                for line in lines[start:stop].tolist():
+                    data_id = line_ids[line]
+
+                    # Set attributes
+                    attr_data = attributes.get(keys.categories[line], {})
+                    row = [
+                        data_id,
+                        attr_data.get('localityId', ''),
+                        attr_data.get('localityName', ''),
+                        attr_data.get('rockUnit', ''),
+                        float(attr_data.get('thickness', 0)),
+                        float(attr_data.get('opacity', 1)),
+                        attr_data.get('style', 'solid'),
+                        int(attr_data.get('filled', 1)),
+                        attr_data.get('timedate'),
+                        attr_data.get('notes', '')
+                    ]
+                    if colors is not None:
+                        row.append(attr_data.get('color'))
+                    if sources is not None:
+                        row.append(keys.categories[line][0])
+                    row.append(symbol_category((row[3], row[6])))
+                    row.append(_vertex_hash(x[offsets[line]:offsets[line + 1]],
+                                            y[offsets[line]:offsets[line + 1]]))
+                    rows.append(row)
+
+                writer.insert_features(layer_name, geometries, rows, extent)
+                stats.add(names, list(zip(*rows)) if rows else [[] for _ in names], extent)
+            check_canceled(feedback)
+            write_layer_stats(writer, layer_name, stats)
+            stage.count(rows_written=len(lines), vertices=len(line_x))
+        stage.count(bytes_written=max(0, file_size(writer.path) - size))
+        check_indexes(writer, layer_name, log)
+    return writer.path
+
+
+def convert_layer(csv_path, gpkg_path, project_dir, delta=False):
+    """Convert one point or polyline CSV into a GeoPackage of its own (worker process)
+
+    Picklable entry point of the import worker processes, where the CSV
+    parsing and the row conversion, which hold the GIL, run in parallel.
+    The symbol rotation is the base angle, corrected afterwards with
+    update_rotation. Returns the GeoPackage path, the warnings, the
+    profiled stages, added to those of the importing process, and the
+    peak memory of the worker process.
+    """
+    layer_name = os.path.splitext(os.path.basename(csv_path))[0]
+    warnings = []
+    profiler = ImportProfiler(project_dir)
+    rock_units = RockUnits.load(project_dir)
+    with GeoPackageWriter(gpkg_path, overwrite=not delta) as writer:
+        write = write_line_layer if layer_name.lower() in LINE_LAYERS else write_point_layer
+        write(writer, csv_path, delta=delta, rock_units=rock_units, profiler=profiler, log=warnings.append)
+    return gpkg_path, warnings, profiler.stages, peak_memory()
+
+
+def update_rotation(writer, layer_name, rotation, rotation_crs):
+    """Recompute the stored symbol rotation of a written point layer
+
+    rotation(base, x, y) is computed once for all the features. Only the
+    values that change are written, in one transaction with the
+    rotation_crs of the layer statistics. Returns the number of values
+    changed, 0 for a layer without rotation.
+    """
+    fields = {field.lower(): field for field in writer.layer_fields(layer_name) or []}
+    base_field = fields.get(ROTATION_BASE_FIELDS.get(layer_name.lower(), ''))
+    if base_field is None or ROTATION_FIELD not in fields:
+        return 0
+    with writer.lock:
+        rows = writer.conn.execute(
+            f'SELECT fid, {quote(base_field)}, ST_MinX(geom), ST_MinY(geom), {quote(ROTATION_FIELD)} '
+            f'FROM {quote(layer_name)}'
+        ).fetchall()
+        fids, base, x, y, stored = (np.array(column, dtype=np.float64) for column in zip(*rows)) \
+            if rows else (np.zeros(0) for _ in range(5))
+        angles = rotation(base, x, y)
+        changed = ~np.isclose(angles, stored, equal_nan=True)
+        writer.conn.execute('BEGIN')
+        try:
+            writer.conn.executemany(
+                f'UPDATE {quote(layer_name)} SET {quote(ROTATION_FIELD)} = ? WHERE fid = ?',
+                zip(angles[changed].tolist(), fids[changed].astype(np.int64).tolist()))
+            stats = layer_stats(writer, layer_name)
+            if stats is not None:
+                stats.properties['rotation_crs'] = rotation_crs
+                if len(angles):
+                    stats.ranges[ROTATION_FIELD] = [float(np.nanmin(angles)), float(np.nanmax(angles))]
+                write_layer_stats(writer, layer_name, stats)
+        except BaseException:
+            writer.rollback()
+            raise
+        writer.conn.execute('COMMIT')
+    return int(changed.sum())
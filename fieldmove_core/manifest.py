@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Import manifest: content signatures of the source files and the derived
+ artefacts of a project, used to re-import only what changed
+ (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+# Version 2: basemap entries record their overview and statistics files
+MANIFEST_VERSION = 2
+
+# Hidden folder of the project holding the manifest and the cached styles
+CACHE_DIR = '.fieldmove_cache'
+MANIFEST_NAME = 'manifest.json'
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_signature(path, previous=None):
+    """Size, mtime and SHA-256 of a file, None if it does not exist
+
+    The content is only hashed again when the size or mtime differ from
+    the previous signature, so unchanged files cost a stat() call.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime_ns:
+        return previous
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+
+def same_content(a, b):
+    """Whether two signatures (possibly None) describe the same content"""
+    if a is None or b is None:
+        return a is b
+    return a['size'] == b['size'] and a['sha256'] == b['sha256']
+
+
+class ImportManifest:
+    """Record of what an import built from which inputs
+
+    Each entry is keyed by the path (relative to the project folder) of the
+    file driving an import job and holds the signatures of its inputs, the
+    import options, the derived artefacts (GeoPackage, cached style) and a
+    JSON-serializable result to hand back when the entry is reused.
+    """
+
+    def __init__(self, project_dir, entries=None):
+        self.project_dir = project_dir
+        self.entries = entries or {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self):
+        return os.path.join(self.project_dir, CACHE_DIR)
+
+    @property
+    def path(self):
+        return os.path.join(self.cache_dir, MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, project_dir):
+        """Manifest of a project folder, empty when missing, unreadable or outdated"""
+        manifest = cls(project_dir)
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if isinstance(data, dict) and data.get('version') == MANIFEST_VERSION:
+            manifest.entries = data.get('entries', {})
+        return manifest
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with self._lock:
+            data = {'version': MANIFEST_VERSION, 'entries': self.entries}
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def key(self, path):
+        """Entry key of a file of the project"""
+        return os.path.relpath(path, self.project_dir).replace(os.sep, '/')
+
+    def signatures(self, key, sources):
+        """Current signatures of the input files of an entry, keyed by relative path"""
+        with self._lock:
+            previous = self.entries.get(key, {}).get('sources', {})
+        return {self.key(path): file_signature(path, previous.get(self.key(path)))
+                for path in sources}
+
+    def is_current(self, key, signatures, options):
+        """Whether an entry was built from the same inputs and options and its artefacts still exist"""
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None or entry.get('options') != options:
+            return False
+        if set(entry.get('sources', {})) != set(signatures):
+            return False
+        if not all(same_content(entry['sources'][name], signature)
+                   for name, signature in signatures.items()):
+            return False
+        return all(os.path.exists(self._absolute(path)) for path in entry.get('outputs', []))
+
+    def built_with(self, key, options):
+        """Whether an entry exists for the same options, whatever its inputs"""
+        with self._lock:
+            entry = self.entries.get(key)
+        return entry is not None and entry.get('options') == options
+
+    def record(self, key, signatures, options, outputs=(), result=None):
+        """Store a freshly built entry, dropping its cached style"""
+        with self._lock:
+            self.entries[key] = {
+                'sources': signatures,
+                'options': options,
+                'outputs': [self.key(path) for path in outputs],
+                'result': result,
+            }
+
+    def outputs(self, key):
+        """Absolute paths of the artefacts of an entry"""
+        with self._lock:
+            outputs = self.entries.get(key, {}).get('outputs', [])
+        return [self._absolute(path) for path in outputs]
+
+    def result(self, key):
+        with self._lock:
+            return self.entries.get(key, {}).get('result')
+
+    def discard(self, key):
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def style_path(self, layer_name):
+        """Path of the cached style file of a layer"""
+        return os.path.join(self.cache_dir, 'styles', f"{layer_name}.qml")
+
+    def set_style(self, key, style_path):
+        with self._lock:
+            if key in self.entries:
+                self.entries[key]['style'] = self.key(style_path)
+
+    def style(self, key):
+        """Cached style file of a current entry, None when missing"""
+        with self._lock:
+            style = self.entries.get(key, {}).get('style')
+        if style is None or not os.path.exists(self._absolute(style)):
+            return None
+        return self._absolute(style)
+
+    def _absolute(self, path):
+        return os.path.join(self.project_dir, *path.split('/'))
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Per-stage import profiler: wall time, row and vertex counts, bytes read
+ and written of each file and peak memory, with a JSON report
+ (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_VERSION = 2
+
+# Counters a stage may report, summed per file
+COUNTERS = ('rows_read', 'rows_written', 'vertices', 'bytes_read', 'bytes_written')
+
+
+def peak_memory(children=False):
+    """High-water mark of the process resident memory in bytes, None where unavailable
+
+    With children, that of the largest terminated child process instead,
+    such as the worker processes converting the CSV files.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def file_size(path):
+    """Size of a file in bytes, 0 when it does not exist"""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+class Stage:
+    """Measurements of one stage of the import of one file"""
+
+    def __init__(self, source, name, thread):
+        self.source = source
+        self.name = name
+        self.thread = thread
+        self.wall_time = 0.
+        self.counters = {}
+
+    def count(self, **counters):
+        """Add to the counters of the stage (rows_read, rows_written, vertices, bytes_read, bytes_written)
+
+        Rows are counted as read by the parsing stages and as written by the
+        writing ones, so that the totals of a file count each row once.
+        """
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def to_dict(self):
+        return dict({'stage': self.name, 'thread': self.thread,
+                     'wall_time': round(self.wall_time, 6)}, **self.counters)
+
+
+class ImportProfiler:
+    """Timings of the import stages, recorded from the worker threads and the main thread
+
+    The peak memory is reported for the whole process and for its worker
+    processes. A file converted in a worker process also reports the peak
+    of that worker (see merge), its own where each file gets a fresh
+    worker; the files converted in threads share the process peak.
+    """
+
+    def __init__(self, project_dir=None):
+        self.project_dir = project_dir
+        self.started = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.wall_time = None
+        self.stages = []
+        self._peaks = {}  # Peak memory of the worker process of each source
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, source, name, **counters):
+        """Time the block as a stage of the import of source (a file or layer name)
+
+        Yields the Stage, whose count() adds the rows, vertices or bytes
+        processed. The stage is recorded even when the block raises.
+        """
+        stage = Stage(source, name, threading.current_thread().name)
+        stage.count(**counters)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.wall_time = time.perf_counter() - start
+            with self._lock:
+                self.stages.append(stage)
+
+    def merge(self, stages, source=None, peak=None):
+        """Add the stages recorded by another profiler, such as one of a worker process
+
+        peak is the peak memory of the worker process that converted source.
+        """
+        with self._lock:
+            self.stages.extend(stages)
+            if source is not None and peak is not None:
+                self._peaks[source] = max(self._peaks.get(source, 0), peak)
+
+    def finish(self):
+        """Stop the overall clock of the import"""
+        self.wall_time = time.perf_counter() - self._start
+
+    def files(self):
+        """Stages and totals of each source, in order of first stage
+
+        A stage repeated for each chunk of a file is reported once, with its
+        times and counters summed. The files converted in a worker process
+        have the peak memory of that worker.
+        """
+        files, merged = {}, {}
+        with self._lock:
+            stages = list(self.stages)
+            peaks = dict(self._peaks)
+        for stage in stages:
+            entry = files.setdefault(stage.source, {'wall_time': 0., 'stages': []})
+            previous = merged.get((stage.source, stage.name))
+            if previous is None:
+                merged[stage.source, stage.name] = previous = stage.to_dict()
+                entry['stages'].append(previous)
+            else:
+                previous['wall_time'] = round(previous['wall_time'] + stage.wall_time, 6)
+                for name, value in stage.counters.items():
+                    previous[name] = previous.get(name, 0) + value
+            entry['wall_time'] += stage.wall_time
+            for name, value in stage.counters.items():
+                entry[name] = entry.get(name, 0) + value
+        for source, peak in peaks.items():
+            if source in files:
+                files[source]['peak_memory'] = peak
+        return files
+
+    def report(self):
+        """JSON-serializable report of the import"""
+        return {
+            'version': PROFILE_VERSION,
+            'project': self.project_dir,
+            'started': self.started.isoformat(),
+            'wall_time': self.wall_time,
+            'peak_memory': peak_memory(),
+            'worker_peak_memory': peak_memory(children=True),
+            'files': self.files(),
+        }
+
+    def write(self, path):
+        """Write the report as JSON"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=1)
+
+    def summary(self):
+        """Overall time and peak memory, then one line per file: wall time of each stage and the counters"""
+        lines = []
+        if self.wall_time is not None:
+            line = f"Import took {self.wall_time:.2f} s"
+            peak, worker_peak = peak_memory(), peak_memory(children=True)
+            if peak:
+                line += f", peak memory of the process {peak / 1048576:.0f} MB"
+            if worker_peak:
+                line += f", of its worker processes {worker_peak / 1048576:.0f} MB"
+            lines.append(line)
+        for source, entry in self.files().items():
+            stages = ', '.join(f"{stage['stage']} {stage['wall_time']:.2f} s" for stage in entry['stages'])
+            counters = ', '.join(f"{name.replace('_', ' ')} {entry[name]}" for name in COUNTERS if name in entry)
+            line = f"{source}: {stages}"
+            if counters:
+                line += f" ({counters})"
+            if entry.get('peak_memory'):
+                line += f", peak memory of its worker {entry['peak_memory'] / 1048576:.0f} MB"
+            lines.append(line)
+        return lines
+
+
+class _NullStage:
+    def count(self, **counters):
+        pass
+
+
+class NullProfiler:
+    """Profiler that records nothing, used when none is given"""
+
+    @contextmanager
+    def stage(self, source, name, **counters):
+        yield _NullStage()
+
+
+NULL_PROFILER = NullProfiler()
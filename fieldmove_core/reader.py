@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Columnar reader for FieldMove CSV project folders (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+
+from .schema import get_schema
+from .table import read_table
+
+# CSV files exported by FieldMove that hold one point per row
+POINT_LAYERS = ['image', 'note', 'localities', 'plane', 'line']
+
+# CSV files holding polyline vertices (attributes live in <name>-attributes.csv)
+LINE_LAYERS = ['polyline']
+
+# Suffix of the Cloud-Optimized GeoTIFFs the import derives from the basemaps,
+# which are not basemaps of their own
+COG_SUFFIX = '.cog.tif'
+
+
+class FieldMoveProject:
+    """Parsed content of a .fm project folder"""
+
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+        self.name = os.path.basename(os.path.normpath(project_dir))
+        self.csv_paths = {}
+        self.tables = {}
+        self.basemaps = []
+
+    def table(self, layer_name):
+        return self.tables.get(layer_name.lower())
+
+
+class FieldMoveProjectReader:
+    """Parse a whole FieldMove project folder once into columnar tables
+
+    The resulting tables are shared by the QGIS importer, the GeoPackage
+    writer and any NumPy consumer (e.g. stereonet math) without re-reading
+    the CSV files.
+    """
+
+    def __init__(self, project_dir):
+        if not isinstance(project_dir, str) or not os.path.isdir(project_dir):
+            raise ValueError("Invalid project directory")
+        self.project_dir = project_dir
+
+    def scan(self):
+        """Locate the known CSV files and basemaps without parsing them"""
+        project = FieldMoveProject(self.project_dir)
+        for root_dir, _, files in os.walk(self.project_dir):
+            for file in sorted(files):
+                file_path = os.path.join(root_dir, file)
+                stem, ext = os.path.splitext(file.lower())
+                if ext == '.csv':
+                    if stem in POINT_LAYERS or stem in LINE_LAYERS:
+                        project.csv_paths[stem] = file_path
+                    elif stem.endswith('-attributes') and stem[:-len('-attributes')] in LINE_LAYERS:
+                        project.csv_paths[stem] = file_path
+                elif ext in ('.tif', '.tiff') and not file.lower().endswith(COG_SUFFIX):
+                    project.basemaps.append(file_path)
+        return project
+
+    def read(self):
+        """Scan the project folder and parse every known CSV file"""
+        project = self.scan()
+        for key, path in project.csv_paths.items():
+            project.tables[key] = read_table(path, get_schema(key).numeric_fields)
+        return project
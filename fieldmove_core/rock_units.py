@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Rock units reference table of a project and the columnar color join
+ (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+
+import numpy as np
+
+from .table import DictionaryColumn, concat_tables, read_table
+
+# Columns of FieldMove Clino's stratcolumn.csv, which has no header row
+STRATCOLUMN_FIELDS = ['name', 'color', 'rock_type', 'age', 'thickness', 'horizonid']
+
+# Rows of stratcolumn.csv before the rock units
+STRATCOLUMN_SKIP_ROWS = 6
+
+# Columns holding the rock unit of an observation
+ROCK_UNIT_FIELDS = ['rockunit', 'unitid']
+
+
+def rock_units_csv(project_dir):
+    """Path of the rock units table and whether it is FieldMove Clino's stratcolumn.csv"""
+    rock_units_path = os.path.join(project_dir, "rock-units.csv")
+    if os.path.exists(rock_units_path):
+        return rock_units_path, False
+    #check if the data comes from FieldMove Clino, then the color codes are in stratcolumn.csv
+    rock_units_path = os.path.join(project_dir, "stratcolumn.csv")
+    if os.path.exists(rock_units_path):
+        return rock_units_path, True
+    return None, False
+
+
+class RockUnits:
+    """Rock units of a project: the reference table and the color of each unit
+
+    Loaded once per import and shared by the layers; colors are keyed by the
+    lowercase unit name.
+    """
+
+    def __init__(self, table=None):
+        self.table = table
+        self.colors = {}
+        if table is not None:
+            name_field = table.find(['name'])
+            color_field = table.find(['color'])
+            if name_field and color_field:
+                for name, color in zip(table.column(name_field).tolist(),
+                                       table.column(color_field).tolist()):
+                    self.colors[name.strip().lower()] = color.strip()
+
+    def __bool__(self):
+        return bool(self.colors)
+
+    @classmethod
+    def load(cls, project_dir):
+        """Read rock-units.csv (or stratcolumn.csv for FieldMove Clino), empty if there is none"""
+        rock_units_path, clino = rock_units_csv(project_dir)
+        if rock_units_path is None:
+            return cls()
+        if clino:
+            table = read_table(rock_units_path, (), skip_rows=STRATCOLUMN_SKIP_ROWS,
+                               fieldnames=STRATCOLUMN_FIELDS)
+        else:
+            table = read_table(rock_units_path, ())
+        return cls(table)
+
+    @classmethod
+    def merge(cls, rock_units, sources, source_field):
+        """Rock units of several projects, tagged with their source project
+
+        A unit defined by several projects keeps the color of the first one.
+        """
+        tables = [(units.table, source) for units, source in zip(rock_units, sources)
+                  if units.table is not None]
+        if not tables:
+            return cls()
+        merged = cls(concat_tables([table for table, _ in tables], 'rock-units',
+                                   [source for _, source in tables], source_field))
+        merged.colors = {}
+        for units in rock_units:
+            for name, color in units.colors.items():
+                merged.colors.setdefault(name, color)
+        return merged
+
+    def join_colors(self, table):
+        """Color of each row's rock unit, looked up once per distinct unit
+
+        Returns (color column, unmatched) where unmatched maps the rock units
+        missing from the reference table to their number of rows. The color
+        column is None when the table has no rock unit column or the project
+        no rock unit colors.
+        """
+        rockunit_field = table.find(ROCK_UNIT_FIELDS)
+        if not rockunit_field or not self.colors:
+            return None, {}
+        column = table.columns[rockunit_field]
+        if not isinstance(column, DictionaryColumn):
+            column = DictionaryColumn.encode(str(value) for value in column.tolist())
+
+        names = [str(value).strip().lower() for value in column.categories]
+        colors = [self.colors.get(name) or None for name in names]
+        counts = np.bincount(column.codes, minlength=len(names))
+        unmatched = {}
+        for category, name, color, count in zip(column.categories, names, colors, counts.tolist()):
+            if name and color is None and count:
+                unmatched[category] = unmatched.get(category, 0) + count
+        return DictionaryColumn(column.codes, colors), unmatched
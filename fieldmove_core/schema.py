@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Declarative schemas of the FieldMove CSV files and their compiled
+ column plans (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .table import DictionaryColumn, FieldMoveTable, NUMERIC_FIELDS
+
+# Attribute kinds, mapped to QgsField / GeoPackage types by the consumers
+STRING = 'string'
+DOUBLE = 'double'
+INTEGER = 'integer'
+DATETIME = 'datetime'
+
+# Measurement columns shared by every FieldMove point CSV
+POINT_DOUBLE_FIELDS = ['altitude', 'horiz_precision', 'vert_precision', 'dip', 'dipazimuth',
+                       'strike', 'declination', 'plunge', 'plungeazimuth', 'heading', 'x', 'y']
+
+# One resolved attribute column: output name, kind and index in the CSV header
+ColumnSpec = namedtuple('ColumnSpec', ['name', 'kind', 'index'])
+
+
+class ColumnPlan:
+    """Index-based extraction plan resolved once per CSV header"""
+
+    def __init__(self, schema, fieldnames, x_col, y_col, z_col, attributes):
+        self.schema = schema
+        self.fieldnames = fieldnames
+        self.x_col = x_col
+        self.y_col = y_col
+        self.z_col = z_col
+        self.attributes = attributes
+
+    @property
+    def has_coordinates(self):
+        return self.x_col is not None and self.y_col is not None
+
+    def valid_rows(self, table):
+        """Boolean mask of the rows with finite coordinates"""
+        x = table.columns[self.fieldnames[self.x_col]]
+        y = table.columns[self.fieldnames[self.y_col]]
+        return np.isfinite(x) & np.isfinite(y)
+
+    def coordinates(self, table, mask):
+        """Return the x, y and z (or None) arrays of the masked rows"""
+        x = table.columns[self.fieldnames[self.x_col]][mask]
+        y = table.columns[self.fieldnames[self.y_col]][mask]
+        z = None
+        if self.z_col is not None:
+            z = table.columns[self.fieldnames[self.z_col]][mask]
+        return x, y, z
+
+    def convert(self, table, converters):
+        """Return a table whose dictionary-encoded columns of the given kinds are converted
+
+        converters maps an attribute kind to a function converting a whole
+        DictionaryColumn into a new one, e.g. timestamps.iso_timestamps.
+        """
+        columns = dict(table.columns)
+        for spec in self.attributes:
+            name = self.fieldnames[spec.index]
+            column = columns[name]
+            if spec.kind in converters and isinstance(column, DictionaryColumn):
+                columns[name] = converters[spec.kind](column)
+        return FieldMoveTable(table.name, table.fieldnames, columns, table.path)
+
+    def decode(self, table, mask, converters=None):
+        """Decode the attribute columns of the masked rows into Python lists
+
+        converters maps an attribute kind to a function applied once per
+        distinct value of dictionary-encoded columns of that kind.
+        """
+        converters = converters or {}
+        columns = []
+        for spec in self.attributes:
+            column = table.columns[self.fieldnames[spec.index]]
+            if isinstance(column, DictionaryColumn):
+                if spec.kind in converters:
+                    column = column.map(converters[spec.kind])
+                columns.append(column[mask].tolist())
+            else:
+                values = column[mask]
+                decoded = values.astype(object)
+                decoded[np.isnan(values)] = None
+                columns.append(decoded.tolist())
+        return columns
+
+
+class CsvSchema:
+    """Declarative description of one FieldMove CSV file"""
+
+    def __init__(self, name, x_fields=('longitude', 'lon'), y_fields=('latitude', 'lat'),
+                 z_fields=('altitude', 'elevation'), double_fields=POINT_DOUBLE_FIELDS,
+                 integer_fields=(), datetime_fields=('timedate',)):
+        self.name = name
+        self.x_fields = list(x_fields)
+        self.y_fields = list(y_fields)
+        self.z_fields = list(z_fields)
+        self.double_fields = list(double_fields)
+        self.integer_fields = list(integer_fields)
+        self.datetime_fields = list(datetime_fields)
+
+    @property
+    def numeric_fields(self):
+        """Columns the reader should parse as float64"""
+        return self.x_fields + self.y_fields + self.z_fields + self.double_fields
+
+    def field_kind(self, field):
+        field = field.strip().lower()
+        if field in self.double_fields:
+            return DOUBLE
+        if field in self.integer_fields:
+            return INTEGER
+        if field in self.datetime_fields:
+            return DATETIME
+        return STRING
+
+    def compile(self, fieldnames):
+        """Resolve coordinate columns, attribute kinds and indexes for a CSV header"""
+        lower = [f.strip().lower() for f in fieldnames]
+
+        def _find(candidates):
+            return next((i for i, f in enumerate(lower) if f in candidates), None)
+
+        x_col = _find(self.x_fields)
+        y_col = _find(self.y_fields)
+        z_col = _find(self.z_fields)
+        coordinates = {x_col, y_col, z_col}
+        attributes = [ColumnSpec(field, self.field_kind(field), i)
+                      for i, field in enumerate(fieldnames) if i not in coordinates]
+        return ColumnPlan(self, fieldnames, x_col, y_col, z_col, attributes)
+
+
+SCHEMAS = {
+    'image': CsvSchema('image'),
+    'note': CsvSchema('note'),
+    'localities': CsvSchema('localities'),
+    'plane': CsvSchema('plane'),
+    'line': CsvSchema('line'),
+}
+
+
+def get_schema(layer_name):
+    """Return the registered schema of a CSV file, or a generic point schema"""
+    layer_name = layer_name.lower()
+    return SCHEMAS.get(layer_name) or CsvSchema(layer_name, double_fields=NUMERIC_FIELDS)
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Typed columnar tables parsed from FieldMove CSV files (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+import csv
+from itertools import islice, zip_longest
+
+import numpy as np
+
+from .feedback import CHUNK_SIZE
+
+# Columns parsed as float64 (lower case, FieldMove and FieldMove Clino headers)
+NUMERIC_FIELDS = ['longitude', 'latitude', 'altitude', 'elevation', 'horiz_precision',
+                  'vert_precision', 'dip', 'dipazimuth', 'strike', 'declination', 'plunge',
+                  'plungeazimuth', 'heading', 'x', 'y', 'thickness', 'opacity']
+
+
+class DictionaryColumn:
+    """String column stored as integer codes into a list of distinct values"""
+
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def encode(cls, values):
+        """Dictionary-encode an iterable of strings"""
+        lookup = {}
+        setdefault = lookup.setdefault
+        codes = np.fromiter((setdefault(v, len(lookup)) for v in values), dtype=np.int32)
+        return cls(codes, list(lookup))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.categories[self.codes[index]]
+        return DictionaryColumn(self.codes[index], self.categories)
+
+    def map(self, func):
+        """Apply func once per distinct value and return the re-encoded column"""
+        return DictionaryColumn(self.codes, [func(v) for v in self.categories])
+
+    def isin(self, values):
+        """Boolean mask of the rows whose value is in values, tested once per distinct value"""
+        found = np.fromiter((v in values for v in self.categories), dtype=bool,
+                            count=len(self.categories))
+        return found[self.codes]
+
+    def values_array(self, dtype=object):
+        """Decode the column into a NumPy array of the given dtype"""
+        return np.asarray(self.categories, dtype=dtype)[self.codes]
+
+    def tolist(self):
+        categories = self.categories
+        return [categories[c] for c in self.codes.tolist()]
+
+
+class FieldMoveTable:
+    """One FieldMove CSV file held as typed columns"""
+
+    def __init__(self, name, fieldnames, columns, path=None):
+        self.name = name
+        self.fieldnames = fieldnames
+        self.columns = columns
+        self.path = path
+        self._lower = {f.lower(): f for f in fieldnames}
+
+    @property
+    def num_rows(self):
+        if not self.fieldnames:
+            return 0
+        return len(self.columns[self.fieldnames[0]])
+
+    def __len__(self):
+        return self.num_rows
+
+    def __contains__(self, name):
+        return name.strip().lower() in self._lower
+
+    def find(self, candidates):
+        """Return the actual name of the first column matching one of candidates (case insensitive)"""
+        for candidate in candidates:
+            name = self._lower.get(candidate.strip().lower())
+            if name is not None:
+                return name
+        return None
+
+    def column(self, name, default=None):
+        actual = self._lower.get(name.strip().lower())
+        if actual is None:
+            return default
+        return self.columns[actual]
+
+    def with_column(self, name, column):
+        """Return a new table with the column added, or replaced if it already exists"""
+        actual = self._lower.get(name.strip().lower(), name)
+        columns = dict(self.columns)
+        columns[actual] = column
+        fieldnames = self.fieldnames if actual in self.columns else self.fieldnames + [actual]
+        return FieldMoveTable(self.name, fieldnames, columns, self.path)
+
+    def take(self, index):
+        """Return a new table restricted to a boolean mask or an array of row indices"""
+        columns = {name: col[index] for name, col in self.columns.items()}
+        return FieldMoveTable(self.name, self.fieldnames, columns, self.path)
+
+
+def combine_columns(columns):
+    """Dictionary column of the tuple of values of each row, one category per distinct tuple"""
+    columns = [column if isinstance(column, DictionaryColumn)
+               else DictionaryColumn.encode(column.tolist()) for column in columns]
+    if not columns or not len(columns[0]):
+        return DictionaryColumn(np.zeros(0, dtype=np.int32), [])
+    distinct, inverse = np.unique(np.stack([column.codes for column in columns]), axis=1,
+                                  return_inverse=True)
+    categories = [tuple(column.categories[code] for column, code in zip(columns, codes))
+                  for codes in distinct.T.tolist()]
+    return DictionaryColumn(inverse.reshape(-1).astype(np.int32), categories)
+
+
+def _as_strings(column):
+    """Dictionary-encode a float64 column, NaN becoming an empty string"""
+    return DictionaryColumn.encode('' if np.isnan(v) else repr(v) for v in column.tolist())
+
+
+def concat_tables(tables, name, sources=None, source_field=None):
+    """Concatenate tables with possibly different columns into one
+
+    The columns are matched case insensitively, under the spelling of their
+    first table, in order of first appearance. Rows lacking a column get NaN
+    (numeric) or an empty string. With sources (one name per table) a
+    source_field column records the table each row comes from.
+    """
+    fieldnames, lookup = [], {}
+    for table in tables:
+        for field in table.fieldnames:
+            if field.lower() not in lookup:
+                lookup[field.lower()] = field
+                fieldnames.append(field)
+    lengths = [table.num_rows for table in tables]
+    columns = {field: _concat_columns([table.column(field) for table in tables], lengths)
+               for field in fieldnames}
+    if sources is not None:
+        fieldnames.append(source_field)
+        columns[source_field] = DictionaryColumn(
+            np.repeat(np.arange(len(tables), dtype=np.int32), lengths), list(sources))
+    return FieldMoveTable(name, fieldnames, columns)
+
+
+def _concat_columns(parts, lengths):
+    """Concatenate the parts of a column, None for the parts lacking it
+
+    Numeric parts are concatenated as float64 (NaN where missing), the
+    others are merged into one dictionary (empty string where missing).
+    """
+    if all(part is None or not isinstance(part, DictionaryColumn) for part in parts):
+        return np.concatenate([part if part is not None else np.full(length, np.nan)
+                               for part, length in zip(parts, lengths)])
+    # Merge the dictionaries, re-coding each part into the shared categories
+    categories, codes = {}, []
+    for part, length in zip(parts, lengths):
+        if part is None:
+            part = DictionaryColumn(np.zeros(length, dtype=np.int32), [''])
+        elif not isinstance(part, DictionaryColumn):
+            part = _as_strings(part)
+        recode = np.fromiter((categories.setdefault(value, len(categories))
+                              for value in part.categories), dtype=np.int32,
+                             count=len(part.categories))
+        codes.append(recode[part.codes] if len(part.categories) else part.codes)
+    return DictionaryColumn(np.concatenate(codes).astype(np.int32), list(categories))
+
+
+def _to_float64(values):
+    """Convert a sequence of strings to float64, invalid or empty entries become NaN"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        pass
+    # Slow path: convert each distinct string once
+    encoded = DictionaryColumn.encode(values)
+    converted = np.empty(len(encoded.categories), dtype=np.float64)
+    for i, value in enumerate(encoded.categories):
+        try:
+            converted[i] = float(value)
+        except ValueError:
+            converted[i] = np.nan
+    return converted[encoded.codes]
+
+
+def _build_table(name, fieldnames, rows, numeric, path):
+    """FieldMoveTable of parsed CSV rows (lists of strings)"""
+    columns = {}
+    raw_columns = zip_longest(*rows, fillvalue='') if rows else [() for _ in fieldnames]
+    for field, raw in zip_longest(fieldnames, raw_columns):
+        if field is None:
+            break  # Surplus values beyond the header are ignored
+        if raw is None:
+            # Every row was shorter than the header
+            raw = ('',) * len(rows)
+        if field.lower() in numeric:
+            columns[field] = _to_float64(raw)
+        else:
+            columns[field] = DictionaryColumn.encode(raw)
+    return FieldMoveTable(name, fieldnames, columns, path)
+
+
+class TableReader:
+    """Parse a CSV file into FieldMoveTables of at most chunk_size rows, one chunk at a time
+
+    Only one chunk of raw rows is held in memory. Columns listed in
+    numeric_fields become float64 arrays, every other column is dictionary
+    encoded. With columns (case insensitive names), the other columns are
+    dropped from the chunks. Iterating yields at least one, possibly empty,
+    table, so the header is always known; progress() is the percentage of
+    the file read so far.
+    """
+
+    def __init__(self, csv_path, numeric_fields=NUMERIC_FIELDS, chunk_size=CHUNK_SIZE, skip_rows=0,
+                 fieldnames=None, columns=None):
+        self.path = csv_path
+        self.name = os.path.splitext(os.path.basename(csv_path))[0]
+        self.numeric = {f.lower() for f in numeric_fields}
+        self.chunk_size = chunk_size
+        self.skip_rows = skip_rows
+        self.fieldnames = fieldnames
+        self.columns = None if columns is None else {c.lower() for c in columns}
+        self._size = max(1, os.path.getsize(csv_path))
+        self._read = 0
+
+    def progress(self):
+        return min(100.0, 100.0 * self._read / self._size)
+
+    def _lines(self, f):
+        for line in f:
+            self._read += len(line)
+            yield line
+
+    def __iter__(self):
+        with open(self.path, 'r', newline='') as f:
+            reader = csv.reader(self._lines(f), skipinitialspace=True)
+            if self.fieldnames is None:
+                self.fieldnames = [field.strip() for field in next(reader, [])]
+            for _ in range(self.skip_rows):
+                next(reader, None)
+            rows = filter(None, reader)
+            chunks = 0
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk and chunks:
+                    break
+                chunks += 1
+                yield self._select(_build_table(self.name, self.fieldnames, chunk, self.numeric,
+                                                self.path))
+                if not chunk:
+                    break
+
+    def _select(self, table):
+        if self.columns is None:
+            return table
+        fieldnames = [name for name in table.fieldnames if name.lower() in self.columns]
+        return FieldMoveTable(table.name, fieldnames, {name: table.columns[name] for name in fieldnames},
+                              table.path)
+
+
+def read_table(csv_path, numeric_fields=NUMERIC_FIELDS, skip_rows=0, fieldnames=None, columns=None):
+    """Parse a CSV file into a FieldMoveTable
+
+    Columns listed in numeric_fields become float64 arrays, every other
+    column is dictionary encoded. The file is parsed in chunks (see
+    TableReader), so the raw rows of only one chunk are held at a time.
+    """
+    chunks = list(TableReader(csv_path, numeric_fields, skip_rows=skip_rows, fieldnames=fieldnames,
+                              columns=columns))
+    if len(chunks) == 1:
+        return chunks[0]
+    lengths = [chunk.num_rows for chunk in chunks]
+    fieldnames = chunks[0].fieldnames
+    return FieldMoveTable(chunks[0].name, fieldnames,
+                          {name: _concat_columns([chunk.columns[name] for chunk in chunks], lengths)
+                           for name in dict.fromkeys(fieldnames)},
+                          csv_path)
+
+
+def table_chunks(table, chunk_size=CHUNK_SIZE):
+    """Yield slices of at most chunk_size rows of a table, at least one"""
+    for start in range(0, max(1, table.num_rows), chunk_size):
+        yield table.take(slice(start, start + chunk_size))
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ Batch parser of the FieldMove timestamp columns (no QGIS dependency)
+                              -------------------
+        begin                : 2025-03-29
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import re
+
+import numpy as np
+
+from .table import DictionaryColumn
+
+# English month abbreviations, independent of the system locale
+MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+# Supported layouts, tried in order on the first value of a column. Each
+# regex captures year, month, day, hours, minutes and seconds.
+TIMESTAMP_FORMATS = [
+    # "Sat Oct 19 15:00:33 2024" (FieldMove), the weekday being optional
+    ('fieldmove', re.compile(r'^(?:[A-Za-z]+\s+)?(?P<month>[A-Za-z]{3})[A-Za-z]*\s+(?P<day>\d{1,2})\s+'
+                             r'(?P<hour>\d{1,2}):(?P<minute>\d{2}):(?P<second>\d{2})\s+(?P<year>\d{4})$')),
+    # "2024-10-19T15:00:33" / "2024-10-19 15:00:33.123"
+    ('iso', re.compile(r'^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})[T ]'
+                       r'(?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})(?:\.\d+)?$')),
+]
+
+_PARTS = ('year', 'month', 'day', 'hour', 'minute', 'second')
+
+
+def detect_format(values):
+    """Regex of the first timestamp format matching a value of the column, None if none does"""
+    for value in values:
+        value = value.strip() if isinstance(value, str) else ''
+        if not value:
+            continue
+        for _, regex in TIMESTAMP_FORMATS:
+            if regex.match(value):
+                return regex
+    return None
+
+
+def _match(regex, value):
+    """Match a value with the column format, falling back to the other formats"""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    match = regex.match(value)
+    if match is None:
+        for _, other in TIMESTAMP_FORMATS:
+            if other is not regex:
+                match = other.match(value)
+                if match is not None:
+                    break
+    return match
+
+
+def parse_timestamps(values):
+    """Parse distinct timestamp strings into a datetime64[s] array, NaT when invalid
+
+    The format is detected once from the first non-empty value; the regex
+    split is the only per-value work, the calendar arithmetic and validation
+    run over the whole array.
+    """
+    count = len(values)
+    parts = np.zeros((len(_PARTS), count), dtype=np.int64)
+    matched = np.zeros(count, dtype=bool)
+    regex = detect_format(values)
+    if regex is not None:
+        for i, value in enumerate(values):
+            match = _match(regex, value)
+            if match is None:
+                continue
+            month = match.group('month')
+            month = int(month) if month.isdigit() else MONTHS.get(month.lower(), 0)
+            parts[:, i] = (int(match.group('year')), month, int(match.group('day')),
+                           int(match.group('hour')), int(match.group('minute')),
+                           int(match.group('second')))
+            matched[i] = True
+
+    year, month, day, hour, minute, second = parts
+    valid = (matched & (month >= 1) & (month <= 12) & (day >= 1) & (hour <= 23)
+             & (minute <= 59) & (second <= 59))
+    month = np.where(valid, month, 1)
+    day = np.where(valid, day, 1)
+    months = (year - 1970) * 12 + month - 1
+    dates = months.astype('datetime64[M]').astype('datetime64[D]') + (day - 1)
+    # Reject days past the end of the month (e.g. Feb 30th)
+    valid &= dates.astype('datetime64[M]') == months.astype('datetime64[M]')
+    result = dates.astype('datetime64[s]') + (hour * 3600 + minute * 60 + second)
+    result[~valid] = np.datetime64('NaT')
+    return result
+
+
+def _categories(column):
+    if isinstance(column, DictionaryColumn):
+        return column
+    return DictionaryColumn.encode(column)
+
+
+def iso_timestamps(column):
+    """Dictionary column of ISO 8601 strings ("2024-10-19T15:00:33"), None when invalid
+
+    Each distinct value of the column is parsed once.
+    """
+    column = _categories(column)
+    timestamps = parse_timestamps(column.categories)
+    strings = np.datetime_as_string(timestamps, unit='s')
+    iso = [None if np.isnat(t) else s for t, s in zip(timestamps, strings.tolist())]
+    return DictionaryColumn(column.codes, iso)
+
+
+def epoch_timestamps(column):
+    """Seconds since 1970-01-01 of each row as int64, with the mask of the valid rows"""
+    column = _categories(column)
+    timestamps = parse_timestamps(column.categories)[column.codes]
+    valid = ~np.isnat(timestamps)
+    return np.where(valid, timestamps.astype(np.int64), 0), valid
@@ -0,0 +1,609 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ This plugins consolidate FieldMove project files into a QGIS project
+ Background tasks running a FieldMove project import, or the batch import
+ of several projects into one GeoPackage
+                              -------------------
+        begin                : 2025-03-29
+        git sha              : $Format:%H$
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import importlib
+import multiprocessing
+import os
+import site
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+
+from qgis.core import (Qgis, QgsCoordinateReferenceSystem, QgsCoordinateTransformContext, QgsMessageLog,
+                       QgsProject, QgsTask)
+
+from .basemaps import basemap_sidecars, build_mosaic, cog_path, convert_to_cog, mosaic_groups
+from .fieldmove_core import (POINT_LAYERS, LINE_LAYERS, CACHE_DIR, SOURCE_PROJECT_FIELD,
+                             FieldMoveProjectReader, GeoPackageWriter, ImportCanceled, ImportManifest,
+                             ImportProfiler, RockUnits, check_canceled, concat_tables, file_size,
+                             get_schema, read_table, rock_units_csv, source_names,
+                             update_rotation, write_lookup_tables)
+from .thumbnail_cache import ThumbnailCache
+
+# Kinds of import jobs, one per project file
+POINT_JOB = 'point'
+LINE_JOB = 'line'
+RASTER_JOB = 'raster'
+MOSAIC_JOB = 'mosaic'
+THUMBNAIL_JOB = 'thumbnail'
+
+# Attempts to update the rotation of a GeoPackage locked by QGIS, and the
+# delay between them (after the busy timeout of the sqlite3 connection)
+ROTATION_ATTEMPTS = 3
+ROTATION_RETRY_DELAY = 1.
+
+
+def _python_executable():
+    """Python interpreter able to run the worker processes, None if there is none
+
+    sys.executable is the QGIS application itself on Windows and macOS,
+    whose Python installation is looked up in sys.exec_prefix instead.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+    for name in ('python.exe', 'pythonw.exe', os.path.join('bin', 'python3'), 'python3'):
+        path = os.path.join(sys.exec_prefix, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _process_pool(workers):
+    """Pool of worker processes and its fieldmove_core.layers.convert_layer, or (None, None)
+
+    The workers import fieldmove_core as a top-level package, since the
+    plugin package needs QGIS: the function submitted to the pool is the one
+    of that package. Each file gets a fresh worker where supported (Python
+    3.11), so that the peak memory of the worker is that of the file.
+    Threads are used when no Python interpreter is found.
+    """
+    executable = _python_executable()
+    if executable is None:
+        return None, None
+    plugin_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, plugin_dir)
+    try:
+        layers = importlib.import_module('fieldmove_core.layers')
+    finally:
+        sys.path.remove(plugin_dir)
+    context = multiprocessing.get_context('spawn')
+    context.set_executable(executable)
+    options = {'max_tasks_per_child': 1} if sys.version_info >= (3, 11) else {}
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                   initializer=site.addsitedir, initargs=(plugin_dir,), **options)
+    except (OSError, ValueError) as e:
+        QgsMessageLog.logMessage(f"CSV files converted in threads: {e}", 'FieldMove', Qgis.Warning)
+        return None, None
+    return pool, layers.convert_layer
+
+
+class _JobFeedback:
+    """QgsFeedback-like progress/cancellation hook handed to one import job"""
+
+    def __init__(self, task, slot):
+        self.task = task
+        self.slot = slot
+
+    def isCanceled(self):
+        return self.task.canceled()
+
+    def setProgress(self, progress):
+        self.task.set_job_progress(self.slot, progress)
+
+
+class FieldMoveImportTask(QgsTask):
+    """Import a FieldMove project folder in the background
+
+    run() parses the files, builds the features and writes the GeoPackages in
+    a thread pool, with per-file and per-row progress. finished() is called on
+    the main thread and is the only place where layers are added to the
+    project. Canceling removes the GeoPackages written by the task.
+
+    Jobs whose inputs (content hashes in the project manifest) and options did
+    not change since the previous import reuse its GeoPackage layer, cached
+    style and raster statistics instead of being rebuilt. In delta mode the
+    changed CSV files only append their new rows (by dataId) to the layers of
+    the previous import.
+
+    In single GeoPackage mode all the layers go through one writer (one
+    connection, one transaction per layer) into <project>.gpkg, together with
+    the rock units lookup table.
+
+    With mosaic, the basemaps sharing the same band layout and CRS are loaded
+    as one virtual mosaic (.fieldmove_cache/basemaps.vrt) with its own
+    overviews and statistics. With cog, the other basemaps are converted once
+    into Cloud-Optimized GeoTIFFs (<name>.cog.tif next to them), warped to the
+    project CRS with reproject, which are loaded instead.
+
+    The photos of the images folder are downscaled into the thumbnail cache
+    shown by the image layer map tips.
+
+    The stages of every job are timed by an ImportProfiler, reported once
+    the layers are registered.
+    """
+
+    def __init__(self, importer, project_dir, single_geopackage=False, delta=False, mosaic=False,
+                 cog=False, reproject=False, project=None, transform_context=None, feedback=None):
+        name = os.path.basename(os.path.normpath(project_dir))
+        super().__init__(f"Importing FieldMove project {name}", QgsTask.CanCancel)
+        self.importer = importer
+        # QgsFeedback of a Processing run calling run() itself, for its progress and cancellation
+        self.feedback = feedback
+        self.project_dir = project_dir
+        self.single_geopackage = single_geopackage
+        self.delta = delta
+        self.mosaic = mosaic
+        self.cog = cog
+        self.writer = None  # Shared GeoPackageWriter of the single GeoPackage mode
+        self.manifest = None
+        self.rock_units = None
+        # Captured on the main thread for the symbol rotations computed by the
+        # workers. A Processing run passes the project of its context instead,
+        # the project instance not being safe to read from its thread
+        if project is None and feedback is None:
+            project = QgsProject.instance()
+        self.map_crs = project.crs() if project is not None else QgsCoordinateReferenceSystem()
+        if transform_context is None:
+            transform_context = project.transformContext() if project is not None \
+                else QgsCoordinateTransformContext()
+        self.transform_context = transform_context
+        self.options = {'single_geopackage': bool(single_geopackage)}
+        # Basemaps are warped to the project CRS captured here, when valid
+        warp = cog and reproject and self.map_crs.isValid()
+        self.crs_wkt = self.map_crs.toWkt() if warp else None
+        self.raster_options = {'cog': bool(cog), 'crs': self.map_crs.authid() if warp else None}
+        self._built = set()  # Files rebuilt (not reused) by this import
+        self.results = []  # (kind, file_path, result, error) in file order
+        self.exception = None
+        self.profiler = ImportProfiler(project_dir)
+        self._progress = []
+        self._sources = {}  # Input files of each job, checked against the manifest
+        self._new_gpkg = False
+        self._processes = None  # Worker processes converting the CSV files, if any
+        self._convert_layer = None
+        self._lock = threading.Lock()
+
+    def set_job_progress(self, slot, progress):
+        """Record the progress of one job and publish the overall task progress"""
+        with self._lock:
+            self._progress[slot] = progress
+            overall = sum(self._progress) / len(self._progress)
+        if self.feedback is not None:
+            self.feedback.setProgress(overall)
+        else:
+            self.setProgress(overall)
+
+    def canceled(self):
+        """Whether the task, or the Processing run of a task without task manager, was canceled"""
+        return self.isCanceled() or (self.feedback is not None and self.feedback.isCanceled())
+
+    def _check_canceled(self):
+        if self.canceled():
+            raise ImportCanceled()
+
+    def run(self):
+        try:
+            project = FieldMoveProjectReader(self.project_dir).scan()
+            self.manifest = ImportManifest.load(self.project_dir)
+            # The rock units table is read once and shared by the layers
+            rock_units_path = rock_units_csv(self.project_dir)[0]
+            self.rock_units = RockUnits.load(self.project_dir)
+            jobs = []
+            for key, file_path in project.csv_paths.items():
+                if key in POINT_LAYERS:
+                    jobs.append((POINT_JOB, file_path))
+                    inputs = [file_path]
+                elif key in LINE_LAYERS:
+                    jobs.append((LINE_JOB, file_path))
+                    inputs = [file_path, project.csv_paths.get(f"{key}-attributes")]
+                else:
+                    continue
+                # The rock unit colors are joined into the CSV layers
+                self._sources[file_path] = [path for path in inputs + [rock_units_path] if path]
+            jobs += self._basemap_jobs(project.basemaps)
+            if 'image' in project.csv_paths:
+                images_dir = os.path.join(os.path.dirname(project.csv_paths['image']), 'images')
+                if os.path.isdir(images_dir):
+                    jobs.append((THUMBNAIL_JOB, images_dir))
+            self._progress = [0.0] * max(1, len(jobs))
+
+            if self.single_geopackage:
+                # Layers are replaced one by one so the reused ones are kept
+                gpkg_path = self.importer._project_gpkg_path(self.project_dir)
+                self._new_gpkg = not os.path.exists(gpkg_path)
+                self.writer = GeoPackageWriter(gpkg_path, overwrite=False)
+                write_lookup_tables(self.writer, self.rock_units)
+
+            # The threads overlap the GDAL, sqlite and image work, which release
+            # the GIL, but the CSV parsing and the row conversion hold it: the
+            # CSV files written to GeoPackages of their own are converted in
+            # worker processes, the threads waiting for them
+            workers = max(1, min(len(jobs), os.cpu_count() or 1))
+            if not self.single_geopackage and any(kind in (POINT_JOB, LINE_JOB) for kind, _ in jobs):
+                self._processes, self._convert_layer = _process_pool(workers)
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    self._collect(jobs, [pool.submit(self._run_job, slot, kind, file_path)
+                                         for slot, (kind, file_path) in enumerate(jobs)])
+            finally:
+                if self._processes is not None:
+                    self._processes.shutdown(cancel_futures=True)
+                if self.writer is not None:
+                    self.writer.close()
+
+            if self.canceled():
+                self._remove_outputs(jobs)
+                return False
+            return True
+
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def _basemap_jobs(self, basemaps):
+        """Raster jobs of the basemaps, grouped into virtual mosaics with mosaic"""
+        jobs = []
+        groups = mosaic_groups(basemaps) if self.mosaic else [[path] for path in basemaps]
+        mosaics = 0
+        for paths in groups:
+            if len(paths) == 1:
+                jobs.append((RASTER_JOB, paths[0]))
+                self._sources[paths[0]] = paths
+                continue
+            mosaics += 1
+            vrt_name = 'basemaps.vrt' if mosaics == 1 else f"basemaps_{mosaics}.vrt"
+            vrt_path = os.path.join(self.project_dir, CACHE_DIR, vrt_name)
+            jobs.append((MOSAIC_JOB, vrt_path))
+            self._sources[vrt_path] = paths
+        return jobs
+
+    def _collect(self, jobs, futures):
+        """Record the result or error of each job, in job order"""
+        for (kind, file_path), future in zip(jobs, futures):
+            try:
+                result = future.result()
+                self.results.append((kind, self._layer_path(kind, file_path), result, None))
+            except ImportCanceled:
+                pass
+            except Exception as e:
+                if kind == MOSAIC_JOB:
+                    # Load the basemaps one by one rather than not at all
+                    self.results.extend((RASTER_JOB, path, None, e)
+                                        for path in self._sources[file_path])
+                else:
+                    self.results.append((kind, file_path, None, e))
+
+    def _layer_path(self, kind, file_path):
+        """File loaded as the layer of a job"""
+        if kind == RASTER_JOB and self.cog:
+            return cog_path(file_path)
+        return file_path
+
+    def _run_job(self, slot, kind, file_path):
+        feedback = _JobFeedback(self, slot)
+        check_canceled(feedback)
+        source = os.path.splitext(os.path.basename(file_path))[0]
+        if kind == THUMBNAIL_JOB:
+            # The cache checks the freshness of each thumbnail itself
+            with self.profiler.stage(source, 'thumbnails'):
+                return ThumbnailCache(self.project_dir).build(file_path, feedback)
+        options = self.raster_options if kind == RASTER_JOB else self.options
+
+        # Reuse the output of the previous import when nothing changed
+        key = self.manifest.key(file_path)
+        signatures = self.manifest.signatures(key, self._sources[file_path])
+        if self.manifest.is_current(key, signatures, options):
+            with self.profiler.stage(source, 'reuse'):
+                feedback.setProgress(100.0)
+                if kind in (RASTER_JOB, MOSAIC_JOB):
+                    return self.manifest.result(key)
+                return self.manifest.outputs(key)[0]
+
+        # Appending needs the layer of a previous import with the same layout
+        delta = self.delta and self.manifest.built_with(key, options)
+        self.manifest.discard(key)
+        if not delta:
+            self._built.add(file_path)
+        if kind in (POINT_JOB, LINE_JOB) and self._processes is not None:
+            result = self._convert_in_process(kind, file_path, feedback, delta)
+        elif kind == POINT_JOB:
+            result = self.importer._build_point_layer(file_path, feedback=feedback, writer=self.writer,
+                                                      delta=delta, rock_units=self.rock_units,
+                                                      map_crs=self.map_crs,
+                                                      transform_context=self.transform_context,
+                                                      profiler=self.profiler)
+        elif kind == LINE_JOB:
+            result = self.importer._build_line_layer(file_path, feedback=feedback, writer=self.writer,
+                                                     delta=delta, rock_units=self.rock_units,
+                                                     profiler=self.profiler)
+        elif kind == MOSAIC_JOB:
+            sources = self._sources[file_path]
+            with self.profiler.stage(source, 'mosaic', bytes_read=sum(map(file_size, sources))):
+                build_mosaic(file_path, sources)
+            with self.profiler.stage(source, 'overviews and statistics'):
+                result = self.importer._prepare_basemap(file_path, feedback)
+        else:
+            layer_path = self._layer_path(kind, file_path)
+            if self.cog:
+                with self.profiler.stage(source, 'convert to COG',
+                                         bytes_read=file_size(file_path)) as stage:
+                    convert_to_cog(file_path, layer_path, self.crs_wkt, feedback)
+                    stage.count(bytes_written=file_size(layer_path))
+            with self.profiler.stage(source, 'overviews and statistics'):
+                result = self.importer._prepare_basemap(layer_path, feedback)
+        if kind == MOSAIC_JOB:
+            self.manifest.record(key, signatures, options,
+                                 outputs=[file_path] + basemap_sidecars(file_path), result=result)
+        elif kind == RASTER_JOB:
+            # The converted raster, overviews and statistics written by GDAL are part of the entry
+            outputs = [layer_path] if self.cog else []
+            self.manifest.record(key, signatures, options,
+                                 outputs=outputs + basemap_sidecars(layer_path), result=result)
+        else:
+            self.manifest.record(key, signatures, options, outputs=[result])
+        feedback.setProgress(100.0)
+        return result
+
+    def _convert_in_process(self, kind, file_path, feedback, delta):
+        """Convert a CSV file into its GeoPackage in a worker process
+
+        The symbol rotation, which needs the QGIS transform to the map CRS,
+        is then updated from this thread. Canceling stops waiting for the
+        worker, whose GeoPackage is removed once it finished.
+        """
+        future = self._processes.submit(self._convert_layer, file_path,
+                                        self.importer._gpkg_path(file_path), self.project_dir, delta)
+        while True:
+            try:
+                result, warnings, stages, peak = future.result(timeout=0.1)
+                break
+            except TimeoutError:
+                if feedback.isCanceled():
+                    future.cancel()
+                    check_canceled(feedback)
+        for message in warnings:
+            self.importer._log_warning(message)
+        layer_name = os.path.splitext(os.path.basename(file_path))[0]
+        self.profiler.merge(stages, layer_name, peak)
+        transform = self.importer._rotation_transform(self.map_crs, self.transform_context)
+        if kind == POINT_JOB and transform is not None:
+            with self.profiler.stage(layer_name, 'symbol rotation'), \
+                    GeoPackageWriter(result, overwrite=False) as writer:
+                update_rotation(writer, layer_name,
+                                lambda base, x, y: self.importer._symbol_rotation(base, transform, x, y),
+                                self.map_crs.authid())
+        return result
+
+    def _remove_outputs(self, jobs):
+        """Delete the (possibly partial) GeoPackages written for the CSV jobs
+
+        Reused GeoPackages are kept, as is an existing project GeoPackage
+        whose interrupted layer transactions were rolled back.
+        """
+        if self.single_geopackage:
+            gpkg_paths = [self.importer._project_gpkg_path(self.project_dir)] if self._new_gpkg else []
+        else:
+            gpkg_paths = [self.importer._gpkg_path(file_path) for kind, file_path in jobs
+                          if kind in (POINT_JOB, LINE_JOB) and file_path in self._built]
+        for gpkg_path in gpkg_paths:
+            for path in (gpkg_path, f"{gpkg_path}-wal", f"{gpkg_path}-shm", f"{gpkg_path}-journal"):
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    QgsMessageLog.logMessage(f"Could not remove {path}: {e}", 'FieldMove', Qgis.Warning)
+
+    def finished(self, result):
+        """Register the imported layers (main thread)"""
+        if self.exception is not None:
+            self.importer._report_import_error(self.exception)
+        elif not result:
+            self.importer.iface.messageBar().pushMessage(
+                "FieldMove",
+                f"Import of {os.path.basename(os.path.normpath(self.project_dir))} canceled",
+                level=Qgis.Warning,
+                duration=5
+            )
+        else:
+            self.importer._register_layers(self.project_dir, self.results, self.manifest,
+                                           self.profiler)
+
+
+class FieldMoveBatchImportTask(FieldMoveImportTask):
+    """Import several FieldMove project folders into one consolidated GeoPackage
+
+    The CSV files and rock units of every project are parsed in the worker
+    pool, concatenated per layer with a sourceProject column naming the
+    project of each row (its folder relative to the common root), then
+    written through the same pool as one layer each into gpkg_path, next to
+    the merged rock units table. The layers are styled once and registered
+    in a single group; the basemaps of all the projects are prepared as in
+    a single import, and mosaicked together with mosaic.
+
+    The consolidated layers are rebuilt by every batch import (no delta or
+    reuse of unchanged layers), and the photos are shown at full resolution.
+    """
+
+    def __init__(self, importer, project_dirs, gpkg_path=None, mosaic=False, cog=False,
+                 reproject=False, project=None, transform_context=None, feedback=None):
+        root, sources = source_names(project_dirs)
+        super().__init__(importer, root, single_geopackage=True, mosaic=mosaic, cog=cog,
+                         reproject=reproject, project=project, transform_context=transform_context,
+                         feedback=feedback)
+        self.setDescription(f"Importing {len(sources)} FieldMove projects")
+        self.project_dirs = [os.path.join(root, *source.split('/')) for source in sources]
+        self.sources = sources
+        self.gpkg_path = gpkg_path or importer._project_gpkg_path(root)
+        self.tables = {}  # Concatenated table of each CSV file name
+
+    def run(self):
+        try:
+            projects = [FieldMoveProjectReader(project_dir).scan() for project_dir in self.project_dirs]
+            self.manifest = ImportManifest.load(self.project_dir)
+            jobs = []
+            workers = os.cpu_count() or 1
+            self.writer = GeoPackageWriter(self.gpkg_path)
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    # Parse every project in the shared pool
+                    reads = [(key, source, path, pool.submit(self._read_table, source, key, path))
+                             for source, project in zip(self.sources, projects)
+                             for key, path in project.csv_paths.items()]
+                    rock_units = [pool.submit(RockUnits.load, project_dir)
+                                  for project_dir in self.project_dirs]
+                    self.rock_units = RockUnits.merge([future.result() for future in rock_units],
+                                                      self.sources, SOURCE_PROJECT_FIELD)
+                    parts = {}
+                    for key, source, path, future in reads:
+                        try:
+                            parts.setdefault(key, []).append((source, future.result()))
+                        except ImportCanceled:
+                            pass
+                        except Exception as e:
+                            # The other projects are still imported
+                            kind = POINT_JOB if key in POINT_LAYERS else LINE_JOB
+                            self.results.append((kind, path, None, e))
+                    self._check_canceled()
+
+                    for key, entries in parts.items():
+                        self.tables[key] = concat_tables([table for _, table in entries], key,
+                                                         [source for source, _ in entries],
+                                                         SOURCE_PROJECT_FIELD)
+                    jobs = [(POINT_JOB, self._layer_csv(key)) for key in POINT_LAYERS if key in self.tables]
+                    jobs += [(LINE_JOB, self._layer_csv(key)) for key in LINE_LAYERS if key in self.tables]
+                    jobs += self._basemap_jobs([path for project in projects for path in project.basemaps])
+                    self._progress = [0.0] * max(1, len(jobs))
+
+                    write_lookup_tables(self.writer, self.rock_units)
+                    self._collect(jobs, [pool.submit(self._run_job, slot, kind, file_path)
+                                         for slot, (kind, file_path) in enumerate(jobs)])
+            finally:
+                self.writer.close()
+
+            if self.canceled():
+                self._remove_outputs(jobs)
+                return False
+            return True
+
+        except ImportCanceled:
+            self._remove_outputs([])
+            return False
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def _layer_csv(self, key):
+        """Path standing for the CSV file of a consolidated layer, which names the layer"""
+        return os.path.join(self.project_dir, f"{key}.csv")
+
+    def _read_table(self, source, key, path):
+        self._check_canceled()
+        with self.profiler.stage(f"{source}/{key}", 'parse', bytes_read=file_size(path)) as stage:
+            table = read_table(path, get_schema(key).numeric_fields)
+            stage.count(rows_read=table.num_rows)
+        return table
+
+    def _run_job(self, slot, kind, file_path):
+        if kind not in (POINT_JOB, LINE_JOB):
+            return super()._run_job(slot, kind, file_path)
+        feedback = _JobFeedback(self, slot)
+        check_canceled(feedback)
+        key = os.path.splitext(os.path.basename(file_path))[0]
+        if kind == POINT_JOB:
+            result = self.importer._build_point_layer(file_path, self.tables[key], feedback, self.writer,
+                                                      rock_units=self.rock_units, map_crs=self.map_crs,
+                                                      transform_context=self.transform_context,
+                                                      profiler=self.profiler)
+        else:
+            result = self.importer._build_line_layer(file_path, self.tables[key],
+                                                     self.tables.get(f"{key}-attributes"), feedback,
+                                                     self.writer, rock_units=self.rock_units,
+                                                     profiler=self.profiler)
+        feedback.setProgress(100.0)
+        return result
+
+    def _remove_outputs(self, jobs):
+        """Delete the partial consolidated GeoPackage"""
+        for path in (self.gpkg_path, f"{self.gpkg_path}-wal", f"{self.gpkg_path}-shm",
+                     f"{self.gpkg_path}-journal"):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                QgsMessageLog.logMessage(f"Could not remove {path}: {e}", 'FieldMove', Qgis.Warning)
+
+
+class SymbolRotationTask(QgsTask):
+    """Recompute the stored symbol rotation of imported layers for a new project CRS
+
+    layers are (layer id, GeoPackage path, layer name, transform to the map
+    CRS or None), captured on the main thread. Only the changed values are
+    written, through sqlite in the background; finished() reloads the
+    layers that changed once their transaction is committed. A GeoPackage
+    still locked after ROTATION_ATTEMPTS is left as is and listed in
+    locked, its layer being updated again on the next refresh. A canceled
+    task keeps the layers it already updated.
+    """
+
+    def __init__(self, importer, layers, map_crs):
+        super().__init__("Updating the FieldMove symbol rotations", QgsTask.CanCancel)
+        self.importer = importer
+        self.layers = layers
+        self.rotation_crs = map_crs.authid()
+        self.updated = {}  # Number of changed values of each updated layer id
+        self.locked = []  # Names of the layers whose GeoPackage stayed locked
+        self.exception = None
+
+    def run(self):
+        try:
+            for done, (layer_id, gpkg_path, layer_name, transform) in enumerate(self.layers):
+                for attempt in range(ROTATION_ATTEMPTS):
+                    if self.isCanceled():
+                        return False
+                    try:
+                        with GeoPackageWriter(gpkg_path, overwrite=False) as writer:
+                            self.updated[layer_id] = update_rotation(
+                                writer, layer_name,
+                                lambda base, x, y: self.importer._symbol_rotation(base, transform, x, y),
+                                self.rotation_crs)
+                        break
+                    except sqlite3.OperationalError as e:
+                        if 'locked' not in str(e) and 'busy' not in str(e):
+                            raise
+                        time.sleep(ROTATION_RETRY_DELAY)
+                else:
+                    self.locked.append(layer_name)
+                self.setProgress(100. * (done + 1) / len(self.layers))
+            return True
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def finished(self, result):
+        """Reload the updated layers (main thread)"""
+        self.importer._symbol_rotations_updated(self)
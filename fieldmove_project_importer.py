@@ -25,43 +25,56 @@
 """
 
 from .stereonet import StereonetTool
+from .fieldmove_core import (SYMBOL_CATEGORY_FIELD, CACHE_DIR, ROTATION_FIELD, ROTATION_BASE_FIELDS,
+                             NULL_PROFILER, SOURCE_PROJECT_FIELD, GeoPackageWriter, ImportCanceled,
+                             find_projects, read_layer_stats, symbol_category, write_line_layer, write_point_layer)
+from .fieldmove_import_task import (FieldMoveBatchImportTask, FieldMoveImportTask, SymbolRotationTask,
+                                    POINT_JOB, LINE_JOB, THUMBNAIL_JOB)
+from .symbol_atlas import SymbolAtlas
+from .processing_provider import FieldMoveProcessingProvider
+from .basemaps import prepare_basemap
 
 import os
-import csv
-from datetime import datetime
+from contextlib import nullcontext
+import numpy as np
 from qgis.PyQt.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-                                QPushButton, QFileDialog, QMessageBox,
+                                QPushButton, QFileDialog, QMessageBox, QCheckBox,
                                 QAction, QFileDialog, QMessageBox)
 from qgis.PyQt.QtGui import QIcon, QPixmap
-from qgis.PyQt.QtCore import QMetaType, Qt, QDateTime, QLocale, QVariant
+from qgis.PyQt.QtCore import Qt
 from qgis.PyQt.QtGui import QColor  
 from qgis.core import (
+    NULL,
     Qgis,
     QgsApplication,
     QgsVectorLayer,
-    QgsField,
-    QgsFields,
-    QgsFeature,
-    QgsGeometry,
+    QgsFeatureRequest,
+    QgsFeatureSource,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsCoordinateTransformContext,
+    QgsCsException,
     QgsLineString,
-    QgsPoint,
-    QgsPointXY,
     QgsMarkerSymbol,
     QgsLineSymbol,
     QgsMessageLog,
-    QgsVectorFileWriter,
+    QgsVectorDataProvider,
     QgsProject,
     QgsRasterLayer,
+    QgsRasterBandStats,
+    QgsMultiBandColorRenderer,
+    QgsSingleBandGrayRenderer,
+    QgsProviderRegistry,
     QgsContrastEnhancement,
     QgsRuleBasedRenderer,
+    QgsCategorizedSymbolRenderer,
+    QgsRendererCategory,
     QgsSettings,
     QgsSymbolLayer,
     QgsProperty,
     QgsSvgMarkerSymbolLayer
 )
 
-qgis_version_str = Qgis.QGIS_VERSION
-qgis_version = [int(x) for x in qgis_version_str.split('.')[:2]]
 
 class FieldMoveImportDialog(QDialog):
     def __init__(self, plugin_dir, parent=None):
@@ -108,6 +121,40 @@ class FieldMoveImportDialog(QDialog):
         folder_layout.addWidget(self.folder_edit)
         folder_layout.addWidget(folder_btn)
         layout.addLayout(folder_layout)
+
+        # Output options
+        self.batch_cb = QCheckBox("Batch: import every project of the folder into one GeoPackage")
+        self.batch_cb.setToolTip("The folder holds several .fm project folders, whose layers are "
+                                 "merged with a sourceProject field into <folder>.gpkg")
+        self.batch_cb.setChecked(QgsSettings().value("fieldmove_importer/batch_import", False, type=bool))
+        layout.addWidget(self.batch_cb)
+        self.single_gpkg_cb = QCheckBox("Write all layers into a single <project>.gpkg")
+        self.single_gpkg_cb.setToolTip("One GeoPackage holding the layers and the rock units table, "
+                                       "instead of one GeoPackage per CSV file")
+        self.single_gpkg_cb.setChecked(
+            QgsSettings().value("fieldmove_importer/single_geopackage", False, type=bool))
+        layout.addWidget(self.single_gpkg_cb)
+        self.delta_cb = QCheckBox("Only append new observations to previously imported layers")
+        self.delta_cb.setToolTip("Rows whose dataId is already in the GeoPackage are skipped; "
+                                 "edits of existing rows are not imported")
+        self.delta_cb.setChecked(QgsSettings().value("fieldmove_importer/delta_import", False, type=bool))
+        layout.addWidget(self.delta_cb)
+        self.mosaic_cb = QCheckBox("Mosaic the basemaps into a single virtual raster")
+        self.mosaic_cb.setToolTip("Basemaps with the same bands and CRS are loaded as one layer "
+                                  "with shared overviews and contrast stretch")
+        self.mosaic_cb.setChecked(QgsSettings().value("fieldmove_importer/mosaic_basemaps", False, type=bool))
+        layout.addWidget(self.mosaic_cb)
+        self.cog_cb = QCheckBox("Convert the basemaps to Cloud-Optimized GeoTIFFs")
+        self.cog_cb.setToolTip("Tiled, compressed copies with overviews are written next to the "
+                               "basemaps once and loaded instead")
+        self.cog_cb.setChecked(QgsSettings().value("fieldmove_importer/cog_basemaps", False, type=bool))
+        layout.addWidget(self.cog_cb)
+        self.reproject_cb = QCheckBox("Reproject the converted basemaps to the project CRS")
+        self.reproject_cb.setChecked(
+            QgsSettings().value("fieldmove_importer/reproject_basemaps", False, type=bool))
+        self.reproject_cb.setEnabled(self.cog_cb.isChecked())
+        self.cog_cb.toggled.connect(self.reproject_cb.setEnabled)
+        layout.addWidget(self.reproject_cb)
         
         # Button box (using QHBoxLayout)
         btn_box = QHBoxLayout()  # Now properly imported
@@ -136,31 +183,56 @@ class FieldMoveImportDialog(QDialog):
         return {
             'project_dir': self.folder_edit.text()
         }
+
+    def accept(self):
+        """Save the output options before closing"""
+        QgsSettings().setValue("fieldmove_importer/batch_import", self.batch_cb.isChecked())
+        QgsSettings().setValue("fieldmove_importer/single_geopackage", self.single_gpkg_cb.isChecked())
+        QgsSettings().setValue("fieldmove_importer/delta_import", self.delta_cb.isChecked())
+        QgsSettings().setValue("fieldmove_importer/mosaic_basemaps", self.mosaic_cb.isChecked())
+        QgsSettings().setValue("fieldmove_importer/cog_basemaps", self.cog_cb.isChecked())
+        QgsSettings().setValue("fieldmove_importer/reproject_basemaps", self.reproject_cb.isChecked())
+        super().accept()
+
+    def batch_import(self):
+        return self.batch_cb.isChecked()
+
+    def single_geopackage(self):
+        return self.single_gpkg_cb.isChecked()
+
+    def delta_import(self):
+        return self.delta_cb.isChecked()
+
+    def mosaic_basemaps(self):
+        return self.mosaic_cb.isChecked()
+
+    def cog_basemaps(self):
+        return self.cog_cb.isChecked()
+
+    def reproject_basemaps(self):
+        return self.cog_cb.isChecked() and self.reproject_cb.isChecked()
     
 class FieldMoveProjectImporter:
     def __init__(self, iface):
         self.iface = iface
         self.plugin_dir = os.path.dirname(__file__)
         self.svg_dir = os.path.join(self.plugin_dir, 'SVG')
+        self.symbol_atlas = SymbolAtlas(self.svg_dir)  # SVG index and raster marker cache
         self.actions = []
         self.stereonet_tool = None  # Reference to stereonet tool
+        self.import_task = None  # Running background import, if any
+        self.rotation_task = None  # Running symbol rotation update, if any
+        self._rotation_pending = False  # Rotations to check again once it ended
+        self.provider = None  # Processing provider, also loaded by qgis_process
         self.menu = "&FieldMove Project Importer"
-        
-        # List of CSV files that should be treated as point layers
-        self.point_csvs = [
-            "image.csv", 
-            "note.csv", 
-            "localities.csv", 
-            "plane.csv", 
-            "line.csv"
-        ]
-
-        # List of CSV files that should be treated as point layers
-        self.line_csvs = [
-            "polyline.csv"
-        ]
+
+    def initProcessing(self):
+        """Register the Processing provider of the import algorithm"""
+        self.provider = FieldMoveProcessingProvider(self)
+        QgsApplication.processingRegistry().addProvider(self.provider)
 
     def initGui(self):
+        self.initProcessing()
         # Add SVG path to QGIS
         self._add_svg_path_to_qgis()
         """Create the menu entries and toolbar icons inside the QGIS GUI."""
@@ -172,6 +244,7 @@ class FieldMoveProjectImporter:
             self.iface.mainWindow()
         )
         self.action.triggered.connect(self.run)  
+        QgsProject.instance().crsChanged.connect(self._refresh_symbol_rotations)
         self.action.setWhatsThis("Import FieldMove project data (CSV files, images and basemaps)")
 
         # Add toolbar button and menu item
@@ -190,6 +263,21 @@ class FieldMoveProjectImporter:
     def unload(self):
         """Removes the plugin menu item and icon from QGIS GUI."""
 
+        # Stop a running import
+        if self.import_running():
+            self.import_task.cancel()
+        self.import_task = None
+        if self.rotation_task is not None:
+            self.rotation_task.cancel()
+            self.rotation_task = None
+        if self.provider is not None:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
+        try:
+            QgsProject.instance().crsChanged.disconnect(self._refresh_symbol_rotations)
+        except TypeError:
+            pass
+
         # Clean up stereonet tool first
         if self.stereonet_tool:
             self.stereonet_tool.unload()
@@ -208,6 +296,10 @@ class FieldMoveProjectImporter:
 
 
     def run(self):
+        if self.import_running():
+            QMessageBox.information(self.iface.mainWindow(), "FieldMove",
+                                    "An import is already running, wait for it to finish or cancel it")
+            return
         dlg = FieldMoveImportDialog(self.plugin_dir, self.iface.mainWindow())
         if not dlg.exec_():  # User cancelled
             return
@@ -216,41 +308,187 @@ class FieldMoveProjectImporter:
         if not paths['project_dir'] or not os.path.exists(paths['project_dir']):
             QMessageBox.warning(self.iface.mainWindow(), "Error", "Invalid project folder")
             return
+
+        if dlg.batch_import():
+            project_dirs = find_projects(paths['project_dir'])
+            if not project_dirs:
+                QMessageBox.warning(self.iface.mainWindow(), "Error", "No FieldMove project in the folder")
+                return
+            self.batch_import(project_dirs, mosaic=dlg.mosaic_basemaps(), cog=dlg.cog_basemaps(),
+                              reproject=dlg.reproject_basemaps())
+            return
             
-        self.import_project(project_dir=paths['project_dir'])
+        self.import_project(project_dir=paths['project_dir'], single_geopackage=dlg.single_geopackage(),
+                            delta=dlg.delta_import(), mosaic=dlg.mosaic_basemaps(),
+                            cog=dlg.cog_basemaps(), reproject=dlg.reproject_basemaps())
     
-    def import_project(self, project_dir, kmz_path=None):
+    def import_project(self, project_dir, kmz_path=None, single_geopackage=None, delta=None,
+                       mosaic=None, cog=None, reproject=None):
+        """Start the import of a project folder as a cancellable background task
+
+        With single_geopackage, every layer and the rock units table are written
+        into <project>.gpkg instead of one GeoPackage per CSV file. With delta,
+        changed CSV files only append their new rows to the existing layers.
+        With mosaic, basemaps sharing their band layout are loaded as one
+        virtual raster. With cog, the other basemaps are converted once into
+        Cloud-Optimized GeoTIFFs, reprojected to the project CRS with
+        reproject. All default to the options saved by the import dialog.
+        """
         try:
             # Input validation
             if not isinstance(project_dir, str) or not os.path.isdir(project_dir):
                 raise ValueError("Invalid project directory")
-                
+            if single_geopackage is None:
+                single_geopackage = QgsSettings().value("fieldmove_importer/single_geopackage", False, type=bool)
+            if delta is None:
+                delta = QgsSettings().value("fieldmove_importer/delta_import", False, type=bool)
+            if mosaic is None:
+                mosaic = QgsSettings().value("fieldmove_importer/mosaic_basemaps", False, type=bool)
+            if cog is None:
+                cog = QgsSettings().value("fieldmove_importer/cog_basemaps", False, type=bool)
+            if reproject is None:
+                reproject = QgsSettings().value("fieldmove_importer/reproject_basemaps", False, type=bool)
+
+            self._check_no_import()
+            # Keep a reference, the task manager does not own the Python wrapper
+            self.import_task = FieldMoveImportTask(self, project_dir, single_geopackage, delta, mosaic,
+                                                   cog, reproject)
+            self._unload_previous_import(project_dir, output_dir=project_dir)
+            QgsApplication.taskManager().addTask(self.import_task)
+            return self.import_task
+
+        except Exception as e:
+            self._report_import_error(e)
+
+    def batch_import(self, project_dirs, gpkg_path=None, mosaic=None, cog=None, reproject=None):
+        """Start the import of several project folders into one GeoPackage as a background task
+
+        The layers of every project are merged, with a sourceProject field,
+        into gpkg_path (<root>.gpkg in the common root of the projects by
+        default) and registered in a single group. The basemap options
+        default to those saved by the import dialog.
+        """
+        try:
+            project_dirs = list(project_dirs)
+            if not project_dirs or not all(isinstance(d, str) and os.path.isdir(d) for d in project_dirs):
+                raise ValueError("Invalid project directory")
+            if mosaic is None:
+                mosaic = QgsSettings().value("fieldmove_importer/mosaic_basemaps", False, type=bool)
+            if cog is None:
+                cog = QgsSettings().value("fieldmove_importer/cog_basemaps", False, type=bool)
+            if reproject is None:
+                reproject = QgsSettings().value("fieldmove_importer/reproject_basemaps", False, type=bool)
+
+            self._check_no_import()
+            self.import_task = FieldMoveBatchImportTask(self, project_dirs, gpkg_path, mosaic, cog,
+                                                        reproject)
+            self._unload_previous_import(self.import_task.project_dir, gpkg_path=self.import_task.gpkg_path)
+            QgsApplication.taskManager().addTask(self.import_task)
+            return self.import_task
+
+        except Exception as e:
+            self._report_import_error(e)
+
+    def import_running(self):
+        """Whether a background import is running"""
+        return self.import_task is not None and self.import_task.isActive()
+
+    def _check_no_import(self):
+        """Refuse a second import while one is running
+
+        Two imports could write the same GeoPackages at once, and replacing
+        the reference to the running task would let its Python wrapper be
+        garbage-collected.
+        """
+        if self.import_running():
+            raise ValueError("An import is already running, wait for it to finish or cancel it")
+
+    @staticmethod
+    def _group_name(project_dir):
+        """Layer tree group of the layers imported from a project folder"""
+        return f"FieldMoveImport_{os.path.basename(project_dir)}"
+
+    def _unload_previous_import(self, project_dir, output_dir=None, gpkg_path=None):
+        """Remove the layers of a previous import before the task rewrites its files (main thread)
+
+        The group of the previous import goes with its layers, as do the
+        GeoPackage layers loaded from output_dir or gpkg_path elsewhere in the
+        project, so that no open layer keeps the files the task removes or
+        replaces.
+        """
+        project = QgsProject.instance()
+        root = project.layerTreeRoot()
+        existing = root.findGroup(self._group_name(project_dir))
+        layer_ids = existing.findLayerIds() if existing is not None else []
+        output_dir = os.path.normcase(os.path.abspath(output_dir)) + os.sep if output_dir else None
+        gpkg_path = os.path.normcase(os.path.abspath(gpkg_path)) if gpkg_path else None
+        for layer in project.mapLayers().values():
+            path = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source()).get('path')
+            if not path or not path.lower().endswith('.gpkg'):
+                continue
+            path = os.path.normcase(os.path.abspath(path))
+            if path == gpkg_path or (output_dir and path.startswith(output_dir)):
+                layer_ids.append(layer.id())
+        project.removeMapLayers(list(dict.fromkeys(layer_ids)))
+        if existing is not None:
+            root.removeChildNode(existing)
+
+    def _report_import_error(self, error):
+        QgsMessageLog.logMessage(f"Import error: {error}", 'FieldMove', Qgis.Critical)
+        QMessageBox.warning(None, "Error", f"Import failed: {str(error)}")
+
+    def _register_layers(self, project_dir, results, manifest=None, profiler=None):
+        """Add the layers built by the import task to the project (main thread only)
+
+        Styles are cached alongside the manifest, which is saved once the
+        layers are registered. The loading of each layer is added to the
+        profiler of the task, whose summary is logged and written to
+        .fieldmove_cache/import_profile.json.
+        """
+        stages = profiler or NULL_PROFILER
+        try:
             # Create group
-            group_name = f"FieldMoveImport_{os.path.basename(project_dir)}"
+            group_name = self._group_name(project_dir)
             root = QgsProject.instance().layerTreeRoot()
             if existing := root.findGroup(group_name):
                 root.removeChildNode(existing)
             group = root.insertGroup(0, group_name)
             group2 = group.insertGroup(4, 'basemaps')      
 
-            # Process files with type checking
-            for root_dir, _, files in os.walk(project_dir):
-                for file in files:
-                    if not isinstance(file, str):
-                        continue
-                        
-                    file_path = os.path.join(root_dir, file)
-                    file_lower = file.lower()
-                    
-                    if file_lower.endswith('.csv'):
-                        if file_lower in [f.lower() for f in self.point_csvs]:
-                            self._process_point_csv(file_path, group)
-                        elif file_lower in [f.lower() for f in self.line_csvs]:
-                            self._process_line_csv(file_path, group)
-                        else:
-                            continue #self._process_csv(file_path, group)
-                    elif file_lower.endswith(('.tif', '.tiff')):
-                        self._process_geotiff(file_path, group2)
+            # Thumbnails of the photos for the image layer map tips
+            thumbnail_dir = None
+            for kind, file_path, result, error in results:
+                if kind == THUMBNAIL_JOB:
+                    if error is not None:
+                        QgsMessageLog.logMessage(f"Could not create the photo thumbnails: {str(error)}",
+                                                 'FieldMove', Qgis.Warning)
+                    thumbnail_dir = result
+
+            for kind, file_path, result, error in results:
+                if kind == THUMBNAIL_JOB:
+                    continue
+                source = os.path.splitext(os.path.basename(file_path))[0]
+                if kind == POINT_JOB:
+                    if error is not None:
+                        QMessageBox.warning(None, "Error", f"Error processing point CSV: {str(error)}")
+                    else:
+                        with stages.stage(source, 'load'):
+                            self._add_point_layer(file_path, group, result, manifest, thumbnail_dir)
+                elif kind == LINE_JOB:
+                    if error is not None:
+                        QMessageBox.warning(None, "Error", f"Error processing line CSV: {str(error)}")
+                    else:
+                        with stages.stage(source, 'load'):
+                            self._add_line_layer(file_path, group, result, manifest)
+                else:
+                    if error is not None:
+                        QgsMessageLog.logMessage(
+                            f"Could not compute statistics of {file_path}: {str(error)}",
+                            'FieldMovePlugin',
+                            Qgis.Warning
+                        )
+                    with stages.stage(source, 'load'):
+                        self._process_geotiff(file_path, group2, result)
 
             #now reorder layers
             for ch in group.children():
@@ -259,225 +497,221 @@ class FieldMoveProjectImporter:
                     group.insertChildNode(-1, _ch)
                     group.removeChildNode(ch)
 
+            if manifest is not None:
+                manifest.save()
+
+            if profiler is not None:
+                self._report_profile(project_dir, profiler)
+
         except Exception as e:
-            QgsMessageLog.logMessage(f"Import error: {e}", 'FieldMove', Qgis.Critical)
-            QMessageBox.warning(None, "Error", f"Import failed: {str(e)}")
-    
-    def _process_point_csv(self, csv_path, group):
-        """Process CSV files that should be point layers with X/Y/Z coordinates"""
+            self._report_import_error(e)
+
+    @staticmethod
+    def _report_profile(project_dir, profiler):
+        """Log the per-stage timings of an import and write them as JSON next to the manifest"""
+        profiler.finish()
+        for line in profiler.summary():
+            QgsMessageLog.logMessage(line, 'FieldMove', Qgis.Info)
+        report_path = os.path.join(project_dir, CACHE_DIR, 'import_profile.json')
+        try:
+            profiler.write(report_path)
+        except OSError as e:
+            QgsMessageLog.logMessage(f"Could not write the import profile {report_path}: {e}",
+                                     'FieldMove', Qgis.Warning)
+
+    @staticmethod
+    def _gpkg_path(csv_path):
+        """GeoPackage written next to a CSV file"""
+        layer_name = os.path.splitext(os.path.basename(csv_path))[0]
+        return os.path.join(os.path.dirname(csv_path), f"{layer_name}.gpkg")
+
+    @staticmethod
+    def _project_gpkg_path(project_dir):
+        """Single GeoPackage holding all the layers of a project"""
+        project_name = os.path.basename(os.path.normpath(project_dir))
+        return os.path.join(project_dir, f"{project_name}.gpkg")
+
+    def _open_geopackage(self, csv_path, writer=None, overwrite=True):
+        """Writer of the GeoPackage next to the CSV, or the shared writer left open"""
+        if writer is not None:
+            return nullcontext(writer)
+        return GeoPackageWriter(self._gpkg_path(csv_path), overwrite=overwrite)
+
+    def _build_point_layer(self, csv_path, table=None, feedback=None, writer=None, delta=False,
+                           rock_units=None, map_crs=None, transform_context=None, profiler=None):
+        """Convert a point CSV with X/Y/Z coordinates into a GeoPackage (worker thread)
+
+        Writes a GeoPackage of its own next to the CSV, or into the shared
+        project GeoPackage writer when one is given, and returns its path
+        (see write_point_layer). No dialog or project access happens here,
+        errors are raised and reported on the main thread. The symbol
+        rotation of plane and line layers is computed for map_crs, the
+        project CRS captured on the main thread.
+        """
+        transform = self._rotation_transform(map_crs, transform_context)
+        with self._open_geopackage(csv_path, writer, overwrite=not delta) as writer:
+            return write_point_layer(
+                writer, csv_path, table, feedback, delta, rock_units,
+                rotation=lambda base, x, y: self._symbol_rotation(base, transform, x, y),
+                rotation_crs=map_crs.authid() if transform is not None else None,
+                profiler=profiler, log=self._log_warning)
+
+    @staticmethod
+    def _log_warning(message):
+        QgsMessageLog.logMessage(message, 'FieldMove', Qgis.Warning)
+
+    @staticmethod
+    def _rotation_transform(map_crs, transform_context=None):
+        """Transform from the WGS 84 layers to the map CRS, None if there is no map CRS"""
+        if map_crs is None or not map_crs.isValid():
+            return None
+        return QgsCoordinateTransform(QgsCoordinateReferenceSystem('EPSG:4326'), map_crs,
+                                      transform_context or QgsCoordinateTransformContext())
+
+    @staticmethod
+    def _symbol_rotation(base, transform, x, y):
+        """Rotation of the markers: base angle plus the grid convergence of the map CRS
+
+        The convergence is the azimuth, in the map CRS, of a small step north
+        from each point (what the renderer expression used to evaluate for
+        every feature at every redraw). The points and their steps are
+        transformed in one batch, point by point only if the batch fails, so
+        that the points that cannot be transformed keep the base angle.
+        """
+        base = np.nan_to_num(np.asarray(base, dtype=np.float64))
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        convergence = np.zeros(len(x))
+        valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+        if transform is None or transform.isShortCircuited() or not len(valid):
+            return base + convergence
+        # Each point followed by its step north, as the vertices of one line
+        xs = np.repeat(x[valid], 2)
+        ys = np.repeat(y[valid], 2)
+        ys[1::2] += 0.0001
+        line = QgsLineString(xs.tolist(), ys.tolist())
+        try:
+            line.transform(transform)
+            xs, ys = np.array(line.xVector()), np.array(line.yVector())
+        except QgsCsException:
+            for i, (px, py) in enumerate(zip(xs.tolist(), ys.tolist())):
+                try:
+                    point = transform.transform(px, py)
+                    xs[i], ys[i] = point.x(), point.y()
+                except QgsCsException:
+                    xs[i] = ys[i] = np.nan
+        angles = np.degrees(np.arctan2(xs[1::2] - xs[0::2], ys[1::2] - ys[0::2])) % 360
+        convergence[valid] = np.where(np.isfinite(angles), angles, 0.)
+        return base + convergence
+
+    def _setup_symbol_rotation(self, layer, layer_name):
+        """Flag a layer whose markers read the stored rotation, refreshing it if stale"""
+        base_field = ROTATION_BASE_FIELDS.get(layer_name.lower())
+        if base_field is None or layer.fields().indexOf(ROTATION_FIELD) < 0:
+            return
+        uri = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source())
+        stats = read_layer_stats(uri.get('path', ''), uri.get('layerName') or layer.name())
+        layer.setCustomProperty('fieldmove/rotation_base', base_field)
+        layer.setCustomProperty('fieldmove/rotation_crs',
+                                stats.properties.get('rotation_crs') if stats is not None else None)
+        layer.editingStopped.connect(lambda: self._refresh_symbol_rotations([layer]))
+        self._refresh_symbol_rotations([layer])
+
+    def _refresh_symbol_rotations(self, layers=None):
+        """Recompute in the background the stored rotation of the layers whose CRS is stale
+
+        Defaults to all the imported layers with a rotation, when the project
+        CRS changed. One SymbolRotationTask runs at a time: a task for a
+        previous CRS is canceled, and the layers are checked again once it
+        ended.
+        """
+        project = QgsProject.instance()
+        map_crs = project.crs()
+        if self.rotation_task is not None:
+            if self.rotation_task.rotation_crs != map_crs.authid():
+                self.rotation_task.cancel()
+            self._rotation_pending = True
+            return
+        if layers is None:
+            layers = [layer for layer in project.mapLayers().values()
+                      if layer.customProperty('fieldmove/rotation_base')]
+        jobs = []
+        for layer in layers:
+            # A layer being edited is updated once its editing stopped
+            if layer.customProperty('fieldmove/rotation_crs') == map_crs.authid() or layer.isEditable():
+                continue
+            uri = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source())
+            if not uri.get('path'):
+                continue
+            transform = QgsCoordinateTransform(layer.crs(), map_crs, project.transformContext()) \
+                if map_crs.isValid() else None
+            jobs.append((layer.id(), uri['path'], uri.get('layerName') or layer.name(), transform))
+        if jobs:
+            self.rotation_task = SymbolRotationTask(self, jobs, map_crs)
+            QgsApplication.taskManager().addTask(self.rotation_task)
+
+    def _symbol_rotations_updated(self, task):
+        """Reload the layers updated by a SymbolRotationTask, then check the pending ones (main thread)"""
+        if task.exception is not None:
+            QgsMessageLog.logMessage(f"Could not update the symbol rotations: {task.exception}",
+                                     'FieldMove', Qgis.Warning)
+        if task.locked:
+            QgsMessageLog.logMessage(f"Symbol rotations not updated, GeoPackage locked: "
+                                     f"{', '.join(task.locked)}", 'FieldMove', Qgis.Warning)
+        for layer_id, changed in task.updated.items():
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if layer is None:
+                continue
+            layer.setCustomProperty('fieldmove/rotation_crs', task.rotation_crs)
+            if changed:
+                layer.reload()
+                layer.triggerRepaint()
+        self.rotation_task = None
+        if self._rotation_pending:
+            self._rotation_pending = False
+            self._refresh_symbol_rotations()
+
+    def _add_point_layer(self, csv_path, group, gpkg_path, manifest=None, thumbnail_dir=None):
+        """Load, style and register the GeoPackage built from a point CSV (main thread)"""
         try:
             layer_name = os.path.splitext(os.path.basename(csv_path))[0]
             
-            # Read CSV file to check for coordinate columns
-            with open(csv_path, 'r') as f:
-                # Read CSV with stripped whitespace from headers
-                reader = csv.DictReader(f, skipinitialspace=True)
-                fieldnames = [name.strip() for name in reader.fieldnames]  # Clean column names
-                # Check for required columns (case insensitive)
-                x_col = next((col for col in fieldnames if col.lower() in ['longitude', ' longitude', 'lon']), None)
-                y_col = next((col for col in fieldnames if col.lower() in ['latitude', ' latitude', 'lat']), None)
-                z_col = next((col for col in fieldnames if col.lower() in ['altitude', ' altitude', 'elevation']), None)
-                
-                if not x_col or not y_col:
-                    QMessageBox.warning(None, "Error", f"CSV file {csv_path} is missing required coordinate columns (longitude/x and latitude/y)")
-                    return
-                
-                # Create a point layer with Z dimension if altitude is available
-                vlayer = QgsVectorLayer(f"Point?crs=EPSG:4326", layer_name, "memory")
-                provider = vlayer.dataProvider()
-                
-                # Add fields (excluding coordinate columns)
-                fields = QgsFields()
-                for field in fieldnames:
-                    if field.lower() not in [x_col.lower(), y_col.lower(), z_col.lower() if z_col else '']:
-                        if field.lower() in ['altitude', 'horiz_precision', 'vert_precision', 'dip', 'dipazimuth', 
-                                              'strike', 'declination', 'plunge', 'plungeazimuth','heading','x','y']:
-                            if qgis_version[1] >= 40 :
-                                fields.append(QgsField(field, QMetaType.Type.Double))
-                            else: 
-                                fields.append(QgsField(field, QVariant.Double))
-                        elif field.lower() in ['timedate']:
-                            if qgis_version[1] >= 40 :
-                                fields.append(QgsField(field, QMetaType.Type.QDateTime))
-                            else: 
-                                fields.append(QgsField(field, QVariant.DateTime))
-                            
-                        else:
-                            if qgis_version[1] >= 40 :
-                                fields.append(QgsField(field, QMetaType.Type.QString))
-                            else: 
-                                fields.append(QgsField(field, QVariant.String))
-                            
-                provider.addAttributes(fields)
-                vlayer.updateFields()
-                
-                # Add features
-                features = []
-                f.seek(0)  # Rewind file
-                next(reader)  # Skip header again
-                
-                for row in reader:
-                    try:
-                        x = float(row[x_col])
-                        y = float(row[y_col])
-                        z = float(row[z_col]) if z_col and row.get(z_col) else None
-                        
-                        if z is not None:
-                            point = QgsPoint(x, y, z)
-                            geom = QgsGeometry(point)
-                        else:
-                            point = QgsPointXY(x, y)
-                            geom = QgsGeometry.fromPointXY(point)
-                        
-                        feat = QgsFeature()
-                        feat.setGeometry(geom)
-                        
-                        # Set attributes (excluding coordinate columns)
-                        attributes = []
-                        for field in fieldnames:
-                            if field.lower() not in [x_col.lower(), y_col.lower(), z_col.lower() if z_col else '']:
-                                if field.lower() in ['timedate']:
-                                    qdt = self._parse_datetime(row[field])
-                                    attributes.append(qdt.toString(Qt.ISODate))
-                                else:
-                                    attributes.append(row[field])
-                        feat.setAttributes(attributes)
-                        features.append(feat)
-                    except (ValueError, KeyError) as e:
-                        continue
-                
-                provider.addFeatures(features)
-                vlayer.updateExtents()
-                
-                # Save to GeoPackage
-                gpkg_path = os.path.join(os.path.dirname(csv_path), f"{layer_name}.gpkg")
-                options = QgsVectorFileWriter.SaveVectorOptions()
-                options.driverName = "GPKG"
-                options.layerName = layer_name
-                error = QgsVectorFileWriter.writeAsVectorFormatV3(
-                    vlayer,
-                    gpkg_path,
-                    QgsProject.instance().transformContext(),
-                    options
-                )
-                
-                if error[0] != QgsVectorFileWriter.NoError:
-                    QMessageBox.warning(None, "Error", f"Could not save GeoPackage: {gpkg_path}")
-                    return
-                
-                # Load the GeoPackage
-                gpkg_layer = QgsVectorLayer(f"{gpkg_path}|layername={layer_name}", layer_name, "ogr")
-                if gpkg_layer.isValid():
-                    # For line and plane layers, try to join with rock-units.csv
-                    if layer_name.lower() in ['line', 'plane']:
-                        self._join_rock_units(gpkg_layer, os.path.dirname(csv_path))
-                    
-                    self._style_layer(gpkg_layer, layer_name)
-                    QgsProject.instance().addMapLayer(gpkg_layer, False)
-
-                # After creating gpkg_layer:
-                if gpkg_layer.isValid():
-                    self._style_layer(gpkg_layer, layer_name)
-                    QgsProject.instance().addMapLayer(gpkg_layer, False)
-                    group.addLayer(gpkg_layer)
-                    # Configure map tips
-                    if layer_name == 'image':
-                        self._configure_image_map_tips(gpkg_layer,csv_path)
-                    else:
-                        self._configure_map_tips(gpkg_layer)
+            # Load the GeoPackage
+            gpkg_layer = QgsVectorLayer(f"{gpkg_path}|layername={layer_name}", layer_name, "ogr")
+            if gpkg_layer.isValid():
+                self._apply_style(gpkg_layer, csv_path, manifest, self._style_layer)
+                self._ensure_spatial_index(gpkg_layer)
+                QgsProject.instance().addMapLayer(gpkg_layer, False)
+                group.addLayer(gpkg_layer)
+                self._setup_symbol_rotation(gpkg_layer, layer_name)
+                # Configure map tips
+                if layer_name == 'image':
+                    self._configure_image_map_tips(gpkg_layer, csv_path, thumbnail_dir)
+                else:
+                    self._configure_map_tips(gpkg_layer)
             
         except Exception as e:
             QMessageBox.warning(None, "Error", f"Error processing point CSV: {str(e)}")
 
-    def _process_line_csv(self, csv_path, group):
+    def _build_line_layer(self, csv_path, table=None, attributes_table=None, feedback=None,
+                          writer=None, delta=False, rock_units=None, profiler=None):
+        """Convert polyline.csv and its attributes into a GeoPackage (worker thread)
+
+        Written next to the CSV or into the shared writer, see write_line_layer.
+        """
+        with self._open_geopackage(csv_path, writer, overwrite=not delta) as writer:
+            return write_line_layer(writer, csv_path, table, attributes_table, feedback, delta,
+                                    rock_units, profiler, log=self._log_warning)
+
+    def _add_line_layer(self, csv_path, group, gpkg_path, manifest=None):
+        """Load, style and register the GeoPackage built from polyline.csv (main thread)"""
         try:
             layer_name = os.path.splitext(os.path.basename(csv_path))[0]
-            # Load coordinate data
-            coord_data = {}
-            with open(csv_path, 'r') as f:
-                reader = csv.DictReader(f, skipinitialspace=True)
-                for row in reader:
-                    data_id = row['dataId']
-                    if data_id not in coord_data:
-                        coord_data[data_id] = []
-                    # Use longitude,latitude (geographic)
-                    coord_data[data_id].append(QgsPoint(float(row['longitude']), float(row['latitude'])))
-
-            # Load attribute data
-            attributes = {}
-            with open(csv_path[:-4]+'-attributes.csv', 'r') as f:
-                reader = csv.DictReader(f, skipinitialspace=True)
-                for row in reader:
-                    attributes[row['dataId']] = row
-
-            # Create memory layer
-            layer = QgsVectorLayer("LineString?crs=EPSG:4326", "polylines", "memory")  
-            provider = layer.dataProvider()
-
-            # Add fields from attribute file
-            fields = QgsFields()
-            fields.append(QgsField("dataId", QVariant.String))
-            fields.append(QgsField("localityId", QVariant.String))
-            fields.append(QgsField("localityName", QVariant.String))
-            fields.append(QgsField("rockUnit", QVariant.String))
-            fields.append(QgsField("thickness", QVariant.Double))
-            fields.append(QgsField("opacity", QVariant.Double))
-            fields.append(QgsField("style", QVariant.String))
-            fields.append(QgsField("filled", QVariant.Int))
-            fields.append(QgsField("timedate", QVariant.DateTime))
-            fields.append(QgsField("notes", QVariant.String))
-            provider.addAttributes(fields)
-            layer.updateFields()
-
-            # Create features
-            for data_id, points in coord_data.items():
-                if len(points) < 2:
-                    continue  # Need at least 2 points for a line
-                    
-                feat = QgsFeature()
-                line = QgsLineString(points)
-                feat.setGeometry(QgsGeometry(line))
-                
-                # Set attributes
-                attr_data = attributes.get(data_id, {})
-                feat.setAttributes([
-                    data_id,
-                    attr_data.get('localityId', ''),
-                    attr_data.get('localityName', ''),
-                    attr_data.get('rockUnit', ''),
-                    float(attr_data.get('thickness', 0)),
-                    float(attr_data.get('opacity', 1)),
-                    attr_data.get('style', 'solid'),
-                    int(attr_data.get('filled', 1)),
-                    self._parse_datetime(attr_data.get('timedate', '')).toString(Qt.ISODate),
-                    attr_data.get('notes', '')
-                ])
-                
-                provider.addFeature(feat)
-
-            layer.updateExtents()
-            gpkg_path = os.path.join(os.path.dirname(csv_path), f"{layer_name}.gpkg")
-
-            # Optionally save to GeoPackage
-            error = QgsVectorFileWriter.writeAsVectorFormat(
-                layer,
-                gpkg_path,
-                'UTF-8',
-                layer.crs(),
-                'GPKG'
-            )
 
             # Load the GeoPackage
             gpkg_layer = QgsVectorLayer(f"{gpkg_path}|layername={layer_name}", layer_name, "ogr")
             if gpkg_layer.isValid():
-                # For polyline try to join with rock-units.csv
-                self._join_rock_units(gpkg_layer, os.path.dirname(csv_path))
-                self._style_layer(gpkg_layer, layer_name)
-                QgsProject.instance().addMapLayer(gpkg_layer, False)
-
-            # After creating gpkg_layer:
-            if gpkg_layer.isValid():
-                self._style_line_layer(gpkg_layer, layer_name)
+                self._apply_style(gpkg_layer, csv_path, manifest, self._style_line_layer)
+                self._ensure_spatial_index(gpkg_layer)
                 QgsProject.instance().addMapLayer(gpkg_layer, False)
                 group.addLayer(gpkg_layer)
             
@@ -486,151 +720,73 @@ class FieldMoveProjectImporter:
         except Exception as e:
             QMessageBox.warning(None, "Error", f"Error processing line CSV: {str(e)}")
 
-    def _parse_datetime(self,date_str: str) -> QDateTime:
-        date_str = date_str.strip()
-        locale = QLocale(QLocale.English)
-        
-        # Try parsing with weekday (e.g., "Sat Oct 19 15:00:33 2024")
-        format_with_weekday = "ddd MMM dd HH:mm:ss yyyy"
-        qdt = locale.toDateTime(date_str, format_with_weekday)
-        
-        if not qdt.isValid():
-            # Try without weekday (e.g., "Oct 19 15:00:33 2024")
-            format_no_weekday = "MMM dd HH:mm:ss yyyy"
-            date_str_no_weekday = " ".join(date_str.split()[1:])  # Remove weekday
-            qdt = locale.toDateTime(date_str_no_weekday, format_no_weekday)
-        
-        if not qdt.isValid():
-            # Fallback to Python's datetime
-            try:
-                py_dt = datetime.strptime(date_str, "%a %b %d %H:%M:%S %Y")
-                qdt = QDateTime(py_dt.year, py_dt.month, py_dt.day, py_dt.hour, py_dt.minute, py_dt.second)
-            except ValueError:
-                qdt = QDateTime()  # Invalid
-        
-        return qdt
-
-    def _join_rock_units(self, layer, project_dir):
-        """Join rock units information from rock-units.csv to the layer and transfer color to new field"""
-        try:
-            rock_units_path = os.path.join(project_dir, "rock-units.csv")
-            clino = False
-            if not os.path.exists(rock_units_path):
-                #check if the data comes from FieldMove Clino, then the color codes are in stratcolumn.csv
-                rock_units_path = os.path.join(project_dir, "stratcolumn.csv")
-                clino = True
-                if not os.path.exists(rock_units_path):
-                    return False
-
-            # Read rock-units.csv to create a mapping dictionary
-            rock_unit_colors = {}
-            with open(rock_units_path, 'r') as f:
-                if clino is False:
-                    # Read CSV with stripped whitespace from headers
-                    reader = csv.DictReader(f, skipinitialspace=True)
-                    for row in reader:
-                        if 'name' in row and 'color' in row:
-                            rock_unit_colors[row['name'].strip().lower()] = row['color'].strip()
-                else:
-                    # Read CSV with stripped whitespace from headers
-                    reader = csv.DictReader(f, skipinitialspace=True, fieldnames=['name','color','rock_type','age', 'thickness', 'horizonid'])
-                    for _ in range(6):  # skip the first 6 rows
-                        next(reader)
-                    for row in reader:
-                        rock_unit_colors[row['name'].strip().lower()] = row['color'].strip()
-
-            if not rock_unit_colors:
-                return False
-
-            # Find the rockunit field in our layer (case insensitive)
-            rockunit_field = None
-            for field in layer.fields():
-                if field.name().lower() in ['rockunit', ' rockunit', 'unitid']:
-                    rockunit_field = field.name()
-                    break
-
-            if not rockunit_field:
-                return False
-
-            # Start editing the layer to add color field
-            layer.startEditing()
-            
-            # Add color field if it doesn't exist
-            if layer.fields().indexFromName('color') == -1:
-                if qgis_version[1] >= 40 :
-                    layer.addAttribute(QgsField('color', QMetaType.Type.QString))
-                else: 
-                    layer.addAttribute(QgsField('color', QVariant.String))
-                
-            
-            # Update features with color values
-            for feature in layer.getFeatures():
-                rockunit_value = feature[rockunit_field]
-                if rockunit_value:
-                    rockunit_key = str(rockunit_value).strip().lower()
-                    color = rock_unit_colors.get(rockunit_key, '')
-                    if color:
-                        layer.changeAttributeValue(feature.id(), 
-                                            layer.fields().indexFromName('color'), 
-                                            color)
-            
-            layer.commitChanges()
-            return True
+    @staticmethod
+    def _ensure_spatial_index(layer):
+        """Build the spatial index of a layer kept in the project when its provider has none
 
-        except Exception as e:
-            QMessageBox.warning(None, "Warning", f"Could not join rock units: {str(e)}")
-            if layer.isEditable():
-                layer.rollBack()
-            return False
-
-    def _process_csv(self, csv_path, group):
-        """Convert regular CSV to GeoPackage (non-spatial)"""
-        try:
-            layer_name = os.path.splitext(os.path.basename(csv_path))[0]
-            
-            # Create a temporary memory layer to read CSV
-            uri = f'file://{csv_path}?delimiter=,'
-            csv_layer = QgsVectorLayer(uri, layer_name, 'delimitedtext')
-            
-            if not csv_layer.isValid():
-                QMessageBox.warning(None, "Error", f"Could not load CSV file: {csv_path}")
-                return
-                
-            # Save to GeoPackage
-            gpkg_path = os.path.join(os.path.dirname(csv_path), f"{layer_name}.gpkg")
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = "GPKG"
-            options.layerName = layer_name
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(
-                csv_layer,
-                gpkg_path,
-                QgsProject.instance().transformContext(),
-                options
-            )
-            
-            if error[0] != QgsVectorFileWriter.NoError:
-                QMessageBox.warning(None, "Error", f"Could not save GeoPackage: {gpkg_path}")
+        Layers written by GeoPackageWriter already have one; this covers
+        memory layers and GeoPackages written by older versions or by GDAL.
+        """
+        if layer.hasSpatialIndex() != QgsFeatureSource.SpatialIndexNotPresent:
+            return
+        if layer.dataProvider().capabilities() & QgsVectorDataProvider.CreateSpatialIndex:
+            layer.dataProvider().createSpatialIndex()
+
+    def _apply_style(self, layer, csv_path, manifest, style_layer):
+        """Load the cached style of a reused layer, or style it and cache the style
+
+        style_layer is the styling method (_style_layer or _style_line_layer)
+        used when the manifest has no valid cached style for the layer.
+        """
+        key = manifest.key(csv_path) if manifest is not None else None
+        style_path = manifest.style(key) if manifest is not None else None
+        if style_path is not None:
+            message, loaded = layer.loadNamedStyle(style_path)
+            if loaded:
                 return
-                
-            # Load the GeoPackage and style it
-            gpkg_layer = QgsVectorLayer(f"{gpkg_path}|layername={layer_name}", layer_name, "ogr")
-            if gpkg_layer.isValid():
-                self._style_layer(gpkg_layer, layer_name)
-                QgsProject.instance().addMapLayer(gpkg_layer, False)
-
-            # After creating gpkg_layer:
-            if gpkg_layer.isValid():
-                self._style_layer(gpkg_layer, layer_name)
-                QgsProject.instance().addMapLayer(gpkg_layer, False)
-                group.addLayer(gpkg_layer)
-            
-                # Configure map tips
-                self._configure_map_tips(gpkg_layer)
-                
+            QgsMessageLog.logMessage(f"Could not load cached style {style_path}: {message}",
+                                     'FieldMove', Qgis.Warning)
+
+        style_layer(layer, layer.name())
+        if manifest is not None:
+            style_path = manifest.style_path(layer.name())
+            os.makedirs(os.path.dirname(style_path), exist_ok=True)
+            message, saved = layer.saveNamedStyle(style_path)
+            if saved:
+                manifest.set_style(key, style_path)
+
+    def _prepare_basemap(self, geotif_path, feedback=None):
+        """Build the missing overviews and statistics of a GeoTIFF, return its band ranges (worker thread)
+
+        Falls back to sampling the band statistics through QGIS when GDAL
+        cannot write next to the raster (e.g. a read-only project folder).
+        """
+        try:
+            return prepare_basemap(geotif_path, feedback)
+        except ImportCanceled:
+            raise
         except Exception as e:
-            QMessageBox.warning(None, "Error", f"Error processing CSV: {str(e)}")
-
-    def _process_geotiff(self, geotif_path, group):
+            QgsMessageLog.logMessage(f"Could not build the overviews of {geotif_path}: {e}",
+                                     'FieldMovePlugin', Qgis.Warning)
+            return self._compute_band_ranges(geotif_path)
+
+    def _compute_band_ranges(self, geotif_path):
+        """Compute the min/max of every band of a GeoTIFF (worker thread)
+
+        Uses a provider private to the worker so the statistics needed by the
+        contrast stretch are gathered concurrently with the other files.
+        """
+        provider = QgsProviderRegistry.instance().createProvider('gdal', geotif_path)
+        if provider is None or not provider.isValid():
+            return None
+        ranges = []
+        for band in range(1, provider.bandCount() + 1):
+            stats = provider.bandStatistics(band, QgsRasterBandStats.Min | QgsRasterBandStats.Max,
+                                            provider.extent(), 250000)
+            ranges.append((stats.minimumValue, stats.maximumValue))
+        return ranges
+
+    def _process_geotiff(self, geotif_path, group, band_ranges=None):
         """Load and style a GeoTIFF file"""
         try:
             # Create layer name from filename
@@ -644,8 +800,9 @@ class FieldMoveProjectImporter:
                 QgsProject.instance().addMapLayer(raster_layer, False)
                 group.addLayer(raster_layer)
                 
-                # Apply basic styling
-                raster_layer.setContrastEnhancement(QgsContrastEnhancement.StretchToMinimumMaximum)
+                # Apply basic styling, reusing the band statistics computed in the worker
+                if not self._apply_band_ranges(raster_layer, band_ranges):
+                    raster_layer.setContrastEnhancement(QgsContrastEnhancement.StretchToMinimumMaximum)
                 raster_layer.triggerRepaint()
                 
                 return raster_layer
@@ -665,6 +822,32 @@ class FieldMoveProjectImporter:
             )
             return None
 
+    def _apply_band_ranges(self, raster_layer, band_ranges):
+        """Stretch the layer renderer to precomputed band min/max, returns False if not applicable"""
+        if not band_ranges:
+            return False
+        renderer = raster_layer.renderer()
+        provider = raster_layer.dataProvider()
+
+        def _enhancement(band):
+            if band < 1 or band > len(band_ranges):
+                return None
+            enhancement = QgsContrastEnhancement(provider.dataType(band))
+            enhancement.setContrastEnhancementAlgorithm(QgsContrastEnhancement.StretchToMinimumMaximum)
+            enhancement.setMinimumValue(band_ranges[band - 1][0])
+            enhancement.setMaximumValue(band_ranges[band - 1][1])
+            return enhancement
+
+        if isinstance(renderer, QgsMultiBandColorRenderer):
+            renderer.setRedContrastEnhancement(_enhancement(renderer.redBand()))
+            renderer.setGreenContrastEnhancement(_enhancement(renderer.greenBand()))
+            renderer.setBlueContrastEnhancement(_enhancement(renderer.blueBand()))
+            return True
+        if isinstance(renderer, QgsSingleBandGrayRenderer):
+            renderer.setContrastEnhancement(_enhancement(renderer.grayBand()))
+            return True
+        return False
+
     def _style_layer(self, layer, layer_name):
         """Apply rule-based styling with SVG symbols, colored strokes, rotation, and custom labels"""
         try:
@@ -683,80 +866,78 @@ class FieldMoveProjectImporter:
                                 if f.name().strip().lower() == 'dip'), None)
 
                 if all([color_field, rockunit_field, planetype_field, strike_field]):
-                    # Get SVG symbol path
-                    svg_dir = os.path.join(self.plugin_dir, 'SVG', 'RHRule_strike')
-                    # SVG symbol mapping - customize these paths
+                    # SVG symbol mapping, looked up in the symbol atlas index - customize these prefixes
                     svg_mapping = {
-                        'bedding': next((f for f in os.listdir(svg_dir) if f.startswith('201') and f.endswith('.svg')), None),
-                        'fault': next((f for f in os.listdir(svg_dir) if f.startswith('261') and f.endswith('.svg')), None),
-                        'joint': next((f for f in os.listdir(svg_dir) if f.startswith('263') and f.endswith('.svg')), None),
-                        'cleavage': next((f for f in os.listdir(svg_dir) if f.startswith('207') and f.endswith('.svg')), None)
+                        'bedding': self.symbol_atlas.svg_path('201', 'RHRule_strike'),
+                        'fault': self.symbol_atlas.svg_path('261', 'RHRule_strike'),
+                        'joint': self.symbol_atlas.svg_path('263', 'RHRule_strike'),
+                        'cleavage': self.symbol_atlas.svg_path('207', 'RHRule_strike')
                         # Add more as needed
                     }
                     
-                    # Create rule-based renderer
-                    renderer = QgsRuleBasedRenderer(QgsMarkerSymbol())
-                    root_rule = renderer.rootRule()
+                    # Categorized renderer on the key written at ingest, rule-based
+                    # renderer only for layers built without it
+                    categorized = self._has_symbol_category(layer)
+                    if not categorized:
+                        renderer = QgsRuleBasedRenderer(QgsMarkerSymbol())
+                        root_rule = renderer.rootRule()
                     
                     # Get unique combinations of rockunit and planetype
                     unique_combos = {}
-                    for feature in layer.getFeatures():
-                        rockunit = str(feature[rockunit_field])
-                        planetype = str(feature[planetype_field]).strip()
-                        color = str(feature[color_field]).strip()
-                        strike = float(feature[strike_field]) if feature[strike_field] else 0
-                        dip = float(feature[dip_field])
+                    for rockunit, planetype, color in self._layer_categories(
+                            layer, [rockunit_field, planetype_field, color_field]):
+                        rockunit = str(rockunit)
+                        planetype = str(planetype).strip()
+                        color = str(color).strip()
                         
                         if all([rockunit, planetype, color]):
-                            unique_combos[(rockunit, planetype)] = (color, strike)
+                            unique_combos[(rockunit, planetype)] = color
 
                     #order dictionnary so legend items appear aplhabetically
                     unique_combos = dict(sorted(unique_combos.items()))
 
-                    # Create one rule per combination
-                    for (rockunit, planetype), (color, strike) in unique_combos.items():
+                    # Create one category (or rule) per combination
+                    categories = {}
+                    for (rockunit, planetype), color in unique_combos.items():
                         # Get appropriate SVG
-                        svg_file = svg_mapping.get(planetype.lower(), next((f for f in os.listdir(svg_dir) if f.startswith('201') and f.endswith('.svg')), None))
+                        svg_path = svg_mapping.get(planetype.lower(), svg_mapping['bedding'])
                         '''if dip <= 5. :
-                            svg_file = next((f for f in os.listdir(svg_dir) if f.startswith('204') and f.endswith('.svg')), None)
+                            svg_path = self.symbol_atlas.svg_path('204', 'RHRule_strike')
                         elif dip >= 85 :
-                            svg_file = next((f for f in os.listdir(svg_dir) if f.startswith('203') and f.endswith('.svg')), None)'''
-                        svg_path = os.path.join(self.plugin_dir, 'SVG', 'RHRule_strike', svg_file)
-
-                        # Create rule
-                        rule = root_rule.children()[0].clone()
-                        rule.setLabel(f"{rockunit} - {planetype}")
-                        rule.setFilterExpression(
-                            f'"{rockunit_field}" = \'{rockunit}\' AND '
-                            f'"{planetype_field}" = \'{planetype}\''
-                        )
+                            svg_path = self.symbol_atlas.svg_path('203', 'RHRule_strike')'''
 
-                        # Configure symbol
+                        # Configure symbol: the SVG pre-rendered with the rockunit's color
                         symbol = QgsMarkerSymbol()
-                        svg_layer = QgsSvgMarkerSymbolLayer(svg_path)
-                        svg_layer.setSize(10)
-                        
-                        # Set color from rockunit's color
-                        svg_layer.setStrokeColor(QColor(color))
-                        svg_layer.setStrokeWidth(0.5)
-                        svg_layer.setFillColor(QColor(color))
+                        svg_layer = self.symbol_atlas.marker_layer(svg_path, color, 10, 0.5)
                         
                         # Set rotation from strike
                         svg_layer.setAngle(325) #in the legend
                         svg_layer.setDataDefinedProperty(
                             QgsSymbolLayer.PropertyAngle,
-                            #QgsProperty.fromExpression(f'"{strike_field}"')
-                            QgsProperty.fromExpression(f'COALESCE("{strike_field}"'f",0)+\
-                                                       (degrees(azimuth(transform($geometry,layer_property(@layer_id,'crs'),@map_crs),\
-                                                        transform(make_point(x($geometry),y($geometry)+0.0001),layer_property(@layer_id,'crs'),@map_crs))))")
+                            # Convergence-corrected rotation precomputed at ingest
+                            QgsProperty.fromExpression(f'COALESCE("{ROTATION_FIELD}", "{strike_field}", 0)')
                         )
                         
                         symbol.changeSymbolLayer(0, svg_layer)
-                        rule.setSymbol(symbol)
-                        root_rule.appendChild(rule)
+                        label = f"{rockunit} - {planetype}"
+                        if categorized:
+                            key = symbol_category((rockunit, planetype))
+                            categories.setdefault(key, QgsRendererCategory(key, symbol, label))
+                        else:
+                            rule = root_rule.children()[0].clone()
+                            rule.setLabel(label)
+                            rule.setFilterExpression(
+                                f'"{rockunit_field}" = \'{rockunit}\' AND '
+                                f'"{planetype_field}" = \'{planetype}\''
+                            )
+                            rule.setSymbol(symbol)
+                            root_rule.appendChild(rule)
                             
-                    # Remove the default rule
-                    root_rule.removeChildAt(0)
+                    if categorized:
+                        renderer = self._category_renderer(categories)
+                    else:
+                        # Remove the default rule
+                        root_rule.removeChildAt(0)
                     
                     # Apply label styling after symbol styling
                     self._apply_label_style_plane(layer)
@@ -778,66 +959,63 @@ class FieldMoveProjectImporter:
                                 if f.name().strip().lower() == 'plungeazimuth'), None)
 
                 if all([color_field, rockunit_field, lineationtype_field, plungeazimuth_field]):
-                    # Get SVG symbol path
-                    svg_dir = os.path.join(self.plugin_dir, 'SVG', 'Arrows')
-                    svg_file = next((f for f in os.listdir(svg_dir) 
-                                if f.startswith('102') and f.endswith('.svg')), None)
-                    
-                    if svg_file:
-                        svg_path = os.path.join(svg_dir, svg_file)
-
-                        # Create base symbol with data-defined rotation
-                        base_symbol = QgsMarkerSymbol()
-                        svg_layer = QgsSvgMarkerSymbolLayer(svg_path)
-                        svg_layer.setSize(22)
-                        svg_layer.setStrokeWidth(0.5)
-                        
-                        # SET ROTATION EXPRESSION HERE
-                        svg_layer.setDataDefinedProperty(
-                            QgsSymbolLayer.PropertyAngle,
-                            #QgsProperty.fromExpression(f'"{plungeazimuth_field}"')
-                            QgsProperty.fromExpression(f'COALESCE("{plungeazimuth_field}"'f",0)+\
-                                                       (degrees(azimuth(transform($geometry,layer_property(@layer_id,'crs'),@map_crs),\
-                                                        transform(make_point(x($geometry),y($geometry)+0.0001),layer_property(@layer_id,'crs'),@map_crs))))")
-                        )
-                        
-                        base_symbol.changeSymbolLayer(0, svg_layer)
+                    # Get SVG symbol path from the symbol atlas index
+                    svg_path = self.symbol_atlas.svg_path('102', 'Arrows')
                     
-                        # Create rule-based renderer
-                        renderer = QgsRuleBasedRenderer(base_symbol.clone())
-                        root_rule = renderer.rootRule()
+                    if svg_path:
+                        # Categorized renderer on the key written at ingest, rule-based
+                        # renderer only for layers built without it
+                        categorized = self._has_symbol_category(layer)
+                        if not categorized:
+                            renderer = QgsRuleBasedRenderer(QgsMarkerSymbol())
+                            root_rule = renderer.rootRule()
 
                         # Get unique combinations for rules
                         unique_data = {}
-                        for feature in layer.getFeatures():
-                            rockunit = str(feature[rockunit_field])#.strip()
-                            lineationtype = str(feature[lineationtype_field])#.strip()
-                            color = str(feature[color_field]).strip()
+                        for rockunit, lineationtype, color in self._layer_categories(
+                                layer, [rockunit_field, lineationtype_field, color_field]):
+                            rockunit = str(rockunit)#.strip()
+                            lineationtype = str(lineationtype)#.strip()
+                            color = str(color).strip()
                             if all([rockunit, lineationtype, color]):
                                 unique_data[(rockunit, lineationtype)] = color
                         
                         #order dictionnary so legend items appear aplhabetically
                         unique_data = dict(sorted(unique_data.items()))
 
-                        # Create rules
+                        # Create categories (or rules)
+                        categories = {}
                         for (rockunit, lineationtype), color in unique_data.items():
-                            rule = root_rule.children()[0].clone()
-                            rule.setLabel(f"{rockunit} - {lineationtype}")
-                            rule.setFilterExpression(
-                                f'"{rockunit_field}" = \'{rockunit}\' AND '
-                                f'"{lineationtype_field}" = \'{lineationtype}\''
-                            )
+                            # Symbol per rule: the SVG pre-rendered with the rule color
+                            symbol = QgsMarkerSymbol()
+                            svg_layer = self.symbol_atlas.marker_layer(svg_path, color, 22, 0.5)
                             
-                            # Set stroke color per rule
-                            symbol = rule.symbol().clone()
-                            symbol.symbolLayer(0).setStrokeColor(QColor(color))
-                            symbol.symbolLayer(0).setFillColor(QColor(color))
-                            rule.setSymbol(symbol)
-                            
-                            root_rule.appendChild(rule)
+                            # SET ROTATION EXPRESSION HERE
+                            svg_layer.setDataDefinedProperty(
+                                QgsSymbolLayer.PropertyAngle,
+                                # Convergence-corrected rotation precomputed at ingest
+                                QgsProperty.fromExpression(f'COALESCE("{ROTATION_FIELD}", "{plungeazimuth_field}", 0)')
+                            )
+                            symbol.changeSymbolLayer(0, svg_layer)
+                            label = f"{rockunit} - {lineationtype}"
+                            if categorized:
+                                key = symbol_category((rockunit, lineationtype))
+                                categories.setdefault(key, QgsRendererCategory(key, symbol, label))
+                            else:
+                                rule = root_rule.children()[0].clone()
+                                rule.setLabel(label)
+                                rule.setFilterExpression(
+                                    f'"{rockunit_field}" = \'{rockunit}\' AND '
+                                    f'"{lineationtype_field}" = \'{lineationtype}\''
+                                )
+                                rule.setSymbol(symbol)
+                                root_rule.appendChild(rule)
                             
-                        # Remove the default rule
-                        root_rule.removeChildAt(0)
+                        if categorized:
+                            renderer = self._category_renderer(categories)
+                        else:
+                            # Remove the default rule
+                            root_rule.removeChildAt(0)
                         # Apply label styling after symbol styling
                         self._apply_label_style_line(layer)
                         # Apply the renderer
@@ -847,13 +1025,10 @@ class FieldMoveProjectImporter:
                     
             # Special handling for notes
             elif layer_name.lower() == 'note':
-                # Get SVG symbol path
-                svg_dir = os.path.join(self.plugin_dir, 'SVG')
-                svg_file = next((f for f in os.listdir(svg_dir) 
-                            if f.startswith('note') and f.endswith('.svg')), None)
+                # Get SVG symbol path from the symbol atlas index
+                svg_path = self.symbol_atlas.svg_path('note')
                 
-                if svg_file:
-                    svg_path = os.path.join(svg_dir, svg_file)
+                if svg_path:
                     # Create base symbol
                     base_symbol = QgsMarkerSymbol()
                     svg_layer = QgsSvgMarkerSymbolLayer(svg_path)
@@ -871,13 +1046,10 @@ class FieldMoveProjectImporter:
                 
             # Special handling for localities
             elif layer_name.lower() == 'localities':
-                # Get SVG symbol path
-                svg_dir = os.path.join(self.plugin_dir, 'SVG')
-                svg_file = next((f for f in os.listdir(svg_dir) 
-                            if f.startswith('locality2') and f.endswith('.svg')), None)
+                # Get SVG symbol path from the symbol atlas index
+                svg_path = self.symbol_atlas.svg_path('locality2')
                 
-                if svg_file:
-                    svg_path = os.path.join(svg_dir, svg_file)
+                if svg_path:
                     # Create base symbol
                     base_symbol = QgsMarkerSymbol()
                     svg_layer = QgsSvgMarkerSymbolLayer(svg_path)
@@ -897,13 +1069,10 @@ class FieldMoveProjectImporter:
             elif layer_name.lower() == 'image':
                 heading_field = next((f.name() for f in layer.fields() 
                                 if f.name().strip().lower() == 'heading'), None)
-                # Get SVG symbol path
-                svg_dir = os.path.join(self.plugin_dir, 'SVG')
-                svg_file = next((f for f in os.listdir(svg_dir) 
-                            if f.startswith('photo') and f.endswith('.svg')), None)
+                # Get SVG symbol path from the symbol atlas index
+                svg_path = self.symbol_atlas.svg_path('photo')
                 
-                if svg_file:
-                    svg_path = os.path.join(svg_dir, svg_file)
+                if svg_path:
                     # Create base symbol
                     base_symbol = QgsMarkerSymbol()
                     svg_layer = QgsSvgMarkerSymbolLayer(svg_path)
@@ -926,41 +1095,67 @@ class FieldMoveProjectImporter:
         except Exception as e:
             QMessageBox.warning(None, "Error", f"Error styling layer: {str(e)}")
 
+    @staticmethod
+    def _has_symbol_category(layer):
+        """Whether the layer has the symbol category key written at ingest"""
+        return layer.fields().indexOf(SYMBOL_CATEGORY_FIELD) >= 0
+
+    @staticmethod
+    def _category_renderer(categories):
+        """Categorized renderer on the symbol category key written at ingest
+
+        Each feature is matched with a single lookup of its key instead of
+        evaluating the filter of every rule. categories maps the keys to their
+        QgsRendererCategory, in legend order. Layers built without the key
+        get the rule-based renderer instead.
+        """
+        return QgsCategorizedSymbolRenderer(SYMBOL_CATEGORY_FIELD, list(categories.values()))
+
+    def _layer_categories(self, layer, fields):
+        """Distinct value tuples of the fields, read from the ingest catalog of the GeoPackage
+
+        Falls back to scanning the features for layers without catalog entry.
+        Null values are returned as NULL, like the feature attributes.
+        """
+        uri = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source())
+        stats = read_layer_stats(uri.get('path', ''), uri.get('layerName') or layer.name())
+        categories = stats.distinct(fields) if stats is not None else None
+        if categories is None:
+            request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+            request.setSubsetOfAttributes(fields, layer.fields())
+            categories = dict.fromkeys(
+                tuple(None if feature[field] == NULL else feature[field] for field in fields)
+                for feature in layer.getFeatures(request))
+        return [tuple(NULL if value is None else value for value in values) for values in categories]
+
     def _style_line_layer(self, layer, layer_name):
         """Apply rule-based styling for lines """
         try:
-            # Create default symbol for ELSE rule
-            else_symbol = QgsLineSymbol.createSimple({
-            'color': '#999999',  # Gray color for unmatched features
-            'width': '0.5',
-            'line_style': 'solid'})
-            
-            # Initialize rule-based renderer
-            renderer = QgsRuleBasedRenderer(else_symbol)
-            root_rule = renderer.rootRule()
-            
-            # Clear existing rules properly
-            for child in root_rule.children():
-                root_rule.removeChild(child)
-            
-            # Get unique categories from your data
-            categories = []
-            for feature in layer.getFeatures():
-                # Create a category for each unique combination you want to style
-                categories.append((
-                    feature['rockUnit'],  # Or use another field for categorization
-                    feature['color'],        # Hex color from attributes
-                    feature['style']         # Line style
-                ))
+            # Categorized renderer on the key written at ingest, rule-based
+            # renderer only for layers built without it
+            categorized = self._has_symbol_category(layer)
+            if not categorized:
+                # Create default symbol for ELSE rule
+                else_symbol = QgsLineSymbol.createSimple({
+                'color': '#999999',  # Gray color for unmatched features
+                'width': '0.5',
+                'line_style': 'solid'})
+                
+                # Initialize rule-based renderer
+                renderer = QgsRuleBasedRenderer(else_symbol)
+                root_rule = renderer.rootRule()
+                
+                # Clear existing rules properly
+                for child in root_rule.children():
+                    root_rule.removeChild(child)
             
-
-            sorted_categories = sorted(categories, key=lambda x: x[0].lower())
-                                
-            # Remove duplicates
-            unique_categories = list(set(categories))
-            unique_categories = sorted(unique_categories, key=lambda x: x[0].lower())
+            # Get unique categories from the layer catalog: a category for each
+            # unique combination of rockUnit, color (hex) and line style
+            categories = self._layer_categories(layer, ['rockUnit', 'color', 'style'])
+            unique_categories = sorted(categories, key=lambda x: x[0].lower())
             
-            # Create rules for each unique category
+            # Create a category (or rule) for each unique category
+            categories = {}
             for cat_name, color, style in unique_categories:
                 # Create symbol
                 symbol = QgsLineSymbol.createSimple({})
@@ -978,6 +1173,11 @@ class FieldMoveProjectImporter:
                     line_style = Qt.DotLine
                 symbol.symbolLayer(0).setPenStyle(line_style)
                 
+                if categorized:
+                    key = symbol_category((cat_name, style))
+                    categories.setdefault(key, QgsRendererCategory(key, symbol, str(cat_name)))
+                    continue
+
                 # Create rule
                 rule = root_rule.children()[0].clone() if root_rule.children() else root_rule.clone()
                 rule.setLabel(str(cat_name))
@@ -986,6 +1186,8 @@ class FieldMoveProjectImporter:
                 rule.setSymbol(symbol)
                 root_rule.appendChild(rule)
         
+            if categorized:
+                renderer = self._category_renderer(categories)
             # Apply the renderer
             layer.setRenderer(renderer)
             layer.triggerRepaint()
@@ -1034,14 +1236,28 @@ class FieldMoveProjectImporter:
         except Exception as e:
             QMessageBox.warning(None, "Error", f"Error configuring Map tips: {str(e)}")
 
-    def _configure_image_map_tips(self, layer, csv_path):
-        """Configure map tips to show photo preview and notes"""
+    def _configure_image_map_tips(self, layer, csv_path, thumbnail_dir=None):
+        """Configure map tips to show photo preview and notes
+
+        The preview uses the downscaled copies of thumbnail_dir when given,
+        falling back to the full resolution photo when a thumbnail is missing
+        (QGIS 3.26 and later, the photos are shown otherwise). The photos of
+        a layer merged by a batch import are in the images folder of each
+        row's source project.
+        """
         try:
             # define the images folder path (within the project) by reusing the path of the image.csv
-            if os.name in ["nt"]:
+            if layer.fields().indexOf(SOURCE_PROJECT_FIELD) >= 0:
+                root = os.path.dirname(csv_path).replace(os.sep, "/")
+                imageFolder = f"'{root}/',\"{SOURCE_PROJECT_FIELD}\",'/images/'"
+            elif os.name in ["nt"]:
                 imageFolder = "'"+os.path.dirname(csv_path)+"/images/"+ "'"
             else :
                 imageFolder = "'"+csv_path[:-4]+"s"+os.path.sep+"'"          
+            imagePath = f'concat({imageFolder},ltrim("image name"))'
+            if thumbnail_dir and Qgis.QGIS_VERSION_INT >= 32600:
+                thumbnailPath = f'concat(\'{thumbnail_dir.replace(os.sep, "/")}/\',ltrim("image name"))'
+                imagePath = f"if(file_exists({thumbnailPath}),{thumbnailPath},{imagePath})"
             # Configure nice display
             layer.setMapTipTemplate(
                 f"<table>"f"\n"
@@ -1050,7 +1266,7 @@ class FieldMoveProjectImporter:
                 f"</tr>"f"\n"
                 f"<tr>"f"\n"
                 f"<th>"f"\n"
-                f"\t"f'<img src="file:///[%concat({imageFolder},ltrim("image name"))%]" width="350" height="250";">'f"\n"
+                f"\t"f'<img src="file:///[%{imagePath}%]" width="350" height="250";">'f"\n"
                 f"</th>"f"\n"
                 f"</tr>"f"\n"
                 f"<tr>"f"\n"
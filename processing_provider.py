@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ This plugins consolidate FieldMove project files into a QGIS project
+ Processing provider exposing the import as an algorithm, for qgis_process,
+ the batch processing interface and models
+                              -------------------
+        begin                : 2025-03-29
+        git sha              : $Format:%H$
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.core import (QgsProcessingAlgorithm, QgsProcessingContext,
+                       QgsProcessingException, QgsProcessingLayerPostProcessorInterface,
+                       QgsProcessingOutputMultipleLayers, QgsProcessingParameterBoolean,
+                       QgsProcessingParameterFile, QgsProcessingProvider)
+
+from .fieldmove_import_task import FieldMoveImportTask, POINT_JOB, LINE_JOB, RASTER_JOB, MOSAIC_JOB
+
+
+class FieldMoveProcessingProvider(QgsProcessingProvider):
+    """Processing provider of the FieldMove algorithms"""
+
+    def __init__(self, importer):
+        super().__init__()
+        self.importer = importer
+
+    def id(self):
+        return 'fieldmove'
+
+    def name(self):
+        return 'FieldMove'
+
+    def icon(self):
+        return QIcon(os.path.join(self.importer.plugin_dir, 'icon.png'))
+
+    def loadAlgorithms(self):
+        self.addAlgorithm(ImportFieldMoveProjectAlgorithm(self.importer))
+
+
+class _StyleLayer(QgsProcessingLayerPostProcessorInterface):
+    """Style an imported layer like the import dialog does, once loaded in the project (main thread)
+
+    release is called with the post-processor once the layer is styled, to
+    drop the reference keeping it alive.
+    """
+
+    def __init__(self, importer, csv_path, kind, release):
+        super().__init__()
+        self.importer = importer
+        self.csv_path = csv_path
+        self.kind = kind
+        self.release = release
+
+    def postProcessLayer(self, layer, context, feedback):
+        try:
+            self._style(layer)
+        finally:
+            self.release(self)
+
+    def _style(self, layer):
+        if self.kind == LINE_JOB:
+            self.importer._apply_style(layer, self.csv_path, None, self.importer._style_line_layer)
+            self.importer._configure_map_tips(layer)
+            return
+        self.importer._apply_style(layer, self.csv_path, None, self.importer._style_layer)
+        self.importer._setup_symbol_rotation(layer, layer.name())
+        if layer.name() == 'image':
+            self.importer._configure_image_map_tips(layer, self.csv_path)
+        else:
+            self.importer._configure_map_tips(layer)
+
+
+class ImportFieldMoveProjectAlgorithm(QgsProcessingAlgorithm):
+    """Import a FieldMove project folder into GeoPackages, without any dialog
+
+    Runs the same jobs as the background import task, in the algorithm
+    thread, with the project and transform context of the Processing
+    context, and outputs the GeoPackage layers and basemaps. The layers are
+    styled when the algorithm is run from QGIS and loads them.
+    """
+
+    PROJECT_DIR = 'PROJECT_DIR'
+    SINGLE_GEOPACKAGE = 'SINGLE_GEOPACKAGE'
+    DELTA = 'DELTA'
+    MOSAIC = 'MOSAIC'
+    COG = 'COG'
+    REPROJECT = 'REPROJECT'
+    OUTPUT_LAYERS = 'OUTPUT_LAYERS'
+
+    def __init__(self, importer):
+        super().__init__()
+        self.importer = importer
+        # Post-processors of the last run, which must outlive processAlgorithm
+        # (the layer details do not own them) until they styled their layer
+        self._post_processors = []
+
+    def createInstance(self):
+        return ImportFieldMoveProjectAlgorithm(self.importer)
+
+    def name(self):
+        return 'importproject'
+
+    def displayName(self):
+        return 'Import FieldMove project'
+
+    def shortHelpString(self):
+        return ("Converts the CSV files of a FieldMove (or FieldMove Clino) .fm project folder into "
+                "GeoPackage layers, and prepares its basemaps. Unchanged files reuse the outputs of "
+                "the previous import.")
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFile(
+            self.PROJECT_DIR, 'FieldMove project folder', behavior=QgsProcessingParameterFile.Folder))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.SINGLE_GEOPACKAGE, 'Write all layers into a single <project>.gpkg', defaultValue=False))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.DELTA, 'Only append new observations to previously imported layers',
+            defaultValue=False))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.MOSAIC, 'Mosaic the basemaps into a single virtual raster', defaultValue=False))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.COG, 'Convert the basemaps to Cloud-Optimized GeoTIFFs', defaultValue=False))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.REPROJECT, 'Reproject the converted basemaps to the project CRS', defaultValue=False))
+        self.addOutput(QgsProcessingOutputMultipleLayers(self.OUTPUT_LAYERS, 'Imported layers'))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        project_dir = self.parameterAsFile(parameters, self.PROJECT_DIR, context)
+        if not project_dir or not os.path.isdir(project_dir):
+            raise QgsProcessingException("Invalid project directory")
+        if self.importer.import_running():
+            raise QgsProcessingException("An import is already running in QGIS")
+        self._post_processors = []
+
+        task = FieldMoveImportTask(
+            self.importer, project_dir,
+            single_geopackage=self.parameterAsBoolean(parameters, self.SINGLE_GEOPACKAGE, context),
+            delta=self.parameterAsBoolean(parameters, self.DELTA, context),
+            mosaic=self.parameterAsBoolean(parameters, self.MOSAIC, context),
+            cog=self.parameterAsBoolean(parameters, self.COG, context),
+            reproject=self.parameterAsBoolean(parameters, self.REPROJECT, context),
+            project=context.project(), transform_context=context.transformContext(),
+            feedback=feedback)
+        # The task is run here rather than by the task manager: it reports its
+        # progress to the feedback and polls it for cancellation
+        completed = task.run()
+        if task.exception is not None:
+            raise QgsProcessingException(f"Import failed: {task.exception}")
+        if not completed:
+            raise QgsProcessingException("Import canceled")
+
+        layers = []
+        for kind, file_path, result, error in task.results:
+            if error is not None:
+                feedback.reportError(f"{os.path.basename(file_path)}: {error}")
+                if kind != RASTER_JOB:
+                    continue  # Basemaps are loaded even without their statistics
+            layer_name = os.path.splitext(os.path.basename(file_path))[0]
+            if kind in (POINT_JOB, LINE_JOB):
+                uri = f"{result}|layername={layer_name}"
+                details = QgsProcessingContext.LayerDetails(layer_name, context.project(), self.OUTPUT_LAYERS)
+                post_processor = _StyleLayer(self.importer, file_path, kind, self._post_processors.remove)
+                self._post_processors.append(post_processor)
+                details.setPostProcessor(post_processor)
+            elif kind in (RASTER_JOB, MOSAIC_JOB):
+                uri = file_path
+                details = QgsProcessingContext.LayerDetails(layer_name, context.project(), self.OUTPUT_LAYERS)
+            else:
+                continue
+            context.addLayerToLoadOnCompletion(uri, details)
+            layers.append(uri)
+
+        task.manifest.save()
+        self.importer._report_profile(project_dir, task.profiler)
+        return {self.OUTPUT_LAYERS: layers}
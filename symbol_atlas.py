@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ This plugins consolidate FieldMove project files into a QGIS project
+ Symbol atlas: index of the plugin's SVG library and cache of the
+ pre-rendered raster markers used by the layer styles
+                              -------------------
+        begin                : 2025-03-29
+        git sha              : $Format:%H$
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import base64
+import hashlib
+import os
+
+from qgis.PyQt.QtGui import QColor
+from qgis.core import (Qgis, QgsApplication, QgsMessageLog, QgsRasterMarkerSymbolLayer,
+                       QgsSvgMarkerSymbolLayer)
+
+# Resolution of the pre-rendered markers, high enough for print layouts
+MARKER_PIXELS_PER_MM = 12
+
+
+class SymbolAtlas:
+    """SVG symbols of the plugin, indexed once, and their raster markers
+
+    Each (SVG, color, size, stroke width) combination is rendered once to a
+    PNG of the cache folder, named after a hash of the combination and of
+    the SVG modification time, and reused by every later style. The markers
+    embed the PNG (base64: path), so saved projects and exported styles do
+    not depend on the cache folder of this machine.
+    """
+
+    def __init__(self, svg_dir, cache_dir=None):
+        self.svg_dir = svg_dir
+        self.cache_dir = cache_dir or os.path.join(QgsApplication.qgisSettingsDirPath(),
+                                                   'cache', 'fieldmove_markers')
+        self._index = None
+        self._markers = {}
+
+    @property
+    def index(self):
+        """SVG file names of the library, sorted, keyed by folder relative to the SVG root"""
+        if self._index is None:
+            self._index = {}
+            folders = [''] + sorted(d for d in os.listdir(self.svg_dir)
+                                    if os.path.isdir(os.path.join(self.svg_dir, d)))
+            for folder in folders:
+                self._index[folder] = sorted(f for f in os.listdir(os.path.join(self.svg_dir, folder))
+                                             if f.endswith('.svg'))
+        return self._index
+
+    def svg_path(self, prefix, folder=''):
+        """Path of the first SVG of a folder whose name starts with prefix, None if none does"""
+        name = next((f for f in self.index.get(folder, []) if f.startswith(prefix)), None)
+        return os.path.join(self.svg_dir, folder, name) if name else None
+
+    def marker_layer(self, svg_path, color, size, stroke_width):
+        """Raster marker of an SVG rendered with one color, the SVG marker if rendering fails
+
+        The size and stroke width are in millimeters, like those of
+        QgsSvgMarkerSymbolLayer.
+        """
+        image_data = self.marker_data(svg_path, color, size, stroke_width)
+        if image_data is None:
+            marker = QgsSvgMarkerSymbolLayer(svg_path)
+            marker.setStrokeColor(QColor(color))
+            marker.setStrokeWidth(stroke_width)
+            marker.setFillColor(QColor(color))
+        else:
+            marker = QgsRasterMarkerSymbolLayer(image_data)
+        marker.setSize(size)
+        return marker
+
+    def marker_data(self, svg_path, color, size, stroke_width):
+        """Embedded (base64:) PNG of an SVG rendered with one color, None if it cannot be rendered"""
+        key = (svg_path, color, size, stroke_width)
+        if key in self._markers:
+            return self._markers[key]
+        image_data = None
+        image_path = self.marker_image(svg_path, color, size, stroke_width)
+        if image_path is not None:
+            try:
+                with open(image_path, 'rb') as f:
+                    image_data = 'base64:' + base64.b64encode(f.read()).decode('ascii')
+            except OSError as e:
+                QgsMessageLog.logMessage(f"Could not read marker {image_path}: {e}", 'FieldMove',
+                                         Qgis.Warning)
+        self._markers[key] = image_data
+        return image_data
+
+    def marker_image(self, svg_path, color, size, stroke_width):
+        """Path of the cached PNG of an SVG rendered with one color, None if it cannot be rendered"""
+        image_path = None
+        try:
+            signature = f"{svg_path}|{os.stat(svg_path).st_mtime_ns}|{color}|{size}|{stroke_width}"
+            image_path = os.path.join(self.cache_dir,
+                                      hashlib.sha1(signature.encode('utf-8')).hexdigest() + '.png')
+            if not os.path.exists(image_path):
+                os.makedirs(self.cache_dir, exist_ok=True)
+                image, _ = QgsApplication.svgCache().svgAsImage(
+                    svg_path, size * MARKER_PIXELS_PER_MM, QColor(color), QColor(color),
+                    stroke_width * MARKER_PIXELS_PER_MM, 1, 0, True)
+                if image.isNull() or not image.save(image_path, 'PNG'):
+                    image_path = None
+        except OSError as e:
+            QgsMessageLog.logMessage(f"Could not render marker {svg_path}: {e}", 'FieldMove',
+                                     Qgis.Warning)
+            image_path = None
+        return image_path
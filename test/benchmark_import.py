@@ -0,0 +1,147 @@
+# coding=utf-8
+"""FieldMove import benchmark.
+
+Generates synthetic projects of increasing size and times import_project
+end to end and per stage (from the import profiler) under an offscreen
+QGIS, for each import strategy. Run from the plugin folder:
+
+    python test/benchmark_import.py --sizes 1000 10000 100000 --strategies default single
+
+Results are printed and, with --output, written as JSON to compare runs.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from qgis.PyQt.QtCore import QEventLoop
+from qgis.core import QgsApplication, QgsProject
+
+from fieldmove_generator import generate_project, size_preset
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import_project options of each strategy
+STRATEGIES = {
+    'default': {},
+    'single': {'single_geopackage': True},
+    'mosaic': {'mosaic': True},
+    'cog': {'cog': True},
+}
+
+# Files written by an import, removed before each cold run
+IMPORT_OUTPUTS = ['*.gpkg', '*.gpkg-*', '*.ovr', '*.aux.xml', '*.cog.tif', '.fieldmove_cache']
+
+
+def load_importer():
+    """FieldMoveProjectImporter of this plugin folder, imported as a package"""
+    sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+    module = importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.fieldmove_project_importer")
+    # No QGIS interface: the benchmark never opens the dialog
+    return module.FieldMoveProjectImporter(None)
+
+
+def clean_project(project_dir):
+    """Remove the outputs of previous imports so the next one starts cold"""
+    for pattern in IMPORT_OUTPUTS:
+        for path in glob.glob(os.path.join(project_dir, pattern)):
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+
+def run_import(importer, project_dir, options):
+    """Import a project and wait for its task, returns the wall time and the profile report"""
+    QgsProject.instance().clear()
+    start = time.perf_counter()
+    # Explicit options rather than those saved by the import dialog
+    params = {'single_geopackage': False, 'delta': False, 'mosaic': False, 'cog': False,
+              'reproject': False}
+    params.update(options)
+    task = importer.import_project(project_dir, **params)
+    loop = QEventLoop()
+    task.taskCompleted.connect(loop.quit)
+    task.taskTerminated.connect(loop.quit)
+    loop.exec_()
+    wall_time = time.perf_counter() - start
+    if task.exception is not None:
+        raise task.exception
+    return wall_time, task.profiler.report()
+
+
+def stage_totals(report):
+    """Wall time of each stage summed over the files of a profile report"""
+    totals = {}
+    for entry in report['files'].values():
+        for stage in entry['stages']:
+            totals[stage['stage']] = totals.get(stage['stage'], 0.) + stage['wall_time']
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help="number of localities, planes and lines of each project")
+    parser.add_argument('--strategies', nargs='+', choices=sorted(STRATEGIES), default=['default'])
+    parser.add_argument('--vertices', type=int, default=200, help="vertices per polyline")
+    parser.add_argument('--basemaps', type=int, default=2, help="number of GeoTIFF basemaps")
+    parser.add_argument('--basemap-size', type=int, default=1024, help="basemap width in pixels")
+    parser.add_argument('--warm', action='store_true',
+                        help="also time a second import reusing the first one")
+    parser.add_argument('--work-dir', help="folder of the generated projects (default: temporary)")
+    parser.add_argument('--output', help="JSON file of the results")
+    args = parser.parse_args(argv)
+
+    # GUI enabled (on the offscreen platform) for the marker and thumbnail rendering
+    app = QgsApplication([], True)
+    app.initQgis()
+    importer = load_importer()
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='fieldmove_benchmark_')
+    results = []
+    try:
+        for size in args.sizes:
+            project_dir = os.path.join(work_dir, f"synthetic_{size}.fm")
+            if not os.path.isdir(project_dir):
+                generate_project(project_dir, vertices=args.vertices, basemaps=args.basemaps,
+                                 basemap_size=args.basemap_size, **size_preset(size))
+            for strategy in args.strategies:
+                clean_project(project_dir)
+                runs = ['cold', 'warm'] if args.warm else ['cold']
+                for run in runs:
+                    wall_time, report = run_import(importer, project_dir, STRATEGIES[strategy])
+                    stages = stage_totals(report)
+                    results.append({'size': size, 'strategy': strategy, 'run': run,
+                                    'wall_time': wall_time, 'stages': stages, 'profile': report})
+                    top = ', '.join(f"{name} {seconds:.2f} s" for name, seconds in list(stages.items())[:5])
+                    print(f"{size:>9} {strategy:<8} {run:<5} {wall_time:8.2f} s  {top}", flush=True)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        app.exitQgis()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+# coding=utf-8
+"""Synthetic FieldMove project generator.
+
+Writes .fm folders of any size with the CSV files, photos, rock units and
+basemaps of a FieldMove (or FieldMove Clino) export, for the import
+benchmarks. The content is reproducible from the seed.
+
+    python test/fieldmove_generator.py /tmp/synthetic.fm --size 100000
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import argparse
+import csv
+import math
+import os
+import random
+import struct
+from datetime import datetime, timedelta
+
+# Center (longitude, latitude) and half width in degrees of the mapped area
+CENTER = (7.25, 43.70)
+HALF_WIDTH = 0.05
+
+ROCK_UNITS = [('Limestone', '#4f81bd'), ('Marl', '#9bbb59'), ('Sandstone', '#f79646'),
+              ('Shale', '#8064a2'), ('Conglomerate', '#c0504d'), ('Granite', '#ff66cc'),
+              ('Basalt', '#333333'), ('Gneiss', '#996633')]
+PLANE_TYPES = ['Bedding', 'Fault', 'Joint', 'Cleavage']
+LINEATION_TYPES = ['Stretching', 'Intersection', 'Slickenline', 'Fold axis']
+LINE_STYLES = ['solid', 'dashed', 'dotted']
+
+# Share of the observations whose rock unit is missing from the rock units table
+UNKNOWN_UNIT_RATE = 0.01
+
+PHOTO_SIZE = (640, 480)
+
+_DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def fieldmove_timestamp(moment):
+    """Timestamp as written by FieldMove, e.g. Sat Oct 19 15:00:33 2024 (locale independent)"""
+    return (f"{_DAYS[moment.weekday()]} {_MONTHS[moment.month - 1]} {moment.day:02d} "
+            f"{moment:%H:%M:%S} {moment.year}")
+
+
+def gray_jpeg(width, height):
+    """Baseline JPEG of a uniform gray image, standing in for a field photo
+
+    Every 8x8 block only has a null DC difference and an end of block, each
+    coded on one bit with single-symbol Huffman tables, so the image is
+    encoded without any DCT.
+    """
+    width, height = width // 8 * 8, height // 8 * 8
+    bits = 2 * (width // 8) * (height // 8)
+    data = bytes(bits // 8) + (bytes([0xff >> (bits % 8)]) if bits % 8 else b'')
+
+    def segment(marker, payload):
+        return struct.pack('>BBH', 0xff, marker, len(payload) + 2) + payload
+
+    huffman_table = bytes([1] + [0] * 15 + [0])  # One code of length 1 for symbol 0
+    return b''.join([
+        b'\xff\xd8',
+        segment(0xe0, b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'),
+        segment(0xdb, b'\x00' + bytes([1] * 64)),
+        segment(0xc0, struct.pack('>BHHB', 8, height, width, 1) + b'\x01\x11\x00'),
+        segment(0xc4, b'\x00' + huffman_table),
+        segment(0xc4, b'\x10' + huffman_table),
+        segment(0xda, b'\x01\x01\x00\x00\x3f\x00'),
+        data,
+        b'\xff\xd9',
+    ])
+
+
+def write_basemap(path, extent, size=256, bands=3):
+    """Write a small georeferenced GeoTIFF (EPSG:4326) with a gradient per band (needs GDAL)"""
+    import numpy as np
+    from osgeo import gdal, osr
+
+    xmin, ymin, xmax, ymax = extent
+    dataset = gdal.GetDriverByName('GTiff').Create(path, size, size, bands, gdal.GDT_Byte,
+                                                   ['TILED=YES'])
+    dataset.SetGeoTransform([xmin, (xmax - xmin) / size, 0., ymax, 0., -(ymax - ymin) / size])
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    dataset.SetProjection(srs.ExportToWkt())
+    rows, columns = np.mgrid[0:size, 0:size]
+    for index in range(1, bands + 1):
+        pixels = (rows * index + columns * (bands - index + 1)) * 255 // (size * (bands + 1))
+        dataset.GetRasterBand(index).WriteArray(pixels.astype(np.uint8))
+    dataset = None
+
+
+class ProjectGenerator:
+    """Writes the files of one synthetic FieldMove project, row by row
+
+    The observations are scattered around their localities, which are
+    scattered over the mapped area. Rows are written as they are drawn so
+    memory stays flat whatever the size.
+    """
+
+    def __init__(self, project_dir, seed=0):
+        self.project_dir = project_dir
+        self.random = random.Random(seed)
+        self.start = datetime(2024, 10, 19, 8, 0, 0)
+        self.localities = []  # (localityId, name, longitude, latitude)
+        self._data_ids = 0
+
+    @property
+    def extent(self):
+        return (CENTER[0] - HALF_WIDTH, CENTER[1] - HALF_WIDTH,
+                CENTER[0] + HALF_WIDTH, CENTER[1] + HALF_WIDTH)
+
+    def _csv(self, name, header):
+        f = open(os.path.join(self.project_dir, name), 'w', newline='', encoding='utf-8')
+        writer = csv.writer(f)
+        writer.writerow(header)
+        return f, writer
+
+    def _data_id(self):
+        self._data_ids += 1
+        return f"{self._data_ids:08d}"
+
+    def _timestamp(self, index):
+        return fieldmove_timestamp(self.start + timedelta(seconds=37 * index))
+
+    def _position(self):
+        """Locality of an observation and a point near it"""
+        locality_id, name, x, y = self.random.choice(self.localities)
+        return (locality_id, name, x + self.random.gauss(0., 0.0005),
+                y + self.random.gauss(0., 0.0005), round(self.random.uniform(50., 1500.), 1))
+
+    def _rock_unit(self):
+        if self.random.random() < UNKNOWN_UNIT_RATE:
+            return 'Unmapped'
+        return self.random.choice(ROCK_UNITS)[0]
+
+    def write_localities(self, count):
+        f, writer = self._csv('localities.csv', ['localityId', 'name', 'description', 'longitude',
+                                                 'latitude', 'altitude', 'timedate'])
+        with f:
+            for i in range(count):
+                x = self.random.uniform(CENTER[0] - HALF_WIDTH, CENTER[0] + HALF_WIDTH)
+                y = self.random.uniform(CENTER[1] - HALF_WIDTH, CENTER[1] + HALF_WIDTH)
+                locality = (f"L{i + 1:07d}", f"Locality {i + 1}", x, y)
+                self.localities.append(locality)
+                writer.writerow([locality[0], locality[1], f"Outcrop {i + 1}", f"{x:.7f}", f"{y:.7f}",
+                                 round(self.random.uniform(50., 1500.), 1), self._timestamp(i)])
+
+    def write_planes(self, count):
+        f, writer = self._csv('plane.csv', ['localityId', 'dataId', 'longitude', 'latitude', 'altitude',
+                                            'horiz_precision', 'vert_precision', 'dip', 'dipAzimuth',
+                                            'strike', 'declination', 'planeType', 'rockUnit',
+                                            'timedate', 'notes'])
+        with f:
+            for i in range(count):
+                locality_id, _, x, y, z = self._position()
+                dip_azimuth = self.random.uniform(0., 360.)
+                writer.writerow([locality_id, self._data_id(), f"{x:.7f}", f"{y:.7f}", z,
+                                 round(self.random.uniform(2., 10.), 1),
+                                 round(self.random.uniform(2., 10.), 1),
+                                 round(self.random.uniform(0., 90.), 1), round(dip_azimuth, 1),
+                                 round((dip_azimuth - 90.) % 360., 1), 2.1,
+                                 self.random.choice(PLANE_TYPES), self._rock_unit(),
+                                 self._timestamp(i), f"Plane {i + 1}"])
+
+    def write_lines(self, count):
+        f, writer = self._csv('line.csv', ['localityId', 'dataId', 'longitude', 'latitude', 'altitude',
+                                           'horiz_precision', 'vert_precision', 'plunge',
+                                           'plungeAzimuth', 'declination', 'lineationType', 'rockUnit',
+                                           'timedate', 'notes'])
+        with f:
+            for i in range(count):
+                locality_id, _, x, y, z = self._position()
+                writer.writerow([locality_id, self._data_id(), f"{x:.7f}", f"{y:.7f}", z,
+                                 round(self.random.uniform(2., 10.), 1),
+                                 round(self.random.uniform(2., 10.), 1),
+                                 round(self.random.uniform(0., 90.), 1),
+                                 round(self.random.uniform(0., 360.), 1), 2.1,
+                                 self.random.choice(LINEATION_TYPES), self._rock_unit(),
+                                 self._timestamp(i), f"Line {i + 1}"])
+
+    def write_notes(self, count):
+        f, writer = self._csv('note.csv', ['localityId', 'dataId', 'longitude', 'latitude', 'altitude',
+                                           'timedate', 'notes'])
+        with f:
+            for i in range(count):
+                locality_id, _, x, y, z = self._position()
+                writer.writerow([locality_id, self._data_id(), f"{x:.7f}", f"{y:.7f}", z,
+                                 self._timestamp(i), f"Note {i + 1}: " + 'observation ' * 5])
+
+    def write_images(self, count, photo_size=PHOTO_SIZE):
+        """Write image.csv and one dummy JPEG per entry in the images folder"""
+        images_dir = os.path.join(self.project_dir, 'images')
+        os.makedirs(images_dir, exist_ok=True)
+        photo = gray_jpeg(*photo_size)
+        f, writer = self._csv('image.csv', ['localityId', 'dataId', 'image name', 'heading',
+                                            'longitude', 'latitude', 'altitude', 'timedate', 'notes'])
+        with f:
+            for i in range(count):
+                locality_id, _, x, y, z = self._position()
+                image_name = f"IMG_{i + 1:06d}.jpg"
+                with open(os.path.join(images_dir, image_name), 'wb') as image:
+                    image.write(photo)
+                writer.writerow([locality_id, self._data_id(), image_name,
+                                 round(self.random.uniform(0., 360.), 1), f"{x:.7f}", f"{y:.7f}", z,
+                                 self._timestamp(i), f"Photo {i + 1}"])
+
+    def write_polylines(self, count, vertices):
+        """Write polyline.csv, a random walk of vertices per polyline, and polyline-attributes.csv"""
+        f, writer = self._csv('polyline.csv', ['dataId', 'longitude', 'latitude', 'altitude'])
+        g, attributes = self._csv('polyline-attributes.csv',
+                                  ['dataId', 'localityId', 'localityName', 'rockUnit', 'thickness',
+                                   'opacity', 'style', 'filled', 'timedate', 'notes'])
+        with f, g:
+            for i in range(count):
+                data_id = self._data_id()
+                locality_id, name, x, y, z = self._position()
+                heading = self.random.uniform(0., 360.)
+                for _ in range(vertices):
+                    writer.writerow([data_id, f"{x:.7f}", f"{y:.7f}", z])
+                    heading += self.random.gauss(0., 10.)
+                    step = self.random.uniform(0.00001, 0.00005)
+                    x += step * math.cos(math.radians(heading))
+                    y += step * math.sin(math.radians(heading))
+                attributes.writerow([data_id, locality_id, name, self._rock_unit(),
+                                     self.random.choice([0.5, 1., 2.]), 1.,
+                                     self.random.choice(LINE_STYLES), 0, self._timestamp(i),
+                                     f"Contact {i + 1}"])
+
+    def write_rock_units(self, clino=False):
+        """Write rock-units.csv, or FieldMove Clino's headerless stratcolumn.csv"""
+        if clino:
+            with open(os.path.join(self.project_dir, 'stratcolumn.csv'), 'w', newline='',
+                      encoding='utf-8') as f:
+                writer = csv.writer(f)
+                for row in range(6):
+                    writer.writerow([f"Stratigraphic column line {row + 1}"])
+                for i, (name, color) in enumerate(ROCK_UNITS):
+                    writer.writerow([name, color, 'sedimentary', 'Jurassic', 10 * (i + 1), i + 1])
+            return
+        f, writer = self._csv('rock-units.csv', ['name', 'color', 'rock_type', 'age'])
+        with f:
+            for name, color in ROCK_UNITS:
+                writer.writerow([name, color, 'sedimentary', 'Jurassic'])
+
+    def write_basemaps(self, count, size=256):
+        """Write adjacent GeoTIFF tiles covering the mapped area, side by side"""
+        xmin, ymin, xmax, ymax = self.extent
+        width = (xmax - xmin) / max(1, count)
+        for i in range(count):
+            write_basemap(os.path.join(self.project_dir, f"basemap_{i + 1}.tif"),
+                          (xmin + i * width, ymin, xmin + (i + 1) * width, ymax), size)
+
+
+def generate_project(project_dir, localities=1000, planes=1000, lines=1000, notes=100, images=10,
+                     polylines=100, vertices=200, basemaps=1, basemap_size=256, clino=False, seed=0):
+    """Write a synthetic FieldMove project folder, returns its path
+
+    Basemaps need GDAL, pass basemaps=0 to generate without it.
+    """
+    os.makedirs(project_dir, exist_ok=True)
+    generator = ProjectGenerator(project_dir, seed)
+    generator.write_localities(max(1, localities))
+    generator.write_planes(planes)
+    generator.write_lines(lines)
+    generator.write_notes(notes)
+    generator.write_images(images)
+    generator.write_polylines(polylines, vertices)
+    generator.write_rock_units(clino)
+    generator.write_basemaps(basemaps, basemap_size)
+    return project_dir
+
+
+def size_preset(size):
+    """Counts of each kind of data for a project of size localities, planes and lines"""
+    return {'localities': size, 'planes': size, 'lines': size, 'notes': max(1, size // 10),
+            'images': min(max(1, size // 100), 2000), 'polylines': max(1, size // 100)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('project_dir', help="folder to write, conventionally ending with .fm")
+    parser.add_argument('--size', type=int, default=1000,
+                        help="number of localities, planes and lines (default 1000)")
+    for name in ('localities', 'planes', 'lines', 'notes', 'images', 'polylines'):
+        parser.add_argument(f'--{name}', type=int, help=f"number of {name} (default from --size)")
+    parser.add_argument('--vertices', type=int, default=200, help="vertices per polyline")
+    parser.add_argument('--basemaps', type=int, default=1, help="number of GeoTIFF basemaps")
+    parser.add_argument('--basemap-size', type=int, default=256, help="basemap width in pixels")
+    parser.add_argument('--clino', action='store_true', help="write stratcolumn.csv as FieldMove Clino")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    counts = size_preset(args.size)
+    counts.update({name: value for name, value in vars(args).items()
+                   if name in counts and value is not None})
+    generate_project(args.project_dir, vertices=args.vertices, basemaps=args.basemaps,
+                     basemap_size=args.basemap_size, clino=args.clino, seed=args.seed, **counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# coding=utf-8
+"""Batch import test: project discovery and table consolidation.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from fieldmove_core import (SOURCE_PROJECT_FIELD, DictionaryColumn, RockUnits, concat_tables,
+                            combine_columns, find_projects, read_table, source_names)
+
+
+class BatchImportTest(unittest.TestCase):
+    """Test the QGIS-free parts of the batch import."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root = tempfile.mkdtemp()
+        self.projects = []
+        for name, header, row, units in (
+                ('day1.fm', 'dataId, dip, rockUnit', 'P1, 30, Limestone', 'Limestone, #0000ff'),
+                ('day2.fm', 'dataId, rockUnit, notes', 'P1, Marl, wet', 'Marl, #00ff00\nLimestone, #ff0000')):
+            project_dir = os.path.join(self.root, name)
+            os.makedirs(project_dir)
+            with open(os.path.join(project_dir, 'plane.csv'), 'w') as f:
+                f.write(f"{header}\n{row}\n")
+            with open(os.path.join(project_dir, 'rock-units.csv'), 'w') as f:
+                f.write(f"name, color\n{units}\n")
+            self.projects.append(project_dir)
+        os.makedirs(os.path.join(self.root, 'exports'))
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root)
+
+    def test_find_projects(self):
+        """Only the folders holding FieldMove CSV files are projects."""
+        self.assertEqual(find_projects(self.root), self.projects)
+        root, names = source_names(self.projects)
+        self.assertEqual(root, os.path.normpath(self.root))
+        self.assertEqual(names, ['day1.fm', 'day2.fm'])
+        self.assertEqual(source_names(self.projects[:1])[1], ['day1.fm'])
+        with self.assertRaises(ValueError):
+            source_names([])
+
+    def test_concat_tables(self):
+        """Columns are unified across the projects and each row keeps its source."""
+        tables = [read_table(os.path.join(project_dir, 'plane.csv')) for project_dir in self.projects]
+        merged = concat_tables(tables, 'plane', ['day1.fm', 'day2.fm'], SOURCE_PROJECT_FIELD)
+        self.assertEqual(merged.fieldnames, ['dataId', 'dip', 'rockUnit', 'notes', SOURCE_PROJECT_FIELD])
+        self.assertEqual(merged.num_rows, 2)
+        self.assertEqual(merged.column('rockUnit').tolist(), ['Limestone', 'Marl'])
+        self.assertEqual(merged.column('notes').tolist(), ['', 'wet'])
+        self.assertEqual(merged.column(SOURCE_PROJECT_FIELD).tolist(), ['day1.fm', 'day2.fm'])
+        np.testing.assert_array_equal(merged.column('dip'), [30., np.nan])
+
+    def test_combine_columns(self):
+        """Rows sharing a dataId in different projects get different keys."""
+        keys = combine_columns([DictionaryColumn.encode(['a', 'b', 'a']),
+                                DictionaryColumn.encode(['P1', 'P1', 'P1'])])
+        self.assertEqual(keys.tolist(), [('a', 'P1'), ('b', 'P1'), ('a', 'P1')])
+
+    def test_merge_rock_units(self):
+        """The first project defining a unit sets its color."""
+        merged = RockUnits.merge([RockUnits.load(project_dir) for project_dir in self.projects],
+                                 ['day1.fm', 'day2.fm'], SOURCE_PROJECT_FIELD)
+        self.assertEqual(merged.colors, {'limestone': '#0000ff', 'marl': '#00ff00'})
+        self.assertEqual(merged.table.num_rows, 3)
+        self.assertFalse(RockUnits.merge([RockUnits()], ['day1.fm'], SOURCE_PROJECT_FIELD))
+
+
+if __name__ == "__main__":
+    unittest.main()
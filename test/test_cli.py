@@ -0,0 +1,78 @@
+# coding=utf-8
+"""Command line converter test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+from fieldmove_core import ROTATION_FIELD, convert_project
+from fieldmove_core.cli import main
+
+from fieldmove_generator import generate_project
+
+
+class CommandLineConverterTest(unittest.TestCase):
+    """Test the QGIS-free conversion of project folders into GeoPackages."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root = tempfile.mkdtemp()
+        self.projects = []
+        for seed in range(2):
+            project_dir = os.path.join(self.root, f"day{seed}.fm")
+            generate_project(project_dir, localities=10, planes=40, lines=20, notes=2, images=1,
+                             polylines=3, vertices=5, basemaps=0, seed=seed)
+            self.projects.append(project_dir)
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root)
+
+    def count(self, gpkg_path, layer_name):
+        with sqlite3.connect(gpkg_path) as conn:
+            return conn.execute(f'SELECT count(*) FROM "{layer_name}"').fetchone()[0]
+
+    def test_convert_project(self):
+        """Every CSV layer is written, and a delta conversion appends nothing new."""
+        gpkg_path, layers = convert_project(self.projects[0])
+        self.assertEqual(gpkg_path, os.path.join(self.projects[0], 'day0.fm.gpkg'))
+        self.assertEqual(sorted(layers), ['image', 'line', 'localities', 'note', 'plane', 'polyline'])
+        self.assertEqual(self.count(gpkg_path, 'plane'), 40)
+        self.assertEqual(self.count(gpkg_path, 'polyline'), 3)
+        with sqlite3.connect(gpkg_path) as conn:
+            tables = {row[0] for row in conn.execute('SELECT table_name FROM gpkg_contents')}
+            self.assertIn('rock-units', tables)
+            rotation, strike = conn.execute(f'SELECT "{ROTATION_FIELD}", strike FROM plane').fetchone()
+        self.assertEqual(rotation, strike)
+        convert_project(self.projects[0], delta=True)
+        self.assertEqual(self.count(gpkg_path, 'plane'), 40)
+
+    def test_jobs(self):
+        """Projects converted in parallel each get their GeoPackage; failures set the exit code."""
+        output_dir = os.path.join(self.root, 'out')
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()) as errors:
+            status = main(self.projects + [os.path.join(self.root, 'missing.fm'),
+                                           '--jobs', '2', '-o', output_dir])
+        self.assertEqual(status, 1)
+        self.assertIn('missing.fm', errors.getvalue())
+        self.assertEqual(sorted(os.listdir(output_dir)), ['day0.fm.gpkg', 'day1.fm.gpkg'])
+        self.assertEqual(self.count(os.path.join(output_dir, 'day1.fm.gpkg'), 'line'), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# coding=utf-8
+"""Chunked progress and cancellation test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from fieldmove_core import (GeoPackageWriter, ImportCanceled, RockUnits, check_canceled, iter_chunks,
+                            write_point_layer)
+
+
+class Feedback:
+    """QgsFeedback-like object canceled after a number of progress updates"""
+
+    def __init__(self, cancel_after=None):
+        self.progress = []
+        self.cancel_after = cancel_after
+
+    def isCanceled(self):
+        return self.cancel_after is not None and len(self.progress) >= self.cancel_after
+
+    def setProgress(self, progress):
+        self.progress.append(progress)
+
+
+class FeedbackTest(unittest.TestCase):
+    """Test the chunk iteration and the cancellation of the import stages."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_iter_chunks(self):
+        """Chunks cover the rows and report the progress before each of them."""
+        feedback = Feedback()
+        self.assertEqual(list(iter_chunks(25, feedback, chunk_size=10)), [(0, 10), (10, 20), (20, 25)])
+        self.assertEqual(feedback.progress, [0.0, 40.0, 80.0, 100.0])
+        self.assertEqual(list(iter_chunks(0)), [])
+        check_canceled(None)
+
+    def test_cancel_chunks(self):
+        """A canceled feedback stops the iteration before the next chunk."""
+        chunks = iter_chunks(25, Feedback(cancel_after=2), chunk_size=10)
+        self.assertEqual(next(chunks), (0, 10))
+        self.assertEqual(next(chunks), (10, 20))
+        with self.assertRaises(ImportCanceled):
+            next(chunks)
+
+    def test_cancel_layer(self):
+        """A canceled layer write is rolled back, the other layers are kept."""
+        csv_path = os.path.join(self.temp_dir, 'note.csv')
+        gpkg_path = os.path.join(self.temp_dir, 'fieldmove.gpkg')
+        with open(csv_path, 'w') as f:
+            f.write("dataId, longitude, latitude\nN1, 1, 2\nN2, 3, 4\n")
+        with GeoPackageWriter(gpkg_path) as writer:
+            write_point_layer(writer, csv_path, rock_units=RockUnits())
+            os.rename(csv_path, os.path.join(self.temp_dir, 'image.csv'))
+            with self.assertRaises(ImportCanceled):
+                write_point_layer(writer, os.path.join(self.temp_dir, 'image.csv'),
+                                  feedback=Feedback(cancel_after=0), rock_units=RockUnits())
+            self.assertNotIn('image', writer.layer_names())
+        with sqlite3.connect(gpkg_path) as conn:
+            self.assertEqual(conn.execute('SELECT count(*) FROM note').fetchone()[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# coding=utf-8
+"""Synthetic project generator test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from fieldmove_core import FieldMoveProjectReader, RockUnits, iso_timestamps
+
+from fieldmove_generator import generate_project
+
+
+class FieldMoveGeneratorTest(unittest.TestCase):
+    """Test the synthetic projects read like FieldMove exports."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.project_dir = os.path.join(tempfile.mkdtemp(), 'synthetic.fm')
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(os.path.dirname(self.project_dir))
+
+    def test_project(self):
+        """Every layer is found with the requested number of rows."""
+        generate_project(self.project_dir, localities=20, planes=50, lines=30, notes=5, images=3,
+                         polylines=4, vertices=25, basemaps=0)
+        project = FieldMoveProjectReader(self.project_dir).read()
+        self.assertEqual(sorted(project.tables), ['image', 'line', 'localities', 'note', 'plane',
+                                                  'polyline', 'polyline-attributes'])
+        self.assertEqual(project.table('plane').num_rows, 50)
+        self.assertEqual(project.table('polyline').num_rows, 100)
+        self.assertEqual(len(project.table('polyline').column('dataId').categories), 4)
+        self.assertTrue(np.isfinite(project.table('line').column('longitude')).all())
+        timestamps = iso_timestamps(project.table('note').column('timedate'))
+        self.assertTrue(all(timestamps.tolist()))
+        self.assertEqual(len(os.listdir(os.path.join(self.project_dir, 'images'))), 3)
+        with open(os.path.join(self.project_dir, 'images', 'IMG_000001.jpg'), 'rb') as f:
+            self.assertEqual(f.read(2), b'\xff\xd8')
+
+    def test_reproducible(self):
+        """The same seed writes the same files."""
+        for project_dir in (self.project_dir, self.project_dir + '2'):
+            generate_project(project_dir, localities=5, planes=10, lines=0, notes=0, images=0,
+                             polylines=1, vertices=3, basemaps=0, seed=7)
+        with open(os.path.join(self.project_dir, 'plane.csv')) as a, \
+                open(os.path.join(self.project_dir + '2', 'plane.csv')) as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_clino(self):
+        """FieldMove Clino projects carry their rock units in stratcolumn.csv."""
+        generate_project(self.project_dir, localities=1, planes=1, lines=0, notes=0, images=0,
+                         polylines=0, basemaps=0, clino=True)
+        self.assertFalse(os.path.exists(os.path.join(self.project_dir, 'rock-units.csv')))
+        self.assertEqual(RockUnits.load(self.project_dir).colors['marl'], '#9bbb59')
+
+
+if __name__ == "__main__":
+    unittest.main()
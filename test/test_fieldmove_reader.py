@@ -0,0 +1,149 @@
+# coding=utf-8
+"""Columnar FieldMove project reader test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from fieldmove_core import (DictionaryColumn, FieldMoveProjectReader, RockUnits, TableReader,
+                            read_table, get_schema, symbol_category_column, DOUBLE, DATETIME, STRING)
+
+
+PLANE_CSV = """localityId, dataId, longitude, latitude, altitude, dip, strike, planeType, rockUnit, timedate
+L1, P1, 7.25, 43.70, 120.5, 30, 045, Bedding, Limestone, Sat Oct 19 15:00:33 2024
+L1, P2, 7.26, 43.71, , 45, 090, Joint, Limestone, Sat Oct 19 15:05:10 2024
+L2, P3, bad, 43.72, 80, 60, 180, Bedding, Marl, Sat Oct 19 15:07:00 2024
+"""
+
+
+class FieldMoveReaderTest(unittest.TestCase):
+    """Test the QGIS-free columnar reader."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.project_dir = tempfile.mkdtemp(suffix='.fm')
+        with open(os.path.join(self.project_dir, 'plane.csv'), 'w') as f:
+            f.write(PLANE_CSV)
+        for name in ('basemap.tif', 'basemap.cog.tif'):
+            with open(os.path.join(self.project_dir, name), 'wb') as f:
+                f.write(b'')
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.project_dir)
+
+    def test_read_table_types(self):
+        """Numeric columns are float64 and the rest is dictionary encoded."""
+        table = read_table(os.path.join(self.project_dir, 'plane.csv'))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.fieldnames[1], 'dataId')
+        dip = table.column('DIP')
+        self.assertEqual(dip.dtype, np.float64)
+        np.testing.assert_array_equal(dip, [30., 45., 60.])
+        self.assertTrue(np.isnan(table.column('longitude')[2]))
+        self.assertTrue(np.isnan(table.column('altitude')[1]))
+        rock_unit = table.column('rockUnit')
+        self.assertIsInstance(rock_unit, DictionaryColumn)
+        self.assertEqual(rock_unit.categories, ['Limestone', 'Marl'])
+        self.assertEqual(rock_unit.tolist(), ['Limestone', 'Limestone', 'Marl'])
+
+    def test_table_chunks(self):
+        """A CSV is parsed in chunks of rows that concatenate into the whole table."""
+        path = os.path.join(self.project_dir, 'plane.csv')
+        reader = TableReader(path, chunk_size=2)
+        chunks = list(reader)
+        self.assertEqual([chunk.num_rows for chunk in chunks], [2, 1])
+        self.assertEqual(reader.progress(), 100.0)
+        self.assertEqual(chunks[1].column('rockUnit').tolist(), ['Marl'])
+        table = read_table(path)
+        self.assertEqual(table.column('rockUnit').tolist(),
+                         chunks[0].column('rockUnit').tolist() + chunks[1].column('rockUnit').tolist())
+        selected = read_table(path, columns=['DATAID', 'dip'])
+        self.assertEqual(selected.fieldnames, ['dataId', 'dip'])
+        with open(path, 'w') as f:
+            f.write("dataId, dip\n")
+        chunks = list(TableReader(path))
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual((chunks[0].fieldnames, chunks[0].num_rows), (['dataId', 'dip'], 0))
+
+    def test_take(self):
+        """Row selection keeps the dictionary of string columns."""
+        table = read_table(os.path.join(self.project_dir, 'plane.csv'))
+        subset = table.take(np.isfinite(table.column('longitude')))
+        self.assertEqual(subset.num_rows, 2)
+        self.assertEqual(subset.column('planeType').tolist(), ['Bedding', 'Joint'])
+        mask = table.column('planeType').isin({'Joint'})
+        self.assertEqual(table.column('planeType')[mask].tolist(), ['Joint'])
+
+    def test_column_plan(self):
+        """The schema resolves coordinates and attribute kinds once per header."""
+        schema = get_schema('plane')
+        table = read_table(os.path.join(self.project_dir, 'plane.csv'), schema.numeric_fields)
+        plan = schema.compile(table.fieldnames)
+        self.assertEqual(table.fieldnames[plan.x_col], 'longitude')
+        self.assertEqual(table.fieldnames[plan.z_col], 'altitude')
+        kinds = {spec.name: spec.kind for spec in plan.attributes}
+        self.assertNotIn('latitude', kinds)
+        self.assertEqual(kinds['dip'], DOUBLE)
+        self.assertEqual(kinds['timedate'], DATETIME)
+        self.assertEqual(kinds['rockUnit'], STRING)
+        valid = plan.valid_rows(table)
+        columns = plan.decode(table, valid, {DATETIME: str.upper})
+        names = [spec.name for spec in plan.attributes]
+        self.assertEqual(columns[names.index('dataId')], ['P1', 'P2'])
+        self.assertEqual(columns[names.index('timedate')][0], 'SAT OCT 19 15:00:33 2024')
+        x, y, z = plan.coordinates(table, valid)
+        self.assertTrue(np.isnan(z[1]))
+
+    def test_project_reader(self):
+        """The reader finds the known CSV files and basemaps, not the converted ones."""
+        project = FieldMoveProjectReader(self.project_dir).read()
+        self.assertEqual(list(project.tables), ['plane'])
+        self.assertEqual(project.table('Plane').num_rows, 3)
+        self.assertEqual([os.path.basename(p) for p in project.basemaps], ['basemap.tif'])
+
+    def test_invalid_directory(self):
+        """A missing folder is rejected."""
+        with self.assertRaises(ValueError):
+            FieldMoveProjectReader(os.path.join(self.project_dir, 'missing'))
+
+    def test_rock_unit_colors(self):
+        """Colors are joined per distinct unit and unknown units are counted."""
+        with open(os.path.join(self.project_dir, 'rock-units.csv'), 'w') as f:
+            f.write("name, color\nlimestone , #0000ff\n")
+        rock_units = RockUnits.load(self.project_dir)
+        self.assertEqual(rock_units.table.name, 'rock-units')
+        colors, unmatched = rock_units.join_colors(read_table(os.path.join(self.project_dir, 'plane.csv')))
+        self.assertEqual(colors.tolist(), ['#0000ff', '#0000ff', None])
+        self.assertEqual(unmatched, {'Marl': 1})
+
+    def test_stratcolumn(self):
+        """FieldMove Clino's stratcolumn.csv has six leading rows and no header."""
+        with open(os.path.join(self.project_dir, 'stratcolumn.csv'), 'w') as f:
+            f.write("\n".join(['x'] * 6 + ["Marl, #00ff00, sedimentary, Jurassic, 10, 1"]))
+        self.assertEqual(RockUnits.load(self.project_dir).colors, {'marl': '#00ff00'})
+
+    def test_symbol_category(self):
+        """The symbol category key combines the rock unit and the type of each row."""
+        table = read_table(os.path.join(self.project_dir, 'plane.csv'))
+        keys = symbol_category_column([table.column('rockUnit'), table.column('planeType')])
+        self.assertEqual(keys.tolist(), ['Limestone - Bedding', 'Limestone - Joint', 'Marl - Bedding'])
+        self.assertEqual(len(symbol_category_column([table.column('rockUnit')[[]]])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
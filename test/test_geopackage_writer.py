@@ -0,0 +1,192 @@
+# coding=utf-8
+"""Streaming GeoPackage writer test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from fieldmove_core import (GeoPackageWriter, LayerStats, point_blobs, linestring_blob,
+                            linestring_blobs, coordinates_extent, geometry_envelope, read_layer_stats,
+                            write_layer_stats, STRING, DOUBLE)
+
+
+class GeoPackageWriterTest(unittest.TestCase):
+    """Test the sqlite3 GeoPackage writer."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.gpkg_path = os.path.join(self.temp_dir, 'plane.gpkg')
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_point_blobs(self):
+        """Points with a finite z are encoded as PointZ."""
+        blobs = point_blobs(np.array([7.25, 7.5]), np.array([43.7, 43.8]), np.array([np.nan, 12.]))
+        magic, version, flags, srs_id = struct.unpack('<2sBBi', blobs[0][:8])
+        self.assertEqual((magic, flags, srs_id), (b'GP', 1, 4326))
+        self.assertEqual(struct.unpack('<BI2d', blobs[0][8:]), (1, 1, 7.25, 43.7))
+        self.assertEqual(struct.unpack('<BI3d', blobs[1][8:]), (1, 1001, 7.5, 43.8, 12.))
+
+    def test_linestring_blobs(self):
+        """Runs of vertices are encoded like individual linestrings."""
+        x = np.array([1., 2., 3., 4., 5.])
+        y = np.array([5., 4., 3., 2., 1.])
+        blobs = linestring_blobs(x, y, [0, 2, 5])
+        self.assertEqual(blobs, [linestring_blob(x[:2], y[:2]), linestring_blob(x[2:], y[2:])])
+        self.assertEqual(linestring_blobs(x[:0], y[:0], [0]), [])
+
+    def test_write_layers(self):
+        """Features and extents are written in one transaction per layer."""
+        x = np.array([7.25, 7.5, 7.75])
+        y = np.array([43.7, 43.8, 43.9])
+        with GeoPackageWriter(self.gpkg_path) as writer:
+            writer.create_layer('plane', [('dataId', STRING), ('dip', DOUBLE)])
+            writer.insert_features('plane', point_blobs(x[:2], y[:2]), [('P1', 30.), ('P2', None)],
+                                   coordinates_extent(x[:2], y[:2]))
+            writer.insert_features('plane', point_blobs(x[2:], y[2:]), [('P3', 60.)],
+                                   coordinates_extent(x[2:], y[2:]))
+            writer.finish_layer('plane')
+            writer.create_layer('polyline', [('dataId', STRING)], 'LINESTRING')
+            writer.insert_features('polyline', [linestring_blob(x, y)], [('L1',)])
+            writer.finish_layer('polyline')
+
+        conn = sqlite3.connect(self.gpkg_path)
+        self.assertEqual(conn.execute('PRAGMA application_id').fetchone()[0], 0x47504B47)
+        rows = conn.execute('SELECT dataId, dip FROM plane ORDER BY fid').fetchall()
+        self.assertEqual(rows, [('P1', 30.), ('P2', None), ('P3', 60.)])
+        extent = conn.execute("SELECT min_x, min_y, max_x, max_y FROM gpkg_contents "
+                              "WHERE table_name = 'plane'").fetchone()
+        self.assertEqual(extent, (7.25, 43.7, 7.75, 43.9))
+        geometry_type = conn.execute("SELECT geometry_type_name FROM gpkg_geometry_columns "
+                                     "WHERE table_name = 'polyline'").fetchone()[0]
+        self.assertEqual(geometry_type, 'LINESTRING')
+        conn.close()
+
+    def test_rollback_on_error(self):
+        """An interrupted layer leaves no partial table behind."""
+        with self.assertRaises(RuntimeError):
+            with GeoPackageWriter(self.gpkg_path) as writer:
+                writer.create_layer('plane', [('dataId', STRING)])
+                writer.insert_features('plane', point_blobs(np.array([1.]), np.array([2.])), [('P1',)])
+                raise RuntimeError()
+        conn = sqlite3.connect(self.gpkg_path)
+        self.assertEqual(conn.execute('SELECT count(*) FROM gpkg_contents').fetchone()[0], 0)
+        conn.close()
+
+    def test_shared_writer(self):
+        """Layers and attribute tables are added to an existing GeoPackage"""
+        with GeoPackageWriter(self.gpkg_path) as writer:
+            with writer.layer('plane', [('dataId', STRING)]):
+                writer.insert_features('plane', point_blobs(np.array([1.]), np.array([2.])), [('P1',)])
+        with GeoPackageWriter(self.gpkg_path, overwrite=False) as writer:
+            with writer.layer('rock-units', [('name', STRING), ('color', STRING)], None):
+                writer.insert_rows('rock-units', [('Granite', '#ff0000')])
+            with self.assertRaises(ValueError):
+                with writer.layer('line', [('dataId', STRING)]):
+                    raise ValueError()
+            self.assertEqual(sorted(writer.layer_names()), ['plane', 'rock-units'])
+
+        conn = sqlite3.connect(self.gpkg_path)
+        self.assertEqual(conn.execute('SELECT count(*) FROM plane').fetchone()[0], 1)
+        contents = conn.execute("SELECT data_type, srs_id FROM gpkg_contents "
+                                "WHERE table_name = 'rock-units'").fetchone()
+        self.assertEqual(contents, ('attributes', None))
+        conn.close()
+
+    def test_append(self):
+        """Only the features with new keys are appended to an existing layer"""
+        fields = [('dataId', STRING)]
+        with GeoPackageWriter(self.gpkg_path) as writer:
+            with writer.layer('note', fields):
+                writer.create_index('note', 'dataId')
+                writer.insert_features('note', point_blobs(np.array([1.]), np.array([2.])), [('N1',)],
+                                       (1., 2., 1., 2.))
+        with GeoPackageWriter(self.gpkg_path, overwrite=False) as writer:
+            self.assertEqual(writer.layer_fields('note'), ['dataId'])
+            self.assertEqual(writer.existing_keys('note', 'dataId', ['N1', 'N2']), {'N1'})
+            with writer.layer('note', fields, append=True):
+                writer.insert_features('note', point_blobs(np.array([3.]), np.array([4.])), [('N2',)],
+                                       (3., 4., 3., 4.))
+
+        conn = sqlite3.connect(self.gpkg_path)
+        self.assertEqual(conn.execute('SELECT dataId FROM note ORDER BY fid').fetchall(), [('N1',), ('N2',)])
+        extent = conn.execute("SELECT min_x, min_y, max_x, max_y FROM gpkg_contents "
+                              "WHERE table_name = 'note'").fetchone()
+        self.assertEqual(extent, (1., 2., 3., 4.))
+        conn.close()
+
+    def test_journal(self):
+        """Only a new GeoPackage is written without a durable journal."""
+        with GeoPackageWriter(self.gpkg_path) as writer:
+            self.assertEqual(writer.conn.execute('PRAGMA synchronous').fetchone()[0], 0)
+        with GeoPackageWriter(self.gpkg_path, overwrite=False) as writer:
+            self.assertEqual(writer.conn.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+            self.assertNotEqual(writer.conn.execute('PRAGMA synchronous').fetchone()[0], 0)
+
+    def test_layer_stats(self):
+        """The catalog keeps distinct categories, counts and numeric ranges of a layer"""
+        fields = [('rockUnit', STRING), ('planeType', STRING), ('dip', DOUBLE)]
+        stats = LayerStats.for_fields(fields)
+        stats.add(['rockUnit', 'planeType', 'dip'],
+                  [['Marl', 'Marl', 'Granite'], ['Bedding', 'Bedding', 'Joint'], [10., None, 80.]],
+                  (1., 2., 3., 4.))
+        stats.add(['rockUnit', 'planeType', 'dip'], [['Marl'], ['Fault'], [45.]])
+        with GeoPackageWriter(self.gpkg_path) as writer:
+            with writer.layer('plane', fields):
+                write_layer_stats(writer, 'plane', stats)
+
+        stored = read_layer_stats(self.gpkg_path, 'plane')
+        self.assertEqual(stored.count, 4)
+        self.assertEqual(stored.extent, (1., 2., 3., 4.))
+        self.assertEqual(stored.categories[('Marl', 'Bedding')], 2)
+        self.assertEqual(stored.distinct(['rockunit']), [('Marl',), ('Granite',)])
+        self.assertIsNone(stored.distinct(['color']))
+        self.assertEqual(stored.ranges['dip'], [10., 80.])
+        self.assertIsNone(read_layer_stats(self.gpkg_path, 'line'))
+
+    def test_indexes(self):
+        """Layers get an R-tree kept up to date by triggers and indexes on the filtered fields"""
+        fields = [('dataId', STRING), ('rockUnit', STRING), ('dip', DOUBLE)]
+        self.assertEqual(geometry_envelope(linestring_blob(np.array([1., 3.]), np.array([4., 2.]))),
+                         (1., 3., 2., 4.))
+        with GeoPackageWriter(self.gpkg_path) as writer:
+            with writer.layer('plane', fields):
+                writer.insert_features('plane', point_blobs(np.array([1.]), np.array([2.])),
+                                       [('P1', 'Marl', 10.)])
+            self.assertEqual(writer.missing_indexes('plane'), [])
+        with GeoPackageWriter(self.gpkg_path, overwrite=False) as writer:
+            with writer.layer('plane', fields, append=True):
+                writer.insert_features('plane', point_blobs(np.array([5.]), np.array([6.])),
+                                       [('P2', 'Marl', 20.)])
+
+        conn = sqlite3.connect(self.gpkg_path)
+        self.assertEqual(conn.execute('SELECT id, minx, maxx, miny, maxy FROM rtree_plane_geom '
+                                      'ORDER BY id').fetchall(), [(1, 1., 1., 2., 2.), (2, 5., 5., 6., 6.)])
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({'idx_plane_dataId', 'idx_plane_rockUnit'} <= indexes)
+        self.assertEqual(conn.execute("SELECT extension_name FROM gpkg_extensions "
+                                      "WHERE table_name = 'plane'").fetchone()[0], 'gpkg_rtree_index')
+        conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
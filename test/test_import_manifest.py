@@ -0,0 +1,88 @@
+# coding=utf-8
+"""Import manifest test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fieldmove_core import ImportManifest
+
+
+class ImportManifestTest(unittest.TestCase):
+    """Test the content-hash manifest driving incremental re-imports."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.project_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.project_dir, 'note.csv')
+        self.gpkg_path = os.path.join(self.project_dir, 'note.gpkg')
+        self._write(self.csv_path, 'dataId,notes\nN1,first\n')
+        self._write(self.gpkg_path, 'gpkg')
+        self.options = {'single_geopackage': False}
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.project_dir)
+
+    @staticmethod
+    def _write(path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def _record(self):
+        manifest = ImportManifest.load(self.project_dir)
+        key = manifest.key(self.csv_path)
+        manifest.record(key, manifest.signatures(key, [self.csv_path]), self.options, [self.gpkg_path])
+        manifest.save()
+        return key
+
+    def _is_current(self, key, options=None):
+        manifest = ImportManifest.load(self.project_dir)
+        return manifest.is_current(key, manifest.signatures(key, [self.csv_path]),
+                                   options or self.options)
+
+    def test_unchanged(self):
+        """A saved entry is current, even when the file is only touched."""
+        key = self._record()
+        self.assertTrue(self._is_current(key))
+        os.utime(self.csv_path, ns=(0, 0))
+        self.assertTrue(self._is_current(key))
+        self.assertEqual(ImportManifest.load(self.project_dir).outputs(key), [self.gpkg_path])
+
+    def test_changed(self):
+        """Edited inputs, other options or missing artefacts invalidate an entry."""
+        key = self._record()
+        self.assertFalse(self._is_current(key, {'single_geopackage': True}))
+        os.remove(self.gpkg_path)
+        self.assertFalse(self._is_current(key))
+        self._write(self.gpkg_path, 'gpkg')
+        self._write(self.csv_path, 'dataId,notes\nN1,second\n')
+        self.assertFalse(self._is_current(key))
+
+    def test_style(self):
+        """Cached styles are forgotten when the entry is rebuilt."""
+        key = self._record()
+        manifest = ImportManifest.load(self.project_dir)
+        style_path = manifest.style_path('note')
+        os.makedirs(os.path.dirname(style_path))
+        self._write(style_path, '<qgis/>')
+        manifest.set_style(key, style_path)
+        self.assertEqual(manifest.style(key), style_path)
+        manifest.record(key, {}, self.options)
+        self.assertIsNone(manifest.style(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
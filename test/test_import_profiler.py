@@ -0,0 +1,137 @@
+# coding=utf-8
+"""Import profiler test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from fieldmove_core import (CHUNK_SIZE, GeoPackageWriter, ImportProfiler, RockUnits, write_line_layer,
+                            write_point_layer)
+
+
+class ImportProfilerTest(unittest.TestCase):
+    """Test the per-stage timings and the JSON report of an import."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.project_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.project_dir)
+
+    def test_stages(self):
+        """Counters are summed per file, in order of first stage."""
+        profiler = ImportProfiler(self.project_dir)
+        with profiler.stage('planes', 'parse', bytes_read=100) as stage:
+            stage.count(rows_read=10)
+        with profiler.stage('polyline', 'write') as stage:
+            stage.count(rows_written=2, vertices=50)
+        with profiler.stage('planes', 'write') as stage:
+            stage.count(rows_written=10, bytes_written=400)
+        files = profiler.files()
+        self.assertEqual(list(files), ['planes', 'polyline'])
+        self.assertEqual(files['planes']['rows_read'], 10)
+        self.assertEqual(files['planes']['rows_written'], 10)
+        self.assertEqual(files['planes']['bytes_read'], 100)
+        self.assertEqual(files['planes']['bytes_written'], 400)
+        self.assertEqual([stage['stage'] for stage in files['planes']['stages']], ['parse', 'write'])
+        self.assertEqual(files['polyline']['vertices'], 50)
+        self.assertGreaterEqual(files['planes']['wall_time'], 0.)
+
+    def test_chunk_stages(self):
+        """A stage repeated per chunk is reported once with its counters summed."""
+        profiler = ImportProfiler()
+        for rows in (10, 5):
+            with profiler.stage('planes', 'parse') as stage:
+                stage.count(rows_read=rows)
+            with profiler.stage('planes', 'write'):
+                pass
+        stages = profiler.files()['planes']['stages']
+        self.assertEqual([stage['stage'] for stage in stages], ['parse', 'write'])
+        self.assertEqual(stages[0]['rows_read'], 15)
+
+    def test_layer_rows(self):
+        """Each row of a converted file is counted once as read and once as written."""
+        count = CHUNK_SIZE + 5
+        plane_path = os.path.join(self.project_dir, 'plane.csv')
+        with open(plane_path, 'w') as f:
+            f.write("dataId, longitude, latitude, strike\n")
+            f.writelines(f"P{i}, {i % 90}, {i % 45}, {i % 360}\n" for i in range(count))
+        polyline_path = os.path.join(self.project_dir, 'polyline.csv')
+        with open(polyline_path, 'w') as f:
+            f.write("dataId, longitude, latitude\nL1, 1, 1\nL1, 2, 2\nL2, 3, 3\nL2, 4, 4\nL2, 5, 5\n")
+        with open(os.path.join(self.project_dir, 'polyline-attributes.csv'), 'w') as f:
+            f.write("dataId, rockUnit\nL1, Marl\nL2, Marl\n")
+        profiler = ImportProfiler(self.project_dir)
+        with GeoPackageWriter(os.path.join(self.project_dir, 'fieldmove.gpkg')) as writer:
+            write_point_layer(writer, plane_path, rock_units=RockUnits(), profiler=profiler)
+            write_line_layer(writer, polyline_path, rock_units=RockUnits(), profiler=profiler)
+        files = profiler.files()
+        self.assertEqual(files['plane']['rows_read'], count)
+        self.assertEqual(files['plane']['rows_written'], count)
+        # The vertex and attribute rows are read, the polylines written
+        self.assertEqual(files['polyline']['rows_read'], 7)
+        self.assertEqual(files['polyline']['rows_written'], 2)
+        self.assertEqual(files['polyline']['vertices'], 5)
+
+    def test_worker_peak(self):
+        """A file converted in a worker process reports the peak memory of that worker."""
+        worker = ImportProfiler()
+        with worker.stage('plane', 'parse') as stage:
+            stage.count(rows_read=3)
+        profiler = ImportProfiler(self.project_dir)
+        with profiler.stage('note', 'parse'):
+            pass
+        profiler.merge(worker.stages, 'plane', 1048576)
+        files = profiler.files()
+        self.assertEqual(files['plane']['peak_memory'], 1048576)
+        self.assertNotIn('peak_memory', files['note'])
+        self.assertIn('worker_peak_memory', profiler.report())
+
+    def test_failed_stage(self):
+        """A stage is recorded even when it raises."""
+        profiler = ImportProfiler()
+        with self.assertRaises(ValueError):
+            with profiler.stage('notes', 'parse'):
+                raise ValueError()
+        self.assertIn('notes', profiler.files())
+
+    def test_report(self):
+        """The report is written as JSON and summarized one line per file."""
+        profiler = ImportProfiler(self.project_dir)
+        with profiler.stage('planes', 'parse') as stage:
+            stage.count(rows_read=3)
+        profiler.finish()
+        path = os.path.join(self.project_dir, '.fieldmove_cache', 'import_profile.json')
+        profiler.write(path)
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['project'], self.project_dir)
+        self.assertEqual(report['files']['planes']['rows_read'], 3)
+        self.assertIsNotNone(report['wall_time'])
+        # The peak memory is that of the process, not of each file
+        self.assertIn('peak_memory', report)
+        self.assertNotIn('peak_memory', report['files']['planes'])
+        self.assertNotIn('peak_memory', report['files']['planes']['stages'][0])
+        summary = profiler.summary()
+        self.assertEqual(len(summary), 2)
+        self.assertTrue(summary[1].startswith('planes: parse'))
+        self.assertIn('rows read 3', summary[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# coding=utf-8
+"""Concurrent import refusal test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from qgis.core import QgsProject
+
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_plugin_module(name):
+    """Module of this plugin folder, imported as a package"""
+    sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+    return importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.{name}")
+
+
+class ImportRunningTest(unittest.TestCase):
+    """Test that a second import is refused while one is running."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.project_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.project_dir, 'note.csv'), 'w') as f:
+            f.write("dataId, longitude, latitude, notes\n")
+            f.writelines(f"N{i}, {i % 90}, {i % 45}, note\n" for i in range(100000))
+        self.module = load_plugin_module('fieldmove_project_importer')
+        self.importer = self.module.FieldMoveProjectImporter(IFACE)
+
+    def tearDown(self):
+        """Runs after each test."""
+        task = self.importer.import_task
+        if task is not None:
+            task.cancel()
+            task.waitForFinished()
+        QgsProject.instance().removeAllMapLayers()
+        shutil.rmtree(self.project_dir)
+
+    def test_second_import_refused(self):
+        """A second import (or batch import) keeps the running task and reports the refusal."""
+        task = self.importer.import_project(self.project_dir, single_geopackage=False, delta=False,
+                                            mosaic=False, cog=False, reproject=False)
+        self.assertIsNotNone(task)
+        self.assertTrue(self.importer.import_running())
+        with mock.patch.object(self.module.QMessageBox, 'warning') as warning:
+            self.assertIsNone(self.importer.import_project(self.project_dir))
+            self.assertIsNone(self.importer.batch_import([self.project_dir]))
+        self.assertEqual(warning.call_count, 2)
+        self.assertIs(self.importer.import_task, task)
+
+    def test_import_after_completion(self):
+        """Once the running import ended, another one may start."""
+        task = self.importer.import_project(self.project_dir, single_geopackage=False, delta=False,
+                                            mosaic=False, cog=False, reproject=False)
+        task.waitForFinished()
+        self.assertFalse(self.importer.import_running())
+        self.importer._check_no_import()
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ImportRunningTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
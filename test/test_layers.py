@@ -0,0 +1,163 @@
+# coding=utf-8
+"""Point and polyline layer conversion test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from fieldmove_core import (CHUNK_SIZE, GeoPackageWriter, RockUnits, convert_layer, geometry_envelope,
+                            VERTEX_HASH_FIELD, read_layer_stats, update_rotation, write_line_layer,
+                            write_point_layer)
+
+POLYLINE_ATTRIBUTES = ("dataId, localityId, rockUnit, thickness, opacity, style, filled, timedate\n"
+                       "L1, LOC1, Marl, 1, 1, solid, 1, 2024-05-01 10:00:00\n"
+                       "L2, LOC1, Marl, 1, 1, solid, 1, 2024-05-01 10:05:00\n")
+
+
+class LayersTest(unittest.TestCase):
+    """Test the conversion of FieldMove CSV tables into GeoPackage layers."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.project_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.project_dir, 'polyline.csv')
+        self.gpkg_path = os.path.join(self.project_dir, 'polyline.gpkg')
+        with open(os.path.join(self.project_dir, 'polyline-attributes.csv'), 'w') as f:
+            f.write(POLYLINE_ATTRIBUTES)
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.project_dir)
+
+    def write_polylines(self, vertices, delta=False):
+        with open(self.csv_path, 'w') as f:
+            f.write("dataId, longitude, latitude\n")
+            f.writelines(f"{data_id}, {x}, {y}\n" for data_id, x, y in vertices)
+        with GeoPackageWriter(self.gpkg_path, overwrite=not delta) as writer:
+            write_line_layer(writer, self.csv_path, delta=delta, rock_units=RockUnits())
+
+    def test_invalid_vertex(self):
+        """Vertices without coordinates are skipped, the envelopes and extent stay finite."""
+        logs = []
+        with open(self.csv_path, 'w') as f:
+            f.write("dataId, longitude, latitude\nL1, 1, 2\nL1, , 3\nL1, 2, 4\nL2, 5, 5\nL2, 6, nan\n")
+        with GeoPackageWriter(self.gpkg_path) as writer:
+            write_line_layer(writer, self.csv_path, rock_units=RockUnits(), log=logs.append)
+        self.assertEqual(len(logs), 1)
+        with sqlite3.connect(self.gpkg_path) as conn:
+            # L2 is left with a single vertex
+            rows = conn.execute('SELECT dataId, geom FROM polyline').fetchall()
+            self.assertEqual([row[0] for row in rows], ['L1'])
+            self.assertEqual(geometry_envelope(rows[0][1]), (1., 2., 2., 4.))
+            extent = conn.execute("SELECT min_x, min_y, max_x, max_y FROM gpkg_contents "
+                                  "WHERE table_name = 'polyline'").fetchone()
+            self.assertEqual(extent, (1., 2., 2., 4.))
+            self.assertEqual(conn.execute('SELECT minx, maxx FROM rtree_polyline_geom').fetchall(),
+                             [(1., 2.)])
+
+    def test_point_chunks(self):
+        """A point CSV longer than a chunk is written whole, then only its new rows in delta."""
+        csv_path = os.path.join(self.project_dir, 'note.csv')
+        gpkg_path = os.path.join(self.project_dir, 'note.gpkg')
+        count = CHUNK_SIZE * 2 + 10
+        for rows, delta in ((count, False), (count + 5, True)):
+            with open(csv_path, 'w') as f:
+                f.write("dataId, longitude, latitude, notes\n")
+                f.writelines(f"N{i}, {i % 90}, {i % 45}, note {i % 3}\n" for i in range(rows))
+            with GeoPackageWriter(gpkg_path, overwrite=not delta) as writer:
+                write_point_layer(writer, csv_path, delta=delta, rock_units=RockUnits())
+            with sqlite3.connect(gpkg_path) as conn:
+                self.assertEqual(conn.execute('SELECT count(*) FROM note').fetchone()[0], rows)
+                self.assertEqual(conn.execute('SELECT count(DISTINCT dataId) FROM note').fetchone()[0],
+                                 rows)
+
+    def test_extended_polyline(self):
+        """A polyline extended between two delta imports is rewritten with its new vertices."""
+        vertices = [('L1', 1, 1), ('L1', 2, 2)]
+        self.write_polylines(vertices)
+        self.write_polylines(vertices + [('L2', 5, 5), ('L2', 6, 6)], delta=True)
+        self.write_polylines(vertices + [('L2', 5, 5), ('L2', 6, 6), ('L1', 3, 3)], delta=True)
+        with sqlite3.connect(self.gpkg_path) as conn:
+            rows = conn.execute('SELECT dataId, geom FROM polyline ORDER BY dataId').fetchall()
+        self.assertEqual([row[0] for row in rows], ['L1', 'L2'])
+        self.assertEqual(geometry_envelope(rows[0][1]), (1., 3., 1., 3.))
+
+    def test_vertex_hash(self):
+        """Delta imports compare the stored vertex hashes, a moved vertex rewrites the layer."""
+        vertices = [('L1', 1, 1), ('L1', 2, 2)]
+        self.write_polylines(vertices)
+        with sqlite3.connect(self.gpkg_path) as conn:
+            hashes = conn.execute(f'SELECT {VERTEX_HASH_FIELD} FROM polyline').fetchall()
+        self.write_polylines(vertices + [('L2', 5, 5), ('L2', 6, 6)], delta=True)
+        with sqlite3.connect(self.gpkg_path) as conn:
+            rows = conn.execute(f'SELECT fid, dataId, {VERTEX_HASH_FIELD} FROM polyline ORDER BY fid').fetchall()
+        # The unchanged polyline was kept, only the new one appended
+        self.assertEqual(rows[0], (1, 'L1', hashes[0][0]))
+        self.assertEqual([row[1] for row in rows], ['L1', 'L2'])
+        self.assertNotEqual(rows[0][2], rows[1][2])
+        self.write_polylines([('L1', 1, 1), ('L1', 2, 3), ('L2', 5, 5), ('L2', 6, 6)], delta=True)
+        with sqlite3.connect(self.gpkg_path) as conn:
+            rows = conn.execute('SELECT dataId, geom FROM polyline ORDER BY dataId').fetchall()
+        self.assertEqual(geometry_envelope(rows[0][1]), (1., 2., 1., 3.))
+
+    def test_delta_rock_units(self):
+        """A delta import only reports the rock units of the rows it appends."""
+        csv_path = os.path.join(self.project_dir, 'plane.csv')
+        gpkg_path = os.path.join(self.project_dir, 'plane.gpkg')
+        with open(os.path.join(self.project_dir, 'rock-units.csv'), 'w') as f:
+            f.write("name, color\nMarl, #00ff00\n")
+        rows = ["P1, 1, 1, 30, Unknown", "P2, 2, 2, 40, Marl"]
+        logs = []
+        for delta in (False, True):
+            with open(csv_path, 'w') as f:
+                f.write("dataId, longitude, latitude, strike, rockUnit\n" + "\n".join(rows) + "\n")
+            with GeoPackageWriter(gpkg_path, overwrite=not delta) as writer:
+                write_point_layer(writer, csv_path, delta=delta, log=logs.append)
+            rows.append("P3, 3, 3, 50, Marl")
+        self.assertEqual(len(logs), 1)
+        with sqlite3.connect(gpkg_path) as conn:
+            self.assertEqual(conn.execute('SELECT color FROM plane ORDER BY fid').fetchall(),
+                             [(None,), ('#00ff00',), ('#00ff00',)])
+
+    def test_convert_layer(self):
+        """A layer converted on its own is returned with its warnings, then its rotation updated."""
+        csv_path = os.path.join(self.project_dir, 'plane.csv')
+        with open(os.path.join(self.project_dir, 'rock-units.csv'), 'w') as f:
+            f.write("name, color\nSandstone, #ffff00\n")
+        with open(csv_path, 'w') as f:
+            f.write("dataId, longitude, latitude, strike, rockUnit\nP1, 1, 1, 30, Marl\nP2, 2, 2, 40, Marl\n")
+        gpkg_path, warnings, stages, peak = convert_layer(csv_path, os.path.join(self.project_dir, 'plane.gpkg'),
+                                                    self.project_dir)
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('parse', [stage.name for stage in stages])
+        if peak is not None:
+            self.assertGreater(peak, 0)
+        with GeoPackageWriter(gpkg_path, overwrite=False) as writer:
+            self.assertEqual(update_rotation(writer, 'plane', lambda base, x, y: base + x, 'EPSG:3857'), 2)
+            # Only the values that change are written
+            self.assertEqual(update_rotation(writer, 'plane', lambda base, x, y: base + x, 'EPSG:3857'), 0)
+            self.assertEqual(update_rotation(writer, 'plane', lambda base, x, y: base + x * (x > 1),
+                                             'EPSG:3857'), 1)
+        with sqlite3.connect(gpkg_path) as conn:
+            self.assertEqual(conn.execute('SELECT symbol_rotation FROM plane ORDER BY fid').fetchall(),
+                             [(30.,), (42.,)])
+        stats = read_layer_stats(gpkg_path, 'plane')
+        self.assertEqual(stats.properties['rotation_crs'], 'EPSG:3857')
+        self.assertEqual(stats.ranges['symbol_rotation'], [30., 42.])
+
+
+if __name__ == "__main__":
+    unittest.main()
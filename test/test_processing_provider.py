@@ -0,0 +1,102 @@
+# coding=utf-8
+"""Processing algorithm test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from qgis.core import QgsProcessingContext, QgsProcessingFeedback, QgsProject, QgsVectorLayer
+
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_plugin_module(name):
+    """Module of this plugin folder, imported as a package"""
+    sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+    return importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.{name}")
+
+
+class ProcessingAlgorithmTest(unittest.TestCase):
+    """Test the import algorithm of the Processing provider."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.project_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.project_dir, 'note.csv'), 'w') as f:
+            f.write("dataId, longitude, latitude, notes\nN1, 1, 2, first\nN2, 3, 4, second\n")
+        importer = load_plugin_module('fieldmove_project_importer').FieldMoveProjectImporter(IFACE)
+        provider = load_plugin_module('processing_provider')
+        self.algorithm = provider.ImportFieldMoveProjectAlgorithm(importer)
+        self.algorithm.initAlgorithm()
+
+    def tearDown(self):
+        """Runs after each test."""
+        QgsProject.instance().removeAllMapLayers()
+        shutil.rmtree(self.project_dir)
+
+    def run_algorithm(self, algorithm, context):
+        results, ok = algorithm.run({algorithm.PROJECT_DIR: self.project_dir}, context,
+                                    QgsProcessingFeedback())
+        self.assertTrue(ok)
+        return results
+
+    def test_import(self):
+        """The layers are output and loaded on completion, with one post-processor each."""
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        results = self.run_algorithm(self.algorithm, context)
+        self.assertEqual(len(results[self.algorithm.OUTPUT_LAYERS]), 1)
+        self.assertEqual(len(context.layersToLoadOnCompletion()), 1)
+        self.assertEqual(len(self.algorithm._post_processors), 1)
+        # Another run keeps its own post-processors
+        self.assertEqual(self.algorithm.createInstance()._post_processors, [])
+
+    def test_post_processors_released(self):
+        """The post-processors are released once they styled their layer."""
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        self.run_algorithm(self.algorithm, context)
+        for uri, details in context.layersToLoadOnCompletion().items():
+            layer = QgsVectorLayer(uri, details.name, 'ogr')
+            self.assertTrue(layer.isValid())
+            QgsProject.instance().addMapLayer(layer)
+            details.postProcessor().postProcessLayer(layer, context, QgsProcessingFeedback())
+        self.assertEqual(self.algorithm._post_processors, [])
+        # A second run starts without the post-processors of the first
+        self.run_algorithm(self.algorithm, context)
+        self.assertEqual(len(self.algorithm._post_processors), 1)
+
+    def test_canceled(self):
+        """A canceled Processing feedback stops the import, without output."""
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        feedback = QgsProcessingFeedback()
+        feedback.cancel()
+        results, ok = self.algorithm.run({self.algorithm.PROJECT_DIR: self.project_dir}, context, feedback)
+        self.assertFalse(ok)
+        self.assertEqual(context.layersToLoadOnCompletion(), {})
+        self.assertFalse(os.path.exists(os.path.join(self.project_dir, 'note.gpkg')))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ProcessingAlgorithmTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,43 @@
+# coding=utf-8
+"""Batch timestamp parser test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'guillaume.duclaux@univ-cotedazur.fr'
+__date__ = '2025-03-29'
+__copyright__ = "Copyright 2025, Guillaume Duclaux, Université Côte d'Azur"
+
+import unittest
+
+from fieldmove_core import DictionaryColumn, iso_timestamps, epoch_timestamps
+
+
+class TimestampsTest(unittest.TestCase):
+    """Test the column-wise timestamp conversion."""
+
+    def test_fieldmove_format(self):
+        """FieldMove timestamps, with or without weekday, become ISO strings."""
+        column = DictionaryColumn.encode(['Sat Oct 19 15:00:33 2024', 'Oct 20 08:05:00 2024',
+                                          'Sat Oct 19 15:00:33 2024', ''])
+        self.assertEqual(iso_timestamps(column).tolist(),
+                         ['2024-10-19T15:00:33', '2024-10-20T08:05:00', '2024-10-19T15:00:33', None])
+
+    def test_invalid_values(self):
+        """Unparseable or impossible dates are None."""
+        column = ['Fri Feb 30 10:00:00 2024', 'not a date', '2024-01-02 03:04:05']
+        self.assertEqual(iso_timestamps(column).tolist(), [None, None, '2024-01-02T03:04:05'])
+
+    def test_epoch(self):
+        """Epoch seconds come with the mask of the valid rows."""
+        seconds, valid = epoch_timestamps(['Thu Jan 01 00:01:00 1970', 'oops'])
+        self.assertEqual(seconds.tolist(), [60, 0])
+        self.assertEqual(valid.tolist(), [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldMoveProjectImporter
+                                 A QGIS plugin
+ This plugins consolidate FieldMove project files into a QGIS project
+ Thumbnail cache of the project photos shown in the image layer map tips
+                              -------------------
+        begin                : 2025-03-29
+        git sha              : $Format:%H$
+        copyright            : (C) 2025 by Guillaume Duclaux, Université Côte d'Azur
+        email                : guillaume.duclaux@univ-cotedazur.fr
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from qgis.PyQt.QtCore import QSize, Qt
+from qgis.PyQt.QtGui import QImageIOHandler, QImageReader
+
+from .fieldmove_core import CACHE_DIR, check_canceled
+
+# Size of the photo in the map tips
+THUMBNAIL_SIZE = QSize(350, 250)
+
+# Bound of the cache folder, the least recently used thumbnails are evicted beyond it
+THUMBNAIL_CACHE_BYTES = 256 * 1024 * 1024
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+class ThumbnailCache:
+    """Downscaled copies of the project photos, under the same file names
+
+    A thumbnail is rebuilt when its photo is newer. Its modification time
+    doubles as last use time for the LRU eviction, which never removes the
+    thumbnails of the photos still in the project.
+    """
+
+    def __init__(self, project_dir, max_bytes=THUMBNAIL_CACHE_BYTES):
+        self.cache_dir = os.path.join(project_dir, CACHE_DIR, 'thumbnails')
+        self.max_bytes = max_bytes
+
+    def thumbnail_path(self, image_path):
+        return os.path.join(self.cache_dir, os.path.basename(image_path))
+
+    def thumbnail(self, image_path):
+        """Path of the thumbnail of a photo, created if missing or outdated, None if unreadable"""
+        thumbnail_path = self.thumbnail_path(image_path)
+        try:
+            if os.path.getmtime(thumbnail_path) >= os.path.getmtime(image_path):
+                os.utime(thumbnail_path)  # Mark as recently used
+                return thumbnail_path
+        except OSError:
+            pass
+
+        reader = QImageReader(image_path)
+        # Apply the EXIF orientation, and decode straight at the thumbnail size
+        reader.setAutoTransform(True)
+        box = THUMBNAIL_SIZE
+        if reader.transformation() & QImageIOHandler.TransformationRotate90:
+            box = box.transposed()
+        size = reader.size()
+        if size.isValid() and (size.width() > box.width() or size.height() > box.height()):
+            reader.setScaledSize(size.scaled(box, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if not image.save(thumbnail_path):
+            return None
+        return thumbnail_path
+
+    def build(self, images_dir, feedback=None, workers=None):
+        """Create the thumbnails of the photos of a folder in parallel, then bound the cache (worker thread)
+
+        The thumbnails of these photos are kept whatever the size bound, the
+        map tips of the imported layer showing them. Returns the cache folder.
+        """
+        image_paths = [os.path.join(images_dir, name) for name in sorted(os.listdir(images_dir))
+                       if name.lower().endswith(IMAGE_EXTENSIONS)]
+        # Qt decodes the images outside of the GIL
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            for done, _ in enumerate(pool.map(self.thumbnail, image_paths), 1):
+                check_canceled(feedback)
+                if feedback is not None:
+                    feedback.setProgress(100. * done / len(image_paths))
+        self.evict(keep=image_paths)
+        return self.cache_dir
+
+    def evict(self, keep=()):
+        """Delete the least recently used thumbnails beyond the size bound, except those of keep photos"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        kept = {os.path.normcase(self.thumbnail_path(image_path)) for image_path in keep}
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if os.path.normcase(path) in kept:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass